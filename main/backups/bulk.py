@@ -1,20 +1,97 @@
 """ Classes for interacting with Salesforce Bulk API """
 
 import concurrent.futures
+import datetime
 import json
+import math
 from collections import OrderedDict
-from functools import partial
+from decimal import Decimal
 from time import sleep
 from typing import Any, Dict, Iterable, List, Optional, Union, cast
 
 import requests
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    orjson = None
+
 from .exceptions import SalesforceGeneralError
 from .util import BulkDataAny, BulkDataStr, Headers, Proxies, \
     call_salesforce, \
     list_from_generator
 
 
+_NON_FINITE_MESSAGE = 'Out of range float values are not JSON compliant'
+
+
+def _json_default(value: Any) -> Any:
+    """ Fallback for values the JSON encoders can not serialize natively """
+    if isinstance(value, Decimal):
+        if not value.is_finite():
+            raise ValueError(_NON_FINITE_MESSAGE)
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _reject_non_finite(value: Any) -> None:
+    """ Raise on NaN and infinite floats or Decimals anywhere in a record or list
+
+    orjson writes NaN and infinity as null, which clears the field on
+    an update, while the standard library encoder rejects them. Checking
+    before encoding keeps both encoders rejecting the same data.
+    """
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(_NON_FINITE_MESSAGE)
+    elif isinstance(value, Decimal):
+        if not value.is_finite():
+            raise ValueError(_NON_FINITE_MESSAGE)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _reject_non_finite(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _reject_non_finite(item)
+
+
+def _encode_record(record: Dict[str, Any]) -> bytes:
+    """ Encode a single record to JSON bytes
+
+    orjson is used when it is installed, it writes non-ascii characters
+    as utf-8 instead of escaping them. The standard library encoder is
+    used otherwise. Both raise a ValueError on NaN and infinite values,
+    replace them with None to send a null.
+    """
+    if orjson is not None:
+        _reject_non_finite(record)
+        return orjson.dumps(record,
+                            default=_json_default
+                            )
+    return json.dumps(record,
+                      default=_json_default,
+                      allow_nan=False
+                      ).encode('utf-8')
+
+
+def _encode_batch(records: BulkDataAny) -> bytes:
+    """ Encode a list of records to a JSON array in bytes
+
+    NaN and infinite values are rejected the same way as `_encode_record`.
+    """
+    if orjson is not None:
+        _reject_non_finite(records)
+        return orjson.dumps(records,
+                            default=_json_default
+                            )
+    return json.dumps(records,
+                      default=_json_default,
+                      allow_nan=False
+                      ).encode('utf-8')
+
+
 class SFBulkHandler:
     """ Bulk API request handler
     Intermediate class which allows us to use commands,
@@ -56,6 +133,12 @@ class SFBulkHandler:
             'X-PrettyPrint': '1'
             }
 
+        # Bulk 2.0 ingest jobs live under the REST data endpoint of the same
+        # api version, i.e. services/async/59.0/ -> services/data/v59.0/
+        self.bulk2_url = self.bulk_url.replace('/services/async/',
+                                               '/services/data/v'
+                                               ) + 'jobs/ingest/'
+
     def __getattr__(self,
                     name: str
                     ) -> "SFBulkType":
@@ -73,7 +156,8 @@ class SFBulkHandler:
                    batch_size: int = 10000,
                    use_serial: bool = False,
                    bypass_results: bool = False,
-                   include_detailed_results: bool = False
+                   include_detailed_results: bool = False,
+                   lazy_operation: bool = False
                    ):
         """ Perform any DML operation on any custom or
             standard object in Salesforce
@@ -100,6 +184,9 @@ class SFBulkHandler:
         * bypass_results    -- default: bool = False,
         * include_detailed_results  --default: bool = False,
         * external_id_field -- unique identifier field for upsert operations.
+        * lazy_operation    -- default: bool = False, return a generator
+                               yielding the results of each batch, in batch
+                               order, as soon as it finishes
         """
         return SFBulkType(object_name=object_name,
                           bulk_url=self.bulk_url,
@@ -110,9 +197,87 @@ class SFBulkHandler:
                                                            batch_size,
                                                            use_serial,
                                                            bypass_results,
-                                                           include_detailed_results
+                                                           include_detailed_results,
+                                                           lazy_operation
                                                            )
 
+    def submit_dml_bulk2(self,
+                         object_name: str,
+                         dml: str,
+                         csv_data: Iterable[Union[str, bytes]],
+                         external_id_field: Optional[str] = None,
+                         wait: int = 5,
+                         lazy_operation: bool = False
+                         ) -> Union[Dict[str, Any], Iterable[Dict[str, Any]]]:
+        """ Perform any DML operation through a Bulk API 2.0 ingest job
+            i.e. insert/upsert/update/delete/hardDelete
+
+            CSV data is uploaded as-is instead of being encoded to JSON
+            and split into Bulk v1 batches of 10,000 records.
+
+        Arguments:
+
+        * object_name       -- SF object
+        * dml               -- insert, upsert, update, delete, hardDelete
+        * csv_data          -- iterable of CSV files as str or bytes,
+                               one job is created per item
+        * external_id_field -- unique identifier field for upsert operations.
+        * wait              -- seconds to sleep between checking job status
+        * lazy_operation    -- return a generator yielding the results of
+                               each job as soon as it completes
+
+        Returns a dict with the completed `jobs` and one generator per
+        results type (`successfulResults`, `failedResults`,
+        `unprocessedrecords`) streaming the CSV results of every job as bytes
+        with a single header line.
+
+        With `lazy_operation=True` a generator is returned instead, yielding
+        one dict per job in upload order as soon as the job completes, with
+        the completed `job` and one generator per results type streaming the
+        CSV results of that job with its own header line.
+        """
+        bulk2 = SFBulk2IngestType(object_name=object_name,
+                                  bulk2_url=self.bulk2_url,
+                                  session_id=self.session_id,
+                                  session=self.session
+                                  )
+        operation = 'hardDelete' if dml == 'hard_delete' else dml
+
+        if lazy_operation:
+            def stream_jobs() -> Iterable[Dict[str, Any]]:
+                for job in bulk2.iter_ingest(operation=operation,
+                                             csv_data=csv_data,
+                                             external_id_field=external_id_field,
+                                             wait=wait
+                                             ):
+                    job_results: Dict[str, Any] = {'job': job}
+                    for results_type in SFBulk2IngestType.RESULTS_TYPES:
+                        job_results[results_type] = bulk2.get_ingest_results(
+                            job_id=job['id'],
+                            results_type=results_type
+                            )
+                    yield job_results
+
+            return stream_jobs()
+
+        jobs = bulk2.ingest(operation=operation,
+                            csv_data=csv_data,
+                            external_id_field=external_id_field,
+                            wait=wait
+                            )
+
+        def stream_results(results_type: str) -> Iterable[bytes]:
+            for idx, job in enumerate(jobs):
+                yield from bulk2.get_ingest_results(job_id=job['id'],
+                                                    results_type=results_type,
+                                                    skip_header=idx > 0
+                                                    )
+
+        results: Dict[str, Any] = {'jobs': jobs}
+        for results_type in SFBulk2IngestType.RESULTS_TYPES:
+            results[results_type] = stream_results(results_type)
+        return results
+
 
 class SFBulkType:
     """ Interface to Bulk/Async API functions"""
@@ -144,7 +309,8 @@ class SFBulkType:
     def _create_job(self,
                     operation: str,
                     use_serial: bool,
-                    external_id_field: Optional[str] = None
+                    external_id_field: Optional[str] = None,
+                    pk_chunking: Union[bool, int] = False
                     ) -> Any:
         """ Create a bulk job
 
@@ -153,6 +319,9 @@ class SFBulkType:
         * operation -- Bulk operation to be performed by job
         * use_serial -- Process batches in order
         * external_id_field -- unique identifier field for upsert operations
+        * pk_chunking -- for query/queryAll, split the query into Id ranges,
+                         `True` for the default chunk size or an int chunk
+                         size of up to 250,000 records
         """
 
         payload = {
@@ -165,12 +334,18 @@ class SFBulkType:
         if operation == 'upsert':
             payload['externalIdFieldName'] = external_id_field
 
+        headers = self.headers
+        if pk_chunking:
+            headers = dict(self.headers)
+            headers['Sforce-Enable-PKChunking'] = 'true' \
+                if pk_chunking is True else f'chunkSize={int(pk_chunking)}'
+
         url = f'{self.bulk_url}job'
 
         result = call_salesforce(url=url,
                                  method='POST',
                                  session=self.session,
-                                 headers=self.headers,
+                                 headers=headers,
                                  data=json.dumps(payload,
                                                  allow_nan=False
                                                  )
@@ -223,11 +398,12 @@ class SFBulkType:
 
         url = f'{self.bulk_url}job/{job_id}/batch'
 
-        data_: Union[BulkDataAny, str]
-        if operation not in ('query', 'queryAll'):
-            data_ = json.dumps(data,
-                               allow_nan=False
-                               )
+        data_: Union[BulkDataAny, str, bytes]
+        if isinstance(data, bytes):
+            # prebuilt JSON batch from _build_autosized_batches
+            data_ = data
+        elif operation not in ('query', 'queryAll'):
+            data_ = _encode_batch(data)
         else:
             data_ = data
 
@@ -254,6 +430,152 @@ class SFBulkType:
                                  )
         return result.json(object_pairs_hook=OrderedDict)
 
+    def _get_batches(self,
+                     job_id: str
+                     ) -> List[Any]:
+        """ Get the status of every batch of a job in a single request """
+
+        url = f'{self.bulk_url}job/{job_id}/batch'
+
+        result = call_salesforce(url=url,
+                                 method='GET',
+                                 session=self.session,
+                                 headers=self.headers
+                                 )
+        return result.json(object_pairs_hook=OrderedDict)['batchInfo']
+
+    def _poll_batches(self,
+                      job_id: str,
+                      batch_ids: List[str],
+                      wait: float = 5,
+                      min_wait: float = 0.5,
+                      backoff: float = 1.5
+                      ) -> Iterable[Any]:
+        """ Yield the status of each batch as soon as it finishes
+
+        A single job-level batch list request is made per tick instead of
+        one request per batch. The delay between ticks starts at `min_wait`,
+        grows by `backoff` on every tick where no batch finished, up to
+        `wait` seconds, and drops back to `min_wait` when a batch finishes.
+
+        Arguments:
+
+        * job_id -- id of the job the batches belong to
+        * batch_ids -- ids of the batches to wait on
+        * wait -- max seconds to sleep between checking batch status
+        * min_wait -- seconds to sleep after a tick where a batch finished
+        * backoff -- growth of the delay on ticks where no batch finished
+        """
+        pending = set(batch_ids)
+        delay = min(min_wait, wait)
+        while pending:
+            finished = [batch for batch in self._get_batches(job_id=job_id)
+                        if batch['id'] in pending and batch['state'] in
+                        ['Completed', 'Failed', 'NotProcessed']]
+            for batch in finished:
+                pending.discard(batch['id'])
+                yield batch
+            if not pending:
+                break
+            delay = min(min_wait, wait) if finished else \
+                min(delay * backoff, wait)
+            sleep(delay)
+
+    def _wait_for_pk_chunks(self,
+                            job_id: str,
+                            batch_id: str,
+                            wait: float = 5,
+                            min_wait: float = 0.5,
+                            backoff: float = 1.5
+                            ) -> List[Any]:
+        """ Wait for Salesforce to split a PK chunked query into batches
+
+        The original batch of a PK chunked job is marked `NotProcessed` once
+        one batch per Id range is added to the job, those batches are
+        returned. The delay between checks backs off like `_poll_batches`.
+
+        Arguments:
+
+        * job_id -- id of the PK chunked job
+        * batch_id -- id of the original query batch
+        * wait -- max seconds to sleep between checking batch status
+        """
+        delay = min(min_wait, wait)
+        while True:
+            batches = self._get_batches(job_id=job_id)
+            original = next(batch for batch in batches
+                            if batch['id'] == batch_id)
+            if original['state'] == 'NotProcessed':
+                return [batch for batch in batches if batch['id'] != batch_id]
+            if original['state'] == 'Failed':
+                raise SalesforceGeneralError('',
+                                             original['state'],
+                                             original['jobId'],
+                                             original['stateMessage']
+                                             )
+            sleep(delay)
+            delay = min(delay * backoff, wait)
+
+    def _iter_pk_chunked_results(self,
+                                 job_id: str,
+                                 batches: List[Any],
+                                 operation: str,
+                                 wait: float = 5,
+                                 max_workers: Optional[int] = None
+                                 ) -> Iterable[List[Any]]:
+        """ Yield each result set of a PK chunked query as it is downloaded
+
+        The result sets of each chunk are downloaded on a thread pool as
+        soon as the job-level poller sees the chunk finish, and are yielded
+        in the order they finish downloading rather than in Id order.
+
+        Arguments:
+
+        * job_id -- id of the PK chunked job
+        * batches -- chunk batches returned by `_wait_for_pk_chunks`
+        * operation -- query or queryAll
+        * wait -- max seconds to sleep between checking batch status
+        * max_workers -- number of chunks downloaded at once
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
+            futures = set()
+            for batch in self._poll_batches(
+                    job_id=job_id,
+                    batch_ids=[batch['id'] for batch in batches],
+                    wait=wait
+                    ):
+                if batch['state'] == 'Failed':
+                    raise SalesforceGeneralError('',
+                                                 batch['state'],
+                                                 batch['jobId'],
+                                                 batch['stateMessage']
+                                                 )
+                futures.add(pool.submit(self._fetch_batch_results,
+                                        batch,
+                                        operation
+                                        ))
+                for future in [f for f in futures if f.done()]:
+                    futures.discard(future)
+                    yield from future.result()
+            for future in concurrent.futures.as_completed(futures):
+                yield from future.result()
+
+    def _fetch_batch_results(self,
+                             batch: Dict[str, Any],
+                             operation: str,
+                             include_detailed_results: bool = False
+                             ) -> List[Any]:
+        """ Download the results of a finished batch """
+        if include_detailed_results:
+            return list(self._get_batch_request_with_batch_results(
+                job_id=batch['jobId'],
+                batch_id=batch['id']
+                ))
+        return list(self._get_batch_results(job_id=batch['jobId'],
+                                            batch_id=batch['id'],
+                                            operation=operation
+                                            ))
+
     def _get_batch_results(
             self,
             job_id: str,
@@ -320,53 +642,25 @@ class SFBulkType:
         yield results
 
     def worker(self,
-               batch: Dict[str, Any],
-               operation: str,
-               wait: int = 5,
-               bypass_results: bool = False,
-               include_detailed_results: bool = False
+               batch: Dict[str, Any]
                ) -> Iterable[Any]:
-        """ Gets batches from concurrent worker threads.
-        self._bulk_operation passes batch jobs.
-        The worker function checks each batch job waiting for it complete
-        and appends the results.
+        """ Gets the job id of a batch from concurrent worker threads.
+        self._bulk_operation only passes batch jobs here when
+        `bypass_results` is set, the batches are not waited on. Batches whose
+        results are returned are polled by `_poll_batches` instead.
         """
-        if not bypass_results:
-            batch_status = self._get_batch(job_id=batch['jobId'],
-                                           batch_id=batch['id']
-                                           )['state']
-
-            while batch_status not in ['Completed', 'Failed', 'NotProcessed']:
-                sleep(wait)
-                batch_status = self._get_batch(job_id=batch['jobId'],
-                                               batch_id=batch['id']
-                                               )['state']
-
-            if include_detailed_results:
-                result = self._get_batch_request_with_batch_results(
-                    job_id=batch['jobId'],
-                    batch_id=batch['id']
-                    )
-            else:
-                result = self._get_batch_results(job_id=batch['jobId'],
-                                                 batch_id=batch['id'],
-                                                 operation=operation
-                                                 )
-        else:
-            result = [{
-                'bypass_results': bypass_results,
-                'job_id': batch['jobId']
-                }]
-        return result
+        return [{
+            'bypass_results': True,
+            'job_id': batch['jobId']
+            }]
 
-    def _add_autosized_batches(
+    def _build_autosized_batches(
             self,
-            data: BulkDataAny,
-            operation: str,
-            job: str
-            ) -> List[Any]:
+            data: BulkDataAny
+            ) -> List[bytes]:
         """
-        Auto-create batches that respect bulk api V1 limits.
+        Encode every record to JSON once and split the encoded records into
+        batches that respect bulk api V1 limits.
 
         bulk v1 api has following limits
         number of records <= 10000
@@ -381,13 +675,13 @@ class SFBulkType:
         /salesforce_app_limits_cheatsheet
         /salesforce_app_limits_platform_bulkapi.htm#ingest_jobs
 
-        Our JSON serialization uses the default `ensure_ascii=True`, so the
-        character and byte lengths will be the same. Therefore we only need
-        to adhere to a single length limit of 10,000,000 characters.
+        The encoded records may hold multi-byte utf-8 characters, so the
+        byte length is always at least the character length. Keeping the
+        byte length under 10,000,000 therefore respects both the file size
+        and the character limit.
 
-        TODO: In future when simple-salesforce supports bulk api V2
-        we should detect api version and set max file size accordingly. V2
-        increases file size limit to 150MB
+        Each batch is returned as the complete JSON array in bytes, ready to
+        be sent by `_add_batch` without serializing the records again.
 
         TODO: support for the following limits have not been added since these
         are record / field level limits and not chunk level limits:
@@ -396,35 +690,87 @@ class SFBulkType:
         * Maximum number of characters in a field: 131,072
         """
         record_limit = 10_000
-        char_limit = 10_000_000
+        byte_limit = 10_000_000
 
         batches = []
-        last_break = 0
-        record_count, char_count = 0, 0
-        for i, record in enumerate(data):
-            # 2 is added to account for the enclosing `[]` for the first record
-            # and the separator `, ` between records for subsequent records.
-            additional_chars = len(json.dumps(record,
-                                              default=str
-                                              )
-                                   ) + 2
-            if any([
-                char_count + additional_chars > char_limit,
-                record_count == record_limit
+        records: List[bytes] = []
+        # 2 bytes for the enclosing `[]` of the batch
+        byte_count = 2
+        for record in data:
+            encoded = _encode_record(record)
+            # 1 byte is added for the `,` separator between records
+            additional_bytes = len(encoded) + (1 if records else 0)
+            if records and any([
+                byte_count + additional_bytes > byte_limit,
+                len(records) == record_limit
                 ]
                     ):
-                batches.append(data[last_break:i])
-                last_break = i
-                record_count, char_count = 0, 0
-            char_count += additional_chars
-            record_count += 1
-        if last_break < len(data) - 1:
-            batches.append(data[last_break:])
+                batches.append(b'[' + b','.join(records) + b']')
+                records = []
+                byte_count = 2
+                additional_bytes = len(encoded)
+            records.append(encoded)
+            byte_count += additional_bytes
+        if records:
+            batches.append(b'[' + b','.join(records) + b']')
+
+        return batches
+
+    def _iter_batch_results(
+            self,
+            batches: List[Any],
+            operation: str,
+            wait: float = 5,
+            include_detailed_results: bool = False
+            ) -> Iterable[List[Any]]:
+        """ Yield the list of results of each batch in batch order
+
+        The results of each batch are downloaded on a thread pool as soon as
+        the job-level poller sees the batch finish. A batch is yielded once
+        it and every batch before it is downloaded, and is dropped from
+        memory once yielded, so only the results of finished batches waiting
+        on an earlier batch are held at a time.
+        """
+        if not batches:
+            return
+        with concurrent.futures.ThreadPoolExecutor() as pool:
+            futures = {}
+            next_index = 0
+            for batch in self._poll_batches(
+                    job_id=batches[0]['jobId'],
+                    batch_ids=[batch['id'] for batch in batches],
+                    wait=wait
+                    ):
+                futures[batch['id']] = pool.submit(self._fetch_batch_results,
+                                                   batch,
+                                                   operation,
+                                                   include_detailed_results
+                                                   )
+                while next_index < len(batches) and \
+                        batches[next_index]['id'] in futures:
+                    batch_results = futures.pop(
+                        batches[next_index]['id']
+                        ).result()
+                    next_index += 1
+                    yield [x for i in batch_results for x in i]
 
+    def _add_autosized_batches(
+            self,
+            data: BulkDataAny,
+            operation: str,
+            job: str
+            ) -> List[Any]:
+        """
+        Auto-create batches that respect bulk api V1 limits.
+
+        Every record is serialized only once by `_build_autosized_batches`
+        and the prebuilt JSON bytes are sent as the batch body.
+        """
         return [self._add_batch(job_id=job,
                                 data=i,
                                 operation=operation
-                                ) for i in batches]
+                                ) for i in
+                self._build_autosized_batches(data=data)]
 
     # pylint: disable=R0913,line-too-long
     def _bulk_operation(
@@ -436,7 +782,10 @@ class SFBulkType:
             batch_size: Union[int, str] = 10000,
             wait: int = 5,
             bypass_results: bool = False,
-            include_detailed_results: bool = False
+            include_detailed_results: bool = False,
+            lazy_operation: bool = False,
+            pk_chunking: Union[bool, int] = False,
+            max_workers: Optional[int] = None
             ) -> Iterable[Iterable[Any]]:
         """ String together helper functions to create a complete
         end-to-end bulk API request
@@ -445,9 +794,18 @@ class SFBulkType:
         * data -- list of dict to be passed as a batch
         * use_serial -- Process batches in serial mode
         * external_id_field -- unique identifier field for upsert operations
-        * wait -- seconds to sleep between checking batch status
+        * wait -- max seconds to sleep between checking batch status,
+                  polling starts sub-second and backs off up to `wait`
         * batch_size -- number of records to assign for each batch in the job
                         or `auto`
+        * lazy_operation -- for insert/upsert/update/delete, return a
+                            generator yielding the list of results of each
+                            batch, in batch order, as soon as it finishes
+                            instead of one list of every result
+        * pk_chunking -- for query/queryAll, split the query into Id ranges
+                         and download the chunks concurrently, `True` or
+                         an int chunk size
+        * max_workers -- number of PK chunks downloaded at once
         """
         # check for batch size type since now it accepts both integers
         # & the string `auto`
@@ -468,48 +826,84 @@ class SFBulkType:
                                  10000
                                  )
 
-            with concurrent.futures.ThreadPoolExecutor() as pool:
-
-                job = self._create_job(operation=operation,
-                                       use_serial=use_serial,
-                                       external_id_field=external_id_field
-                                       )
-                if batch_size == 'auto':
-                    batches = self._add_autosized_batches(job=job['id'],
-                                                          data=data,
-                                                          operation=operation
-                                                          )
-                else:
-                    batch_size = cast(int,
-                                      batch_size
-                                      )
-                    batches = [
-                        self._add_batch(job_id=job['id'],
-                                        data=i,
-                                        operation=operation
-                                        )
-                        for i in
-                        [data[i * batch_size:(i + 1) * batch_size]
-                         for i in range(len(data) // batch_size + 1)] if i]
-
-                multi_thread_worker = partial(self.worker,
-                                              operation=operation,
-                                              wait=wait,
-                                              bypass_results=bypass_results,
-                                              include_detailed_results=include_detailed_results
-                                              )
-                list_of_results = pool.map(multi_thread_worker,
-                                           batches
-                                           )
+            job = self._create_job(operation=operation,
+                                   use_serial=use_serial,
+                                   external_id_field=external_id_field
+                                   )
+            if batch_size == 'auto':
+                batches = self._add_autosized_batches(job=job['id'],
+                                                      data=data,
+                                                      operation=operation
+                                                      )
+            else:
+                batch_size = cast(int,
+                                  batch_size
+                                  )
+                batches = [
+                    self._add_batch(job_id=job['id'],
+                                    data=i,
+                                    operation=operation
+                                    )
+                    for i in
+                    [data[i * batch_size:(i + 1) * batch_size]
+                     for i in range(len(data) // batch_size + 1)] if i]
+
+            if bypass_results:
+                with concurrent.futures.ThreadPoolExecutor() as pool:
+                    list_of_results = pool.map(self.worker,
+                                               batches
+                                               )
 
-                results = [x for sublist in list_of_results for i in
-                           sublist for x in i] if not bypass_results else \
-                    [{
+                    results = [{
                         k: v
                         } for sublist in list_of_results for i in
                         sublist for k, v in i.items()]
 
                 self._close_job(job_id=job['id'])
+            elif lazy_operation:
+                # every batch is added, closing the job only stops new
+                # batches from being added while the results are streamed
+                self._close_job(job_id=job['id'])
+                results = self._iter_batch_results(
+                    batches=batches,
+                    operation=operation,
+                    wait=wait,
+                    include_detailed_results=include_detailed_results
+                    )
+            else:
+                results = [x for batch_results in self._iter_batch_results(
+                    batches=batches,
+                    operation=operation,
+                    wait=wait,
+                    include_detailed_results=include_detailed_results
+                    ) for x in batch_results]
+
+                self._close_job(job_id=job['id'])
+
+        elif operation in ('query', 'queryAll') and pk_chunking:
+            job = self._create_job(operation=operation,
+                                   use_serial=use_serial,
+                                   pk_chunking=pk_chunking
+                                   )
+
+            batch = self._add_batch(job_id=job['id'],
+                                    data=data,
+                                    operation=operation
+                                    )
+
+            batches = self._wait_for_pk_chunks(job_id=job['id'],
+                                               batch_id=batch['id'],
+                                               wait=wait
+                                               )
+
+            self._close_job(job_id=job['id'])
+
+            results = self._iter_pk_chunked_results(job_id=job['id'],
+                                                    batches=batches,
+                                                    operation=operation,
+                                                    wait=wait,
+                                                    max_workers=max_workers
+                                                    )
 
         elif operation in ('query', 'queryAll'):
             job = self._create_job(operation=operation,
@@ -524,17 +918,10 @@ class SFBulkType:
 
             self._close_job(job_id=job['id'])
 
-            batch_status = self._get_batch(job_id=batch['jobId'],
-                                           batch_id=batch['id']
-                                           )
-
-            while batch_status['state'] not in [
-                'Completed', 'Failed', 'NotProcessed'
-                ]:
-                sleep(wait)
-                batch_status = self._get_batch(job_id=batch['jobId'],
-                                               batch_id=batch['id']
-                                               )
+            batch_status = next(iter(self._poll_batches(job_id=job['id'],
+                                                        batch_ids=[batch['id']],
+                                                        wait=wait
+                                                        )))
 
             if batch_status['state'] == 'Failed':
                 raise SalesforceGeneralError('',
@@ -555,13 +942,17 @@ class SFBulkType:
             batch_size: int = 10000,
             use_serial: bool = False,
             bypass_results: bool = False,
-            include_detailed_results: bool = False
+            include_detailed_results: bool = False,
+            lazy_operation: bool = False
             ) -> Iterable[Any]:
         """ soft delete records
 
         Data is batched by 10,000 records by default. To pick a lower size
         pass smaller integer to `batch_size`. to let simple-salesforce pick
         the appropriate limit dynamically, enter `batch_size='auto'`
+
+        Set `lazy_operation=True` to get a generator yielding the results of
+        each batch as it finishes instead of a list of every result.
         """
         results = self._bulk_operation(use_serial=use_serial,
                                        operation='delete',
@@ -569,7 +960,8 @@ class SFBulkType:
                                        batch_size=batch_size,
                                        bypass_results=bypass_results,
                                        include_detailed_results=
-                                       include_detailed_results
+                                       include_detailed_results,
+                                       lazy_operation=lazy_operation
                                        )
         return results
 
@@ -579,13 +971,17 @@ class SFBulkType:
             batch_size: int = 10000,
             use_serial: bool = False,
             bypass_results: bool = False,
-            include_detailed_results: bool = False
+            include_detailed_results: bool = False,
+            lazy_operation: bool = False
             ) -> Iterable[Any]:
         """ insert records
 
         Data is batched by 10,000 records by default. To pick a lower size
         pass smaller integer to `batch_size`. to let simple-salesforce pick
         the appropriate limit dynamically, enter `batch_size='auto'`
+
+        Set `lazy_operation=True` to get a generator yielding the results of
+        each batch as it finishes instead of a list of every result.
         """
         results = self._bulk_operation(use_serial=use_serial,
                                        operation='insert',
@@ -593,7 +989,8 @@ class SFBulkType:
                                        batch_size=batch_size,
                                        bypass_results=bypass_results,
                                        include_detailed_results=
-                                       include_detailed_results
+                                       include_detailed_results,
+                                       lazy_operation=lazy_operation
                                        )
         return results
 
@@ -604,13 +1001,17 @@ class SFBulkType:
             batch_size: int = 10000,
             use_serial: bool = False,
             bypass_results: bool = False,
-            include_detailed_results: bool = False
+            include_detailed_results: bool = False,
+            lazy_operation: bool = False
             ) -> Iterable[Any]:
         """ upsert records based on a unique identifier
 
         Data is batched by 10,000 records by default. To pick a lower size
         pass smaller integer to `batch_size`. to let simple-salesforce pick
         the appropriate limit dynamically, enter `batch_size='auto'`
+
+        Set `lazy_operation=True` to get a generator yielding the results of
+        each batch as it finishes instead of a list of every result.
         """
         results = self._bulk_operation(use_serial=use_serial,
                                        operation='upsert',
@@ -619,7 +1020,8 @@ class SFBulkType:
                                        batch_size=batch_size,
                                        bypass_results=bypass_results,
                                        include_detailed_results=
-                                       include_detailed_results
+                                       include_detailed_results,
+                                       lazy_operation=lazy_operation
                                        )
         return results
 
@@ -629,13 +1031,17 @@ class SFBulkType:
             batch_size: int = 10000,
             use_serial: bool = False,
             bypass_results: bool = False,
-            include_detailed_results: bool = False
+            include_detailed_results: bool = False,
+            lazy_operation: bool = False
             ) -> Iterable[Any]:
         """ update records
 
         Data is batched by 10,000 records by default. To pick a lower size
         pass smaller integer to `batch_size`. to let simple-salesforce pick
         the appropriate limit dynamically, enter `batch_size='auto'`
+
+        Set `lazy_operation=True` to get a generator yielding the results of
+        each batch as it finishes instead of a list of every result.
         """
         results = self._bulk_operation(use_serial=use_serial,
                                        operation='update',
@@ -643,7 +1049,8 @@ class SFBulkType:
                                        batch_size=batch_size,
                                        bypass_results=bypass_results,
                                        include_detailed_results=
-                                       include_detailed_results
+                                       include_detailed_results,
+                                       lazy_operation=lazy_operation
                                        )
         return results
 
@@ -653,13 +1060,17 @@ class SFBulkType:
             batch_size: int = 10000,
             use_serial: bool = False,
             bypass_results: bool = False,
-            include_detailed_results: bool = False
+            include_detailed_results: bool = False,
+            lazy_operation: bool = False
             ) -> Iterable[Any]:
         """ hard delete records
 
         Data is batched by 10,000 records by default. To pick a lower size
         pass smaller integer to `batch_size`. to let simple-salesforce pick
         the appropriate limit dynamically, enter `batch_size='auto'`
+
+        Set `lazy_operation=True` to get a generator yielding the results of
+        each batch as it finishes instead of a list of every result.
         """
         results = self._bulk_operation(use_serial=use_serial,
                                        operation='hardDelete',
@@ -667,7 +1078,8 @@ class SFBulkType:
                                        batch_size=batch_size,
                                        bypass_results=bypass_results,
                                        include_detailed_results=
-                                       include_detailed_results
+                                       include_detailed_results,
+                                       lazy_operation=lazy_operation
                                        )
         return results
 
@@ -675,12 +1087,22 @@ class SFBulkType:
             self,
             data: BulkDataStr,
             lazy_operation: bool = False,
-            wait: int = 5
+            wait: int = 5,
+            pk_chunking: Union[bool, int] = False,
+            max_workers: Optional[int] = None
             ) -> Iterable[Any]:
-        """ bulk query """
+        """ bulk query
+
+        Set `pk_chunking=True`, or an int chunk size of up to 250,000, to
+        split the query into Id ranges that Salesforce runs as separate
+        batches. The result sets of the chunks are downloaded concurrently
+        on `max_workers` threads and come back in the order they finish.
+        """
         results = self._bulk_operation(operation='query',
                                        data=data,
-                                       wait=wait
+                                       wait=wait,
+                                       pk_chunking=pk_chunking,
+                                       max_workers=max_workers
                                        )
 
         if lazy_operation:
@@ -692,12 +1114,22 @@ class SFBulkType:
             self,
             data: BulkDataStr,
             lazy_operation: bool = False,
-            wait: int = 5
+            wait: int = 5,
+            pk_chunking: Union[bool, int] = False,
+            max_workers: Optional[int] = None
             ) -> Iterable[Any]:
-        """ bulk queryAll """
+        """ bulk queryAll
+
+        Set `pk_chunking=True`, or an int chunk size of up to 250,000, to
+        split the query into Id ranges that Salesforce runs as separate
+        batches. The result sets of the chunks are downloaded concurrently
+        on `max_workers` threads and come back in the order they finish.
+        """
         results = self._bulk_operation(operation='queryAll',
                                        data=data,
-                                       wait=wait
+                                       wait=wait,
+                                       pk_chunking=pk_chunking,
+                                       max_workers=max_workers
                                        )
 
         if lazy_operation:
@@ -712,7 +1144,8 @@ class SFBulkType:
                 batch_size: int = 10000,
                 use_serial: bool = False,
                 bypass_results: bool = False,
-                include_detailed_results: bool = False
+                include_detailed_results: bool = False,
+                lazy_operation: bool = False
                 ):
         """ modular bulk dml operations -
             perform insert/upsert/update/delete
@@ -724,10 +1157,293 @@ class SFBulkType:
                                                 use_serial,
                                                 bypass_results,
                                                 include_detailed_results,
+                                                lazy_operation=lazy_operation
                                                 )
         else:
             return getattr(self, function_name)(data,
                                                 batch_size,
                                                 use_serial,
                                                 bypass_results,
-                                                include_detailed_results)
+                                                include_detailed_results,
+                                                lazy_operation=lazy_operation)
+
+
+class SFBulk2IngestType:
+    """ Interface to Bulk API 2.0 CSV ingest functions
+
+    Bulk 2.0 ingest jobs take CSV data directly, so there is no JSON encoding
+    of records and no client side batching into 10,000 record batches.
+    Salesforce splits the uploaded data into internal batches itself.
+    """
+
+    JSON_CONTENT_TYPE = 'application/json'
+    CSV_CONTENT_TYPE = 'text/csv'
+
+    # Bulk 2.0 accepts up to 150MB of base64 encoded content per upload,
+    # which leaves 100MB of raw CSV data per job
+    MAX_UPLOAD_BYTES = 100_000_000
+
+    RESULTS_TYPES = ('successfulResults',
+                     'failedResults',
+                     'unprocessedrecords'
+                     )
+
+    def __init__(
+            self,
+            object_name: str,
+            bulk2_url: str,
+            session_id: str,
+            session: requests.Session
+            ):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * object_name -- the name of the type of SObject this represents,
+                         e.g. `Lead` or `Contact`
+        * bulk2_url -- Bulk 2.0 ingest endpoint set in Salesforce instance,
+                       i.e. `https://<instance>/services/data/v59.0/jobs/ingest/`
+        * session_id -- the session ID for authenticating to Salesforce
+        * session -- Custom requests session, created in calling code. This
+                     enables the use of requests Session features not otherwise
+                     exposed by simple_salesforce.
+        """
+        self.object_name = object_name
+        self.bulk2_url = bulk2_url
+        self.session_id = session_id
+        self.session = session
+
+    def _get_headers(self,
+                     content_type: str,
+                     accept: str
+                     ) -> Headers:
+        """ Build a new set of headers for each request,
+        call_salesforce updates the headers it is given in place
+        """
+        return {
+            'Authorization': f'Bearer {self.session_id}',
+            'Content-Type': content_type,
+            'Accept': accept
+            }
+
+    def _create_job(self,
+                    operation: str,
+                    external_id_field: Optional[str] = None
+                    ) -> Any:
+        """ Create a Bulk 2.0 ingest job
+
+        Arguments:
+
+        * operation -- insert, upsert, update, delete or hardDelete
+        * external_id_field -- unique identifier field for upsert operations
+        """
+        payload = {
+            'object': self.object_name,
+            'operation': operation,
+            'contentType': 'CSV',
+            'columnDelimiter': 'COMMA',
+            'lineEnding': 'LF'
+            }
+
+        if operation == 'upsert':
+            payload['externalIdFieldName'] = external_id_field
+
+        result = call_salesforce(url=self.bulk2_url,
+                                 method='POST',
+                                 session=self.session,
+                                 headers=self._get_headers(
+                                     self.JSON_CONTENT_TYPE,
+                                     self.JSON_CONTENT_TYPE
+                                     ),
+                                 data=json.dumps(payload,
+                                                 allow_nan=False
+                                                 )
+                                 )
+        return result.json(object_pairs_hook=OrderedDict)
+
+    def _upload_job_data(self,
+                         job_id: str,
+                         data: bytes
+                         ) -> None:
+        """ Upload the CSV data of a job, a job accepts a single upload """
+        if len(data) > self.MAX_UPLOAD_BYTES:
+            raise ValueError(f'CSV data of {len(data)} bytes exceeds the '
+                             f'Bulk 2.0 limit of {self.MAX_UPLOAD_BYTES} bytes'
+                             )
+
+        call_salesforce(url=f'{self.bulk2_url}{job_id}/batches',
+                        method='PUT',
+                        session=self.session,
+                        headers=self._get_headers(self.CSV_CONTENT_TYPE,
+                                                  self.JSON_CONTENT_TYPE
+                                                  ),
+                        data=data
+                        )
+
+    def _set_job_state(self,
+                       job_id: str,
+                       state: str
+                       ) -> Any:
+        """ Close (UploadComplete) or abort (Aborted) a job """
+        result = call_salesforce(url=f'{self.bulk2_url}{job_id}',
+                                 method='PATCH',
+                                 session=self.session,
+                                 headers=self._get_headers(
+                                     self.JSON_CONTENT_TYPE,
+                                     self.JSON_CONTENT_TYPE
+                                     ),
+                                 data=json.dumps({'state': state})
+                                 )
+        return result.json(object_pairs_hook=OrderedDict)
+
+    def _get_job(self,
+                 job_id: str
+                 ) -> Any:
+        """ Get an existing job to check the status """
+        result = call_salesforce(url=f'{self.bulk2_url}{job_id}',
+                                 method='GET',
+                                 session=self.session,
+                                 headers=self._get_headers(
+                                     self.JSON_CONTENT_TYPE,
+                                     self.JSON_CONTENT_TYPE
+                                     )
+                                 )
+        return result.json(object_pairs_hook=OrderedDict)
+
+    def _wait_for_job(self,
+                      job_id: str,
+                      wait: int = 5
+                      ) -> Any:
+        """ Poll a closed job until Salesforce finishes processing it """
+        job = self._get_job(job_id=job_id)
+        while job['state'] not in ['JobComplete', 'Failed', 'Aborted']:
+            sleep(wait)
+            job = self._get_job(job_id=job_id)
+
+        if job['state'] != 'JobComplete':
+            raise SalesforceGeneralError('',
+                                         job['state'],
+                                         job['id'],
+                                         job.get('errorMessage')
+                                         )
+        return job
+
+    def get_ingest_results(self,
+                           job_id: str,
+                           results_type: str,
+                           skip_header: bool = False,
+                           chunk_size: int = 1024 * 1024
+                           ) -> Iterable[bytes]:
+        """ Stream the CSV results of a completed job
+
+        Arguments:
+
+        * job_id -- id of a completed ingest job
+        * results_type -- successfulResults, failedResults or
+                          unprocessedrecords
+        * skip_header -- drop the CSV header line, used to append the results
+                         of several jobs into one file
+        * chunk_size -- number of bytes read from the response at a time
+        """
+        if results_type not in self.RESULTS_TYPES:
+            raise ValueError(f'results_type should be one of '
+                             f'{self.RESULTS_TYPES}'
+                             )
+
+        result = call_salesforce(url=f'{self.bulk2_url}{job_id}/{results_type}/',
+                                 method='GET',
+                                 session=self.session,
+                                 headers=self._get_headers(
+                                     self.JSON_CONTENT_TYPE,
+                                     self.CSV_CONTENT_TYPE
+                                     ),
+                                 stream=True
+                                 )
+        with result:
+            in_header = skip_header
+            for chunk in result.iter_content(chunk_size=chunk_size):
+                # the header line can be split across several chunks
+                if in_header:
+                    line_end = chunk.find(b'\n')
+                    if line_end == -1:
+                        continue
+                    chunk = chunk[line_end + 1:]
+                    in_header = False
+                if chunk:
+                    yield chunk
+
+    def ingest(self,
+               operation: str,
+               csv_data: Iterable[Union[str, bytes]],
+               external_id_field: Optional[str] = None,
+               wait: int = 5
+               ) -> List[Any]:
+        """ Run an ingest operation and return the completed jobs
+
+        Each item of `csv_data` is uploaded as a complete CSV file with its own
+        header. Data that fits the upload limit should be passed as a single
+        item so the whole operation runs as one job, larger data is split by
+        the caller into items of up to `MAX_UPLOAD_BYTES` and every item gets
+        its own job.
+
+        Arguments:
+
+        * operation -- insert, upsert, update, delete or hardDelete
+        * csv_data -- iterable of CSV files as str or bytes
+        * external_id_field -- unique identifier field for upsert operations
+        * wait -- seconds to sleep between checking job status
+        """
+        return list(self.iter_ingest(operation=operation,
+                                     csv_data=csv_data,
+                                     external_id_field=external_id_field,
+                                     wait=wait
+                                     ))
+
+    def iter_ingest(self,
+                    operation: str,
+                    csv_data: Iterable[Union[str, bytes]],
+                    external_id_field: Optional[str] = None,
+                    wait: int = 5
+                    ) -> Iterable[Any]:
+        """ Run an ingest operation and yield each job as it completes
+
+        Every item of `csv_data` is uploaded first, as with `ingest`, so the
+        jobs are processed by Salesforce side by side. The jobs are then
+        waited on in upload order and each one is yielded as soon as it
+        completes, so its results can be read while the later jobs still run.
+
+        Arguments:
+
+        * operation -- insert, upsert, update, delete or hardDelete
+        * csv_data -- iterable of CSV files as str or bytes
+        * external_id_field -- unique identifier field for upsert operations
+        * wait -- seconds to sleep between checking job status
+        """
+        if operation == 'upsert' and not external_id_field:
+            raise ValueError('external_id_field is required for upsert')
+
+        jobs = []
+        for data in csv_data:
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            job = self._create_job(operation=operation,
+                                   external_id_field=external_id_field
+                                   )
+            try:
+                self._upload_job_data(job_id=job['id'],
+                                      data=data
+                                      )
+            except Exception:
+                self._set_job_state(job_id=job['id'],
+                                    state='Aborted'
+                                    )
+                raise
+            self._set_job_state(job_id=job['id'],
+                                state='UploadComplete'
+                                )
+            jobs.append(job)
+
+        for job in jobs:
+            yield self._wait_for_job(job_id=job['id'],
+                                     wait=wait
+                                     )
@@ -0,0 +1,337 @@
+"""
+Author: Timothy Kornish
+CreatedDate: October - 18 - 2026
+Description: test class for the Bulk API 2.0 ingest engine and Bulk v1 batch building in bulk.py
+
+ - bulk.py is a backup of the modified simple_salesforce bulk module,
+   it is loaded as a submodule of the installed simple_salesforce package
+   so its relative imports resolve.
+ - Salesforce is replaced by a local HTTP stand-in that mimics the
+   Bulk 2.0 ingest endpoints, no credentials or org are needed.
+"""
+
+import datetime
+import importlib.util
+import json
+import os
+import threading
+import unittest
+from unittest import mock
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+import simple_salesforce
+
+# set up directory pathway to load bulk.py
+dir_path = os.path.dirname(os.path.realpath(__file__))
+# load bulk.py as simple_salesforce.bulk_backup
+spec = importlib.util.spec_from_file_location("simple_salesforce.bulk_backup", os.path.join(dir_path, "bulk.py"))
+bulk = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bulk)
+
+
+class Bulk2StandIn(BaseHTTPRequestHandler):
+    """ Minimal stand-in for the Bulk 2.0 ingest endpoints
+
+    Every uploaded row is a success unless its Name starts with `bad`,
+    those rows are returned in the failed results.
+    """
+
+    # job id -> job info, shared by every request to the server
+    jobs = {}
+    # job id -> uploaded csv bytes
+    uploads = {}
+    prefix = "/services/data/v59.0/jobs/ingest/"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body = b"", content_type = "application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_POST(self):
+        payload = json.loads(self._read_body())
+        job_id = "750" + str(len(self.jobs)).zfill(15)
+        self.jobs[job_id] = dict(payload, id = job_id, state = "Open")
+        self._send(200, json.dumps(self.jobs[job_id]).encode())
+
+    def do_PUT(self):
+        job_id = self.path[len(self.prefix):].split("/")[0]
+        self.uploads[job_id] = self._read_body()
+        self._send(201)
+
+    def do_PATCH(self):
+        job_id = self.path[len(self.prefix):]
+        state = json.loads(self._read_body())["state"]
+        self.jobs[job_id]["state"] = "JobComplete" if state == "UploadComplete" else state
+        self._send(200, json.dumps(self.jobs[job_id]).encode())
+
+    def do_GET(self):
+        parts = self.path[len(self.prefix):].strip("/").split("/")
+        job_id = parts[0]
+        if len(parts) == 1:
+            self._send(200, json.dumps(self.jobs[job_id]).encode())
+            return
+        header, *rows = self.uploads[job_id].decode().splitlines()
+        if parts[1] == "successfulResults":
+            lines = ['"sf__Id","sf__Created",' + header]
+            lines += [f'"001{i}","true",{row}' for i, row in enumerate(rows) if not row.startswith("bad")]
+        elif parts[1] == "failedResults":
+            lines = ['"sf__Id","sf__Error",' + header]
+            lines += [f'"","REQUIRED_FIELD_MISSING:Required fields are missing",{row}' for row in rows if row.startswith("bad")]
+        else:
+            lines = [header]
+        self._send(200, ("\n".join(lines) + "\n").encode(), "text/csv")
+
+
+class TestSFBulk2IngestType(unittest.TestCase):
+    """ Tests for the Bulk API 2.0 ingest engine against a local stand-in"""
+
+    @classmethod
+    def setUpClass(cls):
+        # start the stand-in on a free local port
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Bulk2StandIn)
+        # serve requests in the background
+        cls.thread = threading.Thread(target = cls.server.serve_forever, daemon = True)
+        cls.thread.start()
+        # Bulk v1 url of the stand-in, the Bulk 2.0 url is derived from it
+        cls.bulk_url = f"http://127.0.0.1:{cls.server.server_address[1]}/services/async/59.0/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Bulk2StandIn.jobs.clear()
+        Bulk2StandIn.uploads.clear()
+        self.handler = bulk.SFBulkHandler("session-id", self.bulk_url, session = requests.Session())
+
+    def test_bulk2_url_derived_from_bulk_url(self):
+        self.assertTrue(self.handler.bulk2_url.endswith("/services/data/v59.0/jobs/ingest/"))
+
+    def test_submit_dml_bulk2_single_job(self):
+        csv_data = "Name,Phone\nGiorgio,767-695-2388\nbadGermayne,569-827-8112\nMarielle,935-636-7107\n"
+        results = self.handler.submit_dml_bulk2("Account", "insert", [csv_data], wait = 0)
+        # the whole upload runs as a single job
+        self.assertEqual(len(results["jobs"]), 1)
+        self.assertEqual(Bulk2StandIn.jobs[results["jobs"][0]["id"]]["contentType"], "CSV")
+        successful = b"".join(results["successfulResults"]).decode().splitlines()
+        failed = b"".join(results["failedResults"]).decode().splitlines()
+        self.assertEqual(successful[0], '"sf__Id","sf__Created",Name,Phone')
+        self.assertEqual(len(successful), 3)
+        self.assertEqual(len(failed), 2)
+        self.assertTrue(failed[1].endswith("badGermayne,569-827-8112"))
+
+    def test_submit_dml_bulk2_multiple_chunks_stream_one_header(self):
+        chunks = [b"Name\nGiorgio\nbadGermayne\n", b"Name\nMarielle\n"]
+        results = self.handler.submit_dml_bulk2("Account", "insert", chunks, wait = 0)
+        self.assertEqual(len(results["jobs"]), 2)
+        successful = b"".join(results["successfulResults"]).decode().splitlines()
+        # header of the second job is dropped when the results are appended
+        self.assertEqual(successful, ['"sf__Id","sf__Created",Name', '"0010","true",Giorgio', '"0010","true",Marielle'])
+
+    def test_submit_dml_bulk2_lazy_yields_each_job_with_header(self):
+        chunks = [b"Name\nGiorgio\nbadGermayne\n", b"Name\nMarielle\n"]
+        jobs = self.handler.submit_dml_bulk2("Account", "insert", chunks, wait = 0, lazy_operation = True)
+        first = next(jobs)
+        # the results of the first job are read before the second job is waited on
+        self.assertEqual(b"".join(first["successfulResults"]).decode().splitlines(), ['"sf__Id","sf__Created",Name', '"0010","true",Giorgio'])
+        self.assertEqual(len(b"".join(first["failedResults"]).decode().splitlines()), 2)
+        second = next(jobs)
+        # every job keeps its own header
+        self.assertEqual(b"".join(second["successfulResults"]).decode().splitlines(), ['"sf__Id","sf__Created",Name', '"0010","true",Marielle'])
+        self.assertEqual([first["job"]["state"], second["job"]["state"]], ["JobComplete", "JobComplete"])
+        self.assertIsNone(next(jobs, None))
+
+    def test_upsert_requires_external_id_field(self):
+        with self.assertRaises(ValueError):
+            self.handler.submit_dml_bulk2("Account", "upsert", ["Name\nGiorgio\n"], wait = 0)
+
+    def test_upload_over_limit_is_rejected(self):
+        ingest = bulk.SFBulk2IngestType("Account", self.handler.bulk2_url, "session-id", requests.Session())
+        ingest.MAX_UPLOAD_BYTES = 10
+        with self.assertRaises(ValueError):
+            ingest.ingest("insert", ["Name\nGiorgio\nMarielle\n"], wait = 0)
+        # the job that could not be uploaded is aborted
+        self.assertEqual([job["state"] for job in Bulk2StandIn.jobs.values()], ["Aborted"])
+
+
+class TestSFBulkTypeAutosizedBatches(unittest.TestCase):
+    """ Tests for building Bulk v1 batches from records encoded once"""
+
+    def setUp(self):
+        self.bulk_type = bulk.SFBulkType("Account", "http://127.0.0.1/services/async/59.0/", {}, requests.Session())
+
+    def test_batches_split_on_record_limit(self):
+        data = [{"Name" : str(i)} for i in range(20_001)]
+        batches = self.bulk_type._build_autosized_batches(data)
+        self.assertEqual([len(json.loads(batch)) for batch in batches], [10_000, 10_000, 1])
+        self.assertEqual([record for batch in batches for record in json.loads(batch)], data)
+
+    def test_batches_split_on_byte_limit(self):
+        data = [{"Description" : "x" * 1_000_000} for i in range(25)]
+        batches = self.bulk_type._build_autosized_batches(data)
+        self.assertTrue(all(len(batch) <= 10_000_000 for batch in batches))
+        self.assertEqual(sum(len(json.loads(batch)) for batch in batches), 25)
+
+    def test_decimal_and_datetime_values_are_encoded(self):
+        data = [{"Amount" : Decimal("1.50"), "CloseDate" : datetime.date(2025, 8, 10)}]
+        batches = self.bulk_type._build_autosized_batches(data)
+        self.assertEqual(json.loads(batches[0]), [{"Amount" : 1.5, "CloseDate" : "2025-08-10"}])
+
+class TestEncoders(unittest.TestCase):
+    """ Tests that the orjson and standard library encoders treat the same data the same way"""
+
+    def encoders(self):
+        # the standard library encoder, and orjson when it is installed
+        yield "json", None
+        if bulk.orjson is not None:
+            yield "orjson", bulk.orjson
+
+    def test_non_finite_values_rejected_by_both_encoders(self):
+        for value in [float("nan"), float("inf"), Decimal("NaN")]:
+            for name, module in self.encoders():
+                with self.subTest(encoder = name, value = value), mock.patch.object(bulk, "orjson", module):
+                    with self.assertRaises(ValueError):
+                        bulk._encode_record({"Name" : "a", "Amount" : value})
+                    with self.assertRaises(ValueError):
+                        bulk._encode_batch([{"Name" : "a"}, {"Account" : {"Amount" : value}}])
+
+    def test_same_output_from_both_encoders(self):
+        records = [{"Name" : "a", "Amount" : Decimal("1.50"), "CloseDate" : datetime.date(2025, 8, 10), "Phone" : None}]
+        for name, module in self.encoders():
+            with self.subTest(encoder = name), mock.patch.object(bulk, "orjson", module):
+                self.assertEqual(json.loads(bulk._encode_batch(records)), [{"Name" : "a", "Amount" : 1.5, "CloseDate" : "2025-08-10", "Phone" : None}])
+                self.assertEqual(json.loads(bulk._encode_record(records[0])), {"Name" : "a", "Amount" : 1.5, "CloseDate" : "2025-08-10", "Phone" : None})
+
+class TestSFBulkTypePolling(unittest.TestCase):
+    """ Tests for the job-level batch poller"""
+
+    def setUp(self):
+        self.bulk_type = bulk.SFBulkType("Account", "http://127.0.0.1/services/async/59.0/", {}, requests.Session())
+        # batch states returned by each tick of the job-level batch list request
+        self.ticks = [
+            [("b1", "InProgress"), ("b2", "Queued")],
+            [("b1", "InProgress"), ("b2", "Queued")],
+            [("b1", "InProgress"), ("b2", "Completed")],
+            [("b1", "Completed"), ("b2", "Completed")],
+        ]
+        self.calls = 0
+
+        def get_batches(job_id):
+            tick = self.ticks[min(self.calls, len(self.ticks) - 1)]
+            self.calls += 1
+            return [{"id" : batch_id, "jobId" : job_id, "state" : state} for batch_id, state in tick]
+
+        self.bulk_type._get_batches = get_batches
+
+    def test_batches_yielded_as_they_finish_with_backoff(self):
+        with mock.patch.object(bulk, "sleep") as sleep:
+            finished = [batch["id"] for batch in self.bulk_type._poll_batches("750", ["b1", "b2"], wait = 5)]
+        # b2 finishes first and is yielded first
+        self.assertEqual(finished, ["b2", "b1"])
+        # one job-level request per tick
+        self.assertEqual(self.calls, 4)
+        # delay grows while nothing finishes and drops back once a batch finishes
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0.75, 1.125, 0.5])
+
+    def test_bulk_operation_results_kept_in_batch_order(self):
+        self.bulk_type._create_job = lambda **kwargs : {"id" : "750"}
+        self.bulk_type._close_job = lambda **kwargs : {}
+        batch_ids = iter(["b1", "b2"])
+        self.bulk_type._add_batch = lambda job_id, data, operation : {"id" : next(batch_ids), "jobId" : job_id}
+        self.bulk_type._get_batch_results = lambda job_id, batch_id, operation : iter([[{"id" : batch_id, "success" : True}]])
+        with mock.patch.object(bulk, "sleep"):
+            results = self.bulk_type._bulk_operation("insert", [{"Name" : "a"}, {"Name" : "b"}], batch_size = 1)
+        self.assertEqual([result["id"] for result in results], ["b1", "b2"])
+
+    def test_bypass_results_does_not_poll(self):
+        self.bulk_type._create_job = lambda **kwargs : {"id" : "750"}
+        self.bulk_type._close_job = lambda **kwargs : {}
+        batch_ids = iter(["b1", "b2"])
+        self.bulk_type._add_batch = lambda job_id, data, operation : {"id" : next(batch_ids), "jobId" : job_id}
+        with mock.patch.object(bulk, "sleep") as sleep:
+            results = self.bulk_type._bulk_operation("insert", [{"Name" : "a"}, {"Name" : "b"}], batch_size = 1, bypass_results = True)
+        self.assertEqual(results, [{"bypass_results" : True}, {"job_id" : "750"}] * 2)
+        self.assertEqual(self.calls, 0)
+        sleep.assert_not_called()
+
+class TestSFBulkTypeLazyResults(unittest.TestCase):
+    """ Tests for streaming the results of each batch with lazy_operation"""
+
+    def setUp(self):
+        self.bulk_type = bulk.SFBulkType("Account", "http://127.0.0.1/services/async/59.0/", {}, requests.Session())
+        self.bulk_type._create_job = lambda **kwargs : {"id" : "750"}
+        self.closed = []
+        self.bulk_type._close_job = lambda job_id : self.closed.append(job_id)
+        batch_ids = iter(["b1", "b2", "b3"])
+        self.bulk_type._add_batch = lambda job_id, data, operation : {"id" : next(batch_ids), "jobId" : job_id, "size" : len(data)}
+        self.bulk_type._get_batches = lambda job_id : [{"id" : batch_id, "jobId" : job_id, "state" : "Completed"} for batch_id in ["b3", "b1", "b2"]]
+        self.bulk_type._get_batch_results = lambda job_id, batch_id, operation : iter([[{"id" : batch_id, "success" : True}]])
+
+    def test_lazy_operation_yields_each_batch_in_order(self):
+        data = [{"Name" : str(i)} for i in range(3)]
+        with mock.patch.object(bulk, "sleep"):
+            results = self.bulk_type.submit_dml("insert", data, batch_size = 1, lazy_operation = True)
+            # the job is closed once every batch is added, before any results are read
+            self.assertEqual(self.closed, ["750"])
+            self.assertEqual([[result["id"] for result in batch_results] for batch_results in results], [["b1"], ["b2"], ["b3"]])
+
+class TestSFBulkTypePKChunking(unittest.TestCase):
+    """ Tests for PK chunked bulk queries"""
+
+    def setUp(self):
+        self.bulk_type = bulk.SFBulkType("Account", "http://127.0.0.1/services/async/59.0/", {"X-SFDC-Session" : "session-id"}, requests.Session())
+        self.closed = []
+        self.bulk_type._add_batch = lambda job_id, data, operation : {"id" : "b0", "jobId" : job_id}
+        self.bulk_type._close_job = lambda job_id : self.closed.append(job_id)
+        # the original batch is split into three chunks on the second tick
+        self.ticks = [
+            [("b0", "InProgress")],
+            [("b0", "NotProcessed"), ("b1", "Queued"), ("b2", "Queued"), ("b3", "Queued")],
+            [("b0", "NotProcessed"), ("b1", "Completed"), ("b2", "InProgress"), ("b3", "Completed")],
+            [("b0", "NotProcessed"), ("b1", "Completed"), ("b2", "Completed"), ("b3", "Completed")],
+        ]
+        self.calls = 0
+
+        def get_batches(job_id):
+            tick = self.ticks[min(self.calls, len(self.ticks) - 1)]
+            self.calls += 1
+            return [{"id" : batch_id, "jobId" : job_id, "state" : state} for batch_id, state in tick]
+
+        self.bulk_type._get_batches = get_batches
+        self.bulk_type._get_batch_results = lambda job_id, batch_id, operation : iter([[{"Id" : batch_id + "-1"}], [{"Id" : batch_id + "-2"}]])
+
+    def test_pk_chunking_header_sent_on_job_create(self):
+        with mock.patch.object(bulk, "call_salesforce") as call:
+            call.return_value.json.return_value = {"id" : "750"}
+            self.bulk_type._create_job(operation = "query", use_serial = False, pk_chunking = 50_000)
+        self.assertEqual(call.call_args.kwargs["headers"]["Sforce-Enable-PKChunking"], "chunkSize=50000")
+        # the shared headers are left untouched
+        self.assertNotIn("Sforce-Enable-PKChunking", self.bulk_type.headers)
+
+    def test_chunk_result_sets_streamed(self):
+        self.bulk_type._create_job = lambda **kwargs : {"id" : "750"}
+        with mock.patch.object(bulk, "sleep"):
+            results = list(self.bulk_type.query("SELECT Id FROM Account", lazy_operation = True, pk_chunking = True))
+        # every result set of every chunk, the original batch has no results
+        self.assertEqual(sorted(record["Id"] for result_set in results for record in result_set), ["b1-1", "b1-2", "b2-1", "b2-2", "b3-1", "b3-2"])
+        self.assertEqual(self.closed, ["750"])
+
+    def test_failed_original_batch_raises(self):
+        self.bulk_type._create_job = lambda **kwargs : {"id" : "750"}
+        self.bulk_type._get_batches = lambda job_id : [{"id" : "b0", "jobId" : job_id, "state" : "Failed", "stateMessage" : "Entity is not supported by PK chunking"}]
+        with self.assertRaises(bulk.SalesforceGeneralError):
+            self.bulk_type.query("SELECT Id FROM Account", pk_chunking = True)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,9 +10,20 @@ Description: A backend utility file for logging into Salesforce, MySQL, MSSQL, S
 """
 # util libraries
 from ctypes import util
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 from collections import OrderedDict
+import collections
+import concurrent.futures
+import hashlib
+import heapq
+import io
+import json
+import os
+import re
+import threading
 import time
+import urllib.parse
 import logging as log
 import coloredlogs
 # pandas and numpy
@@ -46,7 +57,123 @@ log.basicConfig(level = log.ERROR)
 # set copy on write on to suppress writing a slice of a dataframe warnings
 pd.set_option("mode.copy_on_write", True)
 
+class Salesforce_Rate_Limiter:
+    def __init__(self, sf, api = "bulk", reserve = 0.1, slow_start = 0.5, max_delay = 30, check_every = 10):
+        """Constructor Parameters:
+           - paces salesforce batch uploads by the api budget left in the org instead of a fixed time delay.
+             pass an instance, or time_delay = "auto", as the time_delay of upload_dataframe_to_salesforce.
+
+           sf           - simple_salesforce instance the batches are uploaded with
+           api          - string, 'bulk' also watches the daily bulk api batches, 'collections' only the daily api requests
+           reserve      - float, fraction of the daily budget left for other integrations,
+                          batches are sent one at a time with the max delay once the budget left falls to the reserve
+           slow_start   - float, fraction of the daily budget left where the pacing starts,
+                          above it batches are sent at full speed and full concurrency
+           max_delay    - float, seconds to wait before each batch once the budget left falls to the reserve
+           check_every  - int, number of batches between reads of the limits resource
+        """
+        # salesforce instance to read the limits from
+        self.sf = sf
+        # limits resource keys of the budgets watched
+        self.limit_names = ["DailyApiRequests", "DailyBulkApiBatches"] if api == "bulk" else ["DailyApiRequests"]
+        # fraction of the budget left for other integrations
+        self.reserve = reserve
+        # fraction of the budget left where the pacing starts
+        self.slow_start = slow_start
+        # longest wait before a batch
+        self.max_delay = max_delay
+        # batches between reads of the limits resource
+        self.check_every = check_every
+        # fraction of the budget left, full until the first read
+        self.remaining = 1.0
+        # number of batches paced so far
+        self.batch_count = 0
+        # batches are paced from several threads at once
+        self.lock = threading.Lock()
+
+    def refresh(self):
+        """
+        Description: read the fraction of the daily budget left from the limits resource,
+                     falls back to the Sforce-Limit-Info header of the last rest call when the limits can not be read
+        Parameters:
+
+        Return:     - float, the lowest fraction left of the budgets watched
+        """
+        # try except block
+        try:
+            # read the limits of the org
+            limits = self.sf.limits()
+            # lowest fraction left of every budget watched, skip budgets not returned by the org
+            self.remaining = min([limits[name]["Remaining"] / limits[name]["Max"] for name in self.limit_names if limits.get(name, {}).get("Max")] or [self.remaining])
+        # exception block - limits resource not available
+        except Exception as e:
+            # api usage parsed from the Sforce-Limit-Info header of the last rest call
+            usage = getattr(self.sf, "api_usage", {}).get("api-usage")
+            # use the header when a rest call returned it
+            if usage != None and usage.total:
+                # fraction of the daily api requests left
+                self.remaining = 1 - usage.used / usage.total
+            # log error when reading the limits
+            log.exception(f"[Error reading Salesforce limits, using last known api usage...{e}]")
+        # log to console the budget left
+        log.info(f"[Salesforce api budget left: {self.remaining:.1%}]")
+        # return the fraction left
+        return self.remaining
+
+    def get_pressure(self):
+        """
+        Description: how close the budget left is to the reserve, 0 at or above slow_start, 1 at or below the reserve
+        Parameters:
+
+        Return:     - float, between 0 and 1
+        """
+        # scale the budget left between slow_start and the reserve
+        return min(1.0, max(0.0, (self.slow_start - self.remaining) / (self.slow_start - self.reserve)))
+
+    def get_max_workers(self, max_workers):
+        """
+        Description: number of batches to keep in flight, the full max_workers while the budget is healthy,
+                     scaled down to 1 as the budget left reaches the reserve
+        Parameters:
+
+        max_workers - int, the most batches to keep in flight
+
+        Return:     - int, batches to keep in flight now
+        """
+        # scale the concurrency down with the pressure
+        return max(1, round(max_workers * (1 - self.get_pressure())))
+
+    def wait(self):
+        """
+        Description: wait before uploading a batch, the limits are read every check_every batches,
+                     the wait grows from 0 at slow_start to max_delay at the reserve
+        Parameters:
+
+        Return:     - float, the seconds waited
+        """
+        # only one thread reads the limits at a time
+        with self.lock:
+            # read the limits on the first batch and every check_every batches
+            if self.batch_count % self.check_every == 0:
+                # update the budget left
+                self.refresh()
+            # count the batch
+            self.batch_count = self.batch_count + 1
+            # seconds to wait before this batch
+            delay = self.max_delay * self.get_pressure()
+        # wait outside the lock so other threads can read the delay
+        if delay > 0:
+            # log to console the wait
+            log.info(f"[Salesforce api budget low, waiting {delay:.1f} seconds before the next batch]")
+            # time delay
+            time.sleep(delay)
+        # return the seconds waited
+        return delay
+
 class Salesforce_Utilities:
+    # transient salesforce error codes that can pass when the record is resubmitted
+    RETRYABLE_ERROR_CODES = ["UNABLE_TO_LOCK_ROW", "REQUEST_RUNNING_TOO_LONG", "QUERY_TIMEOUT", "SERVER_UNAVAILABLE"]
+
     def __init__(self):
         """Constructor Parameters:
            - currently no customization used.
@@ -54,21 +181,53 @@ class Salesforce_Utilities:
            can add login credentials as instance variables to utilize in functions
         """
 
-    def login_to_salesForce(self, username, password, security_token, environment = ""):
+    def login_to_salesForce(self, username, password, security_token, environment = "", use_session_cache = True, cache_dir = None):
         """
         Description: log into a Salesforce or and return salesforce client
                      to operate with.
+                     The session id and instance of each login are cached on disk by username and environment,
+                     later runs reuse the cached session after a cheap limits call confirms it is still valid
+                     and only log in again with the username and password once the session has expired.
         Parameters:
 
-        Username        - string, salesforce Username
-        Password        - string, salesforce Password
-        security_token  - string, salesforce token
-        environments    - string, used for logger to state which org being logged into
+        Username            - string, salesforce Username
+        Password            - string, salesforce Password
+        security_token      - string, salesforce token
+        environments        - string, used for logger to state which org being logged into
+        use_session_cache   - bool, reuse the cached session of an earlier login, default to True
+        cache_dir           - string, folder of the cached sessions, default to the Output/session_cache folder,
+                              the cache files hold live session ids and are only readable by the current user
 
         Return: sf      - Salesforce instance to query against
         """
         # try except block
         try:
+            # default the cache folder to the Output folder next to this file
+            if cache_dir is None:
+                # set up directory pathway of the cache folder
+                cache_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "Output", "session_cache")
+            # name the cache file with a hash of the username and environment, the username is not written in the file name
+            cache_file = os.path.join(cache_dir, hashlib.sha256(f"{username}|{environment}".encode()).hexdigest() + ".json")
+            # reuse the cached session when there is one
+            if use_session_cache and os.path.exists(cache_file):
+                # try except block
+                try:
+                    # open the cached session
+                    with open(cache_file, "r") as file:
+                        # load the session id and instance
+                        session = json.load(file)
+                    # create the salesforce instance from the cached session
+                    sf = Salesforce(session_id = session["session_id"], instance = session["instance"])
+                    # cheap call to check the session has not expired
+                    sf.limits()
+                    # log to console the cached session was reused
+                    log.info(f"[Reused cached session for source org: {environment}]")
+                    # return instance of salesforce to perform operations with
+                    return sf
+                # exception block - cached session expired or unreadable
+                except Exception as e:
+                    # log to console, logging in again
+                    log.info(f"[Cached session expired for source org: {environment}, logging in again...{e}]")
             # log status to console
             log.info(f"[Logging into source org: {environment}]")
             # log into salesforce using simple_salesforce
@@ -79,6 +238,14 @@ class Salesforce_Utilities:
             # log to console the login was successful. if not successful,
             # there will be a error from Salesforce on the console
             log.info("[Logged in successfully]")
+            # cache the session for the next run
+            if use_session_cache:
+                # create the cache folder if missing
+                os.makedirs(cache_dir, exist_ok = True)
+                # create the cache file readable by the current user only
+                with os.fdopen(os.open(cache_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as file:
+                    # save the session id and instance
+                    json.dump({"session_id" : sf.session_id, "instance" : sf.sf_instance}, file)
             # return instance of salesforce to perform operations with
             return sf
         # exception block - error logging into salesforce
@@ -110,16 +277,439 @@ class Salesforce_Utilities:
             # log error when querying Salesforce orgs
             log.exception(f"[Error querying Salesforce orgs...{e}]")
 
+    def get_soql_select_columns(self, query):
+        """
+        Description: read the flattened column names of a SOQL query from its select list, I.E.
+                     "SELECT Id, Owner.Name FROM Account" -> ["Id", "Owner.Name"].
+                     Only plain and dotted fieldnames are read, queries with subqueries,
+                     functions, aliases or TYPEOF return None.
+        Parameters:
+
+        query           - string, SOQL query
+
+        Return:         - list of string, the column names in select order, or None
+        """
+        # try except block
+        try:
+            # collapse every bracket group to [], nested ones included, so commas and FROM inside them are ignored
+            collapsed = query
+            # repeat until no inner bracket group is left to collapse
+            while True:
+                # collapse the innermost bracket groups
+                updated = re.sub(r"\([^()]*\)", "[]", collapsed)
+                # stop once nothing changed
+                if updated == collapsed:
+                    break
+                # keep collapsing
+                collapsed = updated
+            # the select list before the top level FROM
+            match = re.match(r"\s*select\s+(.*?)\s+from\s", collapsed, re.IGNORECASE | re.DOTALL)
+            # not a query that can be read
+            if match == None:
+                return None
+            # each item of the select list
+            columns = [item.strip() for item in match.group(1).split(",")]
+            # only plain and dotted fieldnames, subqueries and functions collapsed to [] can not be mapped to a column name
+            if not all(re.fullmatch(r"[A-Za-z_][\w.]*", column) for column in columns):
+                return None
+            # return the column names
+            return columns
+        # exception block - error reading soql select columns
+        except Exception as e:
+            # log error when reading soql select columns
+            log.exception(f"[Error reading SOQL select columns...{e}]")
+
+    def align_salesforce_chunk_columns(self, df, columns):
+        """
+        Description: give a flattened chunk of records the same columns as the other chunks of the same query.
+                     A lookup that is null on every row of a chunk is flattened as a single column, I.E. Owner
+                     instead of Owner.Name, that column is dropped and the expected dotted columns are added as nulls.
+                     Columns are matched without case and renamed to the spelling of the expected columns,
+                     columns not expected are kept at the end.
+        Parameters:
+
+        df              - pandas.DataFrame, a flattened chunk of records
+        columns         - list of string, the expected column names
+
+        Return:         - pandas.DataFrame - the chunk with the expected columns first
+        """
+        # try except block
+        try:
+            # expected column names by lowercase name
+            expected = {column.lower() : column for column in columns}
+            # columns standing in for a lookup that was null on every row of the chunk
+            stand_ins = [column for column in df.columns if column.lower() not in expected and any(name.startswith(column.lower() + ".") for name in expected) and df[column].isna().all()]
+            # drop the stand in columns, rename the rest to the expected spelling
+            df = df.drop(columns = stand_ins).rename(columns = lambda column : expected.get(column.lower(), column))
+            # expected columns first, then any column not expected
+            return df.reindex(columns = list(columns) + [column for column in df.columns if column not in columns])
+        # exception block - error aligning salesforce chunk columns
+        except Exception as e:
+            # log error when aligning salesforce chunk columns
+            log.exception(f"[Error aligning salesforce chunk columns...{e}]")
+
+    def query_salesforce_in_chunks(self, sf, query, chunk_size = 10000, include_deleted = False, columns = None):
+        """
+        Description: stream a SOQL query from salesforce, paging through the results
+                     with the query more cursor and yielding flattened DataFrame chunks.
+                     Only a single chunk of records is held in memory at a time,
+                     use in place of query_salesforce for large objects.
+                     Every chunk has the same columns, see align_salesforce_chunk_columns.
+                     Errors are logged and raised, the stream never ends early without an error,
+                     a stream that loaded fewer records than the totalSize of the query raises a ValueError.
+        Parameters:
+
+        sf              - Salesforce instance to query against
+        query           - string, SOQL query
+        chunk_size      - int, number of records in each DataFrame chunk yielded, default to 10,000
+        include_deleted - bool, include deleted and archived records in the results
+        columns         - list of string, the column names of every chunk, default to the select list of the query,
+                          queries with subqueries, functions or aliases use the columns seen in earlier chunks instead
+
+        Return:         - generator of pandas.DataFrame - DataFrame chunks of the Salesforce Records
+        """
+        # try except block
+        try:
+            # log status to console of querying Salesforce
+            log.info(f"[Streaming Salesforce query in chunks of {str(chunk_size)}, include deleted records: {str(include_deleted)}]")
+            # query the first page of records
+            page = sf.query(query, include_deleted = include_deleted)
+            # column names every chunk is aligned to, grows with the columns seen when the select list can't be read
+            expected_columns = list(columns or self.get_soql_select_columns(query) or [])
+            # records waiting to fill a full chunk
+            buffer = []
+            # keep track of records yielded
+            records_loaded = 0
+            # loop through every page of the query results
+            while True:
+                # add the records of this page to the chunk buffer
+                buffer.extend(page["records"])
+                # yield as many full chunks as the buffer holds
+                while len(buffer) >= chunk_size:
+                    # flatten the full chunk of records into a dataframe
+                    df = self.flatten_salesforce_records(buffer[:chunk_size])
+                    # give the chunk the same columns as the other chunks
+                    df = self.align_salesforce_chunk_columns(df, expected_columns)
+                    # remember columns not seen in earlier chunks
+                    expected_columns.extend(df.columns[len(expected_columns):])
+                    # drop the yielded records from the buffer
+                    del buffer[:chunk_size]
+                    # update count of records yielded
+                    records_loaded = records_loaded + len(df)
+                    # log status of chunk loaded
+                    log.info(f"[loaded {str(records_loaded)}/{str(page['totalSize'])} records into DataFrame chunks]")
+                    # return the chunk to the caller
+                    yield df
+                # no more pages left to query
+                if page["done"]:
+                    break
+                # query the next page of records with the cursor of the previous page
+                page = sf.query_more(page["nextRecordsUrl"], identifier_is_url = True, include_deleted = include_deleted)
+            # yield the last partial chunk of records
+            if buffer:
+                # flatten the remaining records into a dataframe
+                df = self.flatten_salesforce_records(buffer)
+                # give the chunk the same columns as the other chunks
+                df = self.align_salesforce_chunk_columns(df, expected_columns)
+                # update count of records yielded
+                records_loaded = records_loaded + len(df)
+                # log status of chunk loaded
+                log.info(f"[loaded {str(records_loaded)}/{str(page['totalSize'])} records into DataFrame chunks]")
+                # return the last chunk to the caller
+                yield df
+            # every record of the query must have been loaded, a short stream is an error not a smaller result
+            if records_loaded != page["totalSize"]:
+                # stop the caller before it uses the incomplete results
+                raise ValueError(f"loaded {str(records_loaded)} records but the query returned a totalSize of {str(page['totalSize'])}")
+        # exception block - error streaming Salesforce query
+        except Exception as e:
+            # log error when streaming Salesforce query
+            log.exception(f"[Error streaming Salesforce query in chunks...{e}]")
+            # raise the error so a failed stream is never mistaken for a complete one
+            raise
+
+    def build_salesforce_in_clause_queries(self, query, key_field, keys, max_query_length = 15000):
+        """
+        Description: split a list of keys into SOQL queries filtered with key_field IN (...),
+                     each query is kept under max_query_length once URL encoded, query_all sends the query
+                     as the q parameter of a GET request and salesforce rejects URIs over about 16,000 characters.
+                     Null and duplicate keys are dropped, quotes and backslashes in the keys are escaped.
+        Parameters:
+
+        query               - string, SOQL query without ORDER BY or LIMIT, I.E. "SELECT Id, Name FROM Account"
+                              an existing WHERE condition is wrapped in brackets and combined with AND
+        key_field           - string, fieldname matched against the keys, I.E. Account_Number_External_ID__c
+        keys                - list or pandas.Series of the key values to match
+        max_query_length    - int, max number of characters of each URL encoded query, default to 15,000
+
+        Return:             - list of string - the SOQL queries, one per chunk of keys
+        """
+        # try except block
+        try:
+            # bracket depth at each point of the query, a WHERE inside a subquery is not the WHERE of the query
+            depth = 0
+            # start of the WHERE keyword of the query, None when the query has no WHERE clause
+            where_start = None
+            # loop through the brackets and WHERE keywords of the query in order
+            for match in re.finditer(r"\(|\)|\bwhere\b", query, re.IGNORECASE):
+                # open bracket, one level deeper
+                if match.group() == "(":
+                    depth = depth + 1
+                # close bracket, one level up
+                elif match.group() == ")":
+                    depth = depth - 1
+                # WHERE keyword outside every bracket
+                elif depth == 0:
+                    # keep the start of the keyword
+                    where_start = match.start()
+                    break
+            # no WHERE clause, filter by the keys only
+            if where_start == None:
+                # start of every query, the keys are added after the open bracket
+                prefix = f"{query} WHERE {key_field} IN ("
+            # keep the WHERE condition in brackets so an OR in it does not apply to the key filter
+            else:
+                # the query before the WHERE keyword and the condition after it
+                prefix = f"{query[:where_start].rstrip()} WHERE ({query[where_start + len('where'):].strip()}) AND {key_field} IN ("
+            # length of a value once URL encoded as the q parameter of the request
+            encoded_length = lambda value : len(urllib.parse.quote_plus(value))
+            # every chunk of the keys as a query
+            queries = []
+            # quoted keys of the chunk being built
+            chunk = []
+            # encoded length of the chunk being built, starting with the query and the closing bracket
+            length = encoded_length(prefix + ")")
+            # loop through the distinct keys that are not null
+            for key in pd.unique(pd.Series(keys).dropna()):
+                # quote the key as a soql string literal
+                literal = "'" + str(key).replace("\\", "\\\\").replace("'", "\\'") + "'"
+                # the key does not fit in the current query, start a new query
+                if chunk and length + encoded_length("," + literal) > max_query_length:
+                    # close the current query
+                    queries.append(prefix + ",".join(chunk) + ")")
+                    # start a new chunk
+                    chunk = []
+                    # reset the length to the query and the closing bracket
+                    length = encoded_length(prefix + ")")
+                # add the key to the chunk, plus the comma
+                chunk.append(literal)
+                # update the encoded length of the query
+                length = length + encoded_length("," + literal)
+            # close the last query
+            if chunk:
+                # add the last chunk of keys
+                queries.append(prefix + ",".join(chunk) + ")")
+            # return the queries
+            return queries
+        # exception block - error building salesforce in clause queries
+        except Exception as e:
+            # log error when building salesforce in clause queries
+            log.exception(f"[Error building salesforce IN clause queries...{e}]")
+
+    def query_salesforce_by_keys(self, sf, query, key_field, keys, max_query_length = 15000, max_workers = 4, include_deleted = False):
+        """
+        Description: query salesforce for the records matching a large list of keys, I.E. external ids from a DataFrame.
+                     The keys are split into SOQL sized IN (...) queries with build_salesforce_in_clause_queries,
+                     the queries run concurrently and the results are flattened into a single DataFrame.
+        Parameters:
+
+        sf                  - Salesforce instance to query against
+        query               - string, SOQL query without ORDER BY or LIMIT, I.E. "SELECT Id, Name FROM Account"
+        key_field           - string, fieldname matched against the keys
+        keys                - list or pandas.Series of the key values to match
+        max_query_length    - int, max number of characters of each URL encoded query, default to 15,000
+        max_workers         - int, number of queries running at once, default to 4
+        include_deleted     - bool, include deleted and archived records in the results
+
+        Return:             - pandas.DataFrame - the flattened Salesforce Records matching the keys
+        """
+        # try except block
+        try:
+            # split the keys into queries
+            queries = self.build_salesforce_in_clause_queries(query, key_field, keys, max_query_length)
+            # log status to console
+            log.info(f"[Querying Salesforce for {str(len(keys))} keys in {str(len(queries))} queries]")
+            # run the queries concurrently
+            with concurrent.futures.ThreadPoolExecutor(max_workers = max_workers) as pool:
+                # flatten the records of each query, kept in the order of the queries
+                dfs = list(pool.map(lambda chunk_query : self.flatten_salesforce_records(sf.query_all(chunk_query, include_deleted = include_deleted)["records"]), queries))
+            # drop the queries without any matching records
+            dfs = [chunk_df for chunk_df in dfs if len(chunk_df) != 0]
+            # concatenate the results of every query, empty when no keys matched
+            df = pd.concat(dfs, ignore_index = True) if dfs else pd.DataFrame()
+            # log status to console
+            log.info(f"[loaded {str(len(df))} records matching the keys into DataFrame]")
+            # return the matching records
+            return df
+        # exception block - error querying salesforce by keys
+        except Exception as e:
+            # log error when querying salesforce by keys
+            log.exception(f"[Error querying Salesforce by keys...{e}]")
+
+    def query_salesforce_bulk_pk_chunked(self, sf, object_name, query, chunk_size = 100000, include_deleted = False, max_workers = None, columns = None):
+        """
+        Description: stream a SOQL query from salesforce with a PK chunked bulk query.
+                     Salesforce splits the object into Id ranges that run as separate batches,
+                     the result sets of the chunks are downloaded concurrently and yielded
+                     as flattened DataFrame chunks as soon as each one is downloaded.
+                     Use in place of query_salesforce_in_chunks for objects with millions of records,
+                     the chunks come back in the order they finish, not in Id order.
+                     Every chunk has the same columns, see align_salesforce_chunk_columns.
+                     Errors are logged and raised, the stream never ends early without an error.
+        Parameters:
+
+        sf              - Salesforce instance to query against
+        object_name     - Salesforce object queried, must support PK chunking
+        query           - string, SOQL query
+        chunk_size      - int, number of records in each Id range, up to 250,000, default to 100,000
+        include_deleted - bool, include deleted and archived records in the results
+        max_workers     - int, number of chunks downloaded at once, default to the thread pool default
+        columns         - list of string, the column names of every chunk, default to the select list of the query,
+                          queries with subqueries, functions or aliases use the columns seen in earlier chunks instead
+
+        Return:         - generator of pandas.DataFrame - DataFrame chunks of the Salesforce Records
+        """
+        # try except block
+        try:
+            # log status to console of querying Salesforce
+            log.info(f"[Streaming PK chunked Salesforce bulk query in chunks of {str(chunk_size)}, include deleted records: {str(include_deleted)}]")
+            # bulk interface of the object queried
+            bulk_object = getattr(sf.bulk, object_name)
+            # queryAll includes the deleted and archived records
+            bulk_query = bulk_object.query_all if include_deleted else bulk_object.query
+            # column names every chunk is aligned to, grows with the columns seen when the select list can't be read
+            expected_columns = list(columns or self.get_soql_select_columns(query) or [])
+            # keep track of records yielded
+            records_loaded = 0
+            # loop through every result set as soon as it is downloaded
+            for records in bulk_query(query, lazy_operation = True, pk_chunking = chunk_size, max_workers = max_workers):
+                # skip chunks of the Id range without any matching records
+                if not records:
+                    continue
+                # flatten the result set into a dataframe
+                df = self.flatten_salesforce_records(records)
+                # give the chunk the same columns as the other chunks
+                df = self.align_salesforce_chunk_columns(df, expected_columns)
+                # remember columns not seen in earlier chunks
+                expected_columns.extend(df.columns[len(expected_columns):])
+                # update count of records yielded
+                records_loaded = records_loaded + len(df)
+                # log status of chunk loaded
+                log.info(f"[loaded {str(records_loaded)} records into DataFrame chunks]")
+                # return the chunk to the caller
+                yield df
+        # exception block - error streaming PK chunked Salesforce query
+        except Exception as e:
+            # log error when streaming PK chunked Salesforce query
+            log.exception(f"[Error streaming PK chunked Salesforce bulk query...{e}]")
+            # raise the error so a failed stream is never mistaken for a complete one
+            raise
+
+    def extract_salesforce_changes_into_snapshot(self, sf, object_name, fields, snapshot_file, where_clause = None, watermark_file = None, chunk_size = 10000):
+        """
+        Description: incrementally sync a salesforce object into a local Parquet snapshot.
+                     The SystemModstamp high-water mark of the last run is stored per object and query,
+                     each run queries only the records changed or deleted since the last run in a single
+                     queryAll, then merges them into the snapshot, deleted records are dropped.
+                     The first run, or a run where the fields or where clause changed, loads the whole object.
+                     Records that are changed to no longer match the where clause stay in the snapshot.
+                     Deleted records are only returned while they are in the recycle bin, run at least
+                     every 15 days to catch every delete.
+                     The changes are queried in SystemModstamp order, the snapshot and watermark are only written
+                     once every record of the query is loaded, a failed run logs and raises the error and leaves
+                     the snapshot and watermark of the last run in place.
+        Parameters:
+
+        sf              - Salesforce instance to query against
+        object_name     - Salesforce object to extract
+        fields          - list of string, fieldnames to extract, Id, SystemModstamp and IsDeleted are always added
+        snapshot_file   - string, path of the Parquet snapshot
+        where_clause    - string, optional SOQL filter without the WHERE keyword, I.E. "RecordType.Name = 'Customer'"
+        watermark_file  - string, path of the watermark json, default to the snapshot path ending in _watermark.json
+        chunk_size      - int, number of records in each DataFrame chunk queried, default to 10,000
+
+        Return:         - pandas.DataFrame - the merged snapshot of the Salesforce Records
+        """
+        # try except block
+        try:
+            # default the watermark file to sit next to the snapshot
+            if watermark_file is None:
+                # replace the extension of the snapshot file
+                watermark_file = os.path.splitext(snapshot_file)[0] + "_watermark.json"
+            # always extract the fields needed to merge the changes, keep the order of the fields given
+            fields = list(dict.fromkeys(["Id", "SystemModstamp", "IsDeleted"] + list(fields)))
+            # base query without the watermark filter
+            base_query = f"SELECT {', '.join(fields)} FROM {object_name}"
+            # key of the stored watermark, a different query starts over with a full load
+            watermark_key = base_query + (f" WHERE {where_clause}" if where_clause else "")
+            # the stored watermarks of every object and query
+            watermarks = {}
+            # read the stored watermarks
+            if os.path.exists(watermark_file):
+                # open the watermark file
+                with open(watermark_file, "r") as file:
+                    # load the watermarks
+                    watermarks = json.load(file)
+            # high-water mark of the last run of this query
+            watermark = watermarks.get(watermark_key)
+            # incremental run, a snapshot and watermark from an earlier run exist
+            if watermark is not None and os.path.exists(snapshot_file):
+                # soql datetime literal, truncated to the second, records at the boundary are merged again
+                since = pd.Timestamp(watermark).strftime("%Y-%m-%dT%H:%M:%SZ")
+                # only records changed or deleted since the last run
+                filters = [f"SystemModstamp >= {since}"] + ([f"({where_clause})"] if where_clause else [])
+                # log to console
+                log.info(f"[Extracting {object_name} records changed since {since}]")
+                # query the changed records including the deleted records in a single queryAll
+                changes_df = pd.concat(list(self.query_salesforce_in_chunks(sf, f"{base_query} WHERE {' AND '.join(filters)} ORDER BY SystemModstamp", chunk_size, include_deleted = True)) or [pd.DataFrame(columns = fields)], ignore_index = True)
+                # load the snapshot of the last run
+                snapshot_df = pd.read_parquet(snapshot_file)
+                # drop every record that changed or was deleted, changed records are added back below
+                snapshot_df = snapshot_df[~snapshot_df["Id"].isin(changes_df["Id"])]
+                # add the changed records that are not deleted
+                snapshot_df = pd.concat([snapshot_df, changes_df[changes_df["IsDeleted"] != True]], ignore_index = True)
+            # first run, load the whole object
+            else:
+                # log to console
+                log.info(f"[No watermark found, extracting every {object_name} record]")
+                # query every record that is not deleted
+                changes_df = pd.concat(list(self.query_salesforce_in_chunks(sf, f"{watermark_key} ORDER BY SystemModstamp", chunk_size)) or [pd.DataFrame(columns = fields)], ignore_index = True)
+                # the whole object is the snapshot
+                snapshot_df = changes_df
+            # log to console
+            log.info(f"[{str(len(changes_df))} {object_name} records changed, {str(len(snapshot_df))} records in snapshot]")
+            # write the merged snapshot
+            snapshot_df.to_parquet(snapshot_file, index = False)
+            # move the watermark to the newest change, keep the last watermark when nothing changed
+            if len(changes_df) != 0:
+                # newest SystemModstamp of the changes
+                watermarks[watermark_key] = str(pd.to_datetime(changes_df["SystemModstamp"], format = "ISO8601", utc = True).max().isoformat())
+                # write the watermarks after the snapshot, a failed run is queried again
+                with open(watermark_file, "w") as file:
+                    # save the watermarks
+                    json.dump(watermarks, file)
+            # return the merged snapshot
+            return snapshot_df
+        # exception block - error extracting salesforce changes into snapshot
+        except Exception as e:
+            # log error when extracting salesforce changes into snapshot
+            log.exception(f"[Error extracting {object_name} changes into snapshot...{e}]")
+            # raise the error so a failed run is never mistaken for an empty or complete snapshot
+            raise
+
     def format_date_to_salesforce_date(self, df, columns, format = "%m/%d/%Y"):
         """
-        Description: format specified columns in a dataframe to be compatible with Salesforce
+        Description: format specified columns in a dataframe to be compatible with Salesforce, I.E. yyyy-mm-dd.
+                     Dates repeat across rows, so only the distinct values of each column are parsed and
+                     formatted with native datetime formatting, then mapped back to every row at once.
+                     Blanks and missing dates are set to None.
         Parameters:
 
         df          - pandas.DataFrame
         columns     - list of string or string column names to format
         format      - default salesforce format = '%m/%d/%Y'
 
-        Return:     - query_results - JSON formatted records
+        Return:     - pandas.DataFrame - the dataframe with the reformatted columns
         """
         # try except block
         try:
@@ -127,16 +717,18 @@ class Salesforce_Utilities:
             return_df = df
             # check if formatting a single column
             if type(columns) == str:
-                # reformat the single column, apply lambda to remove extra values only retaining the mm-dd-yyyy values including the hyphens
-                return_df[columns] = pd.to_datetime(df[columns], format = format).dt.normalize().apply(lambda x : str(x)[:10])
-            # formatting list of columns
-            elif type(columns) == list:
-                # loop through list of columns to format one by one
-                for column in columns:
-                    # format the column in this loop of the list, apply lambda to remove extra values only retaining the mm-dd-yyyy values including the hyphens
-                    return_df[column] = pd.to_datetime(df[column], format = format).dt.normalize().apply(lambda x : str(x)[:10])
-                    # replace blanks due to reformat
-                    return_df.replace({column : {"NaT" : None, "" : None, " " : None}}, inplace = True)
+                # put the single column in a list to format the same way
+                columns = [columns]
+            # loop through list of columns to format
+            for column in columns:
+                # code of every row and the distinct values of the column, missing values get code -1
+                codes, uniques = pd.factorize(df[column])
+                # parse the distinct values only, blanks become NaT
+                dates = pd.to_datetime(pd.Series(uniques), format = format)
+                # format the distinct values as yyyy-mm-dd, replace NaT with None
+                formatted = dates.dt.strftime("%Y-%m-%d").astype(object).where(dates.notna(), None).to_numpy()
+                # map the formatted values back to every row, code -1 picks the None added at the end
+                return_df[column] = pd.Series(np.append(formatted, None)[codes], index = df.index, dtype = object)
             # return the reformatted dataframe
             return return_df
         # exception block - error formatting date column to Salesforce format
@@ -235,12 +827,161 @@ class Salesforce_Utilities:
             # log error when flattening lookup fieldname hierarchy
             log.exception(f"[Error flattening lookup fieldname hierarchy...{e}]")
 
-    def load_query_with_lookups_into_dataframe(self, query_results, use_subset = True, subset_size = 1000):
+    def flatten_salesforce_records(self, records):
+        """
+        Description: Flatten a list of Salesforce query records into a DataFrame in a single pass.
+                     Every record is walked once, nested lookups are expanded into dotted
+                     column names, I.E. Owner.Manager.Name, and the attributes keys are dropped
+                     along the way. All columns are built at once at the end instead of
+                     copying the whole DataFrame for every layer of nesting.
+        Parameters:
+
+        records       - list of OrderedDict, the "records" list of a SOQL query result
+
+        Return:       - pandas.DataFrame - DataFrame of the Salesforce Records
+        """
+        # try except block
+        try:
+            # columns of the dataframe, dotted fieldname path -> list of values, keeps order of first appearance
+            columns = {}
+            # every fieldname path that held a nested lookup in at least one record
+            lookup_paths = set()
+
+            def walk(prefix, layer, row_index):
+                # loop through each field of this layer of the record
+                for key, value in layer.items():
+                    # skip the attributes, they are metadata of the record and not a field
+                    if key == "attributes":
+                        continue
+                    # build the full dotted fieldname, I.E. Owner.Manager.Name
+                    path = prefix + key
+                    # nested lookup found, walk it in place with the fieldname as the new prefix
+                    if isinstance(value, dict):
+                        # remember this fieldname is a lookup and not a field
+                        lookup_paths.add(path)
+                        # walk the next layer of the lookup
+                        walk(path + ".", value, row_index)
+                        # nothing to store for the lookup itself
+                        continue
+                    # get the list of values for this column
+                    column = columns.get(path)
+                    # first time this column is found, backfill previous rows with None
+                    if column is None:
+                        # create the column with a None for every earlier row
+                        column = columns[path] = [None] * row_index
+                    # this column was missing from some previous rows, pad them with None
+                    elif len(column) < row_index:
+                        # pad the column up to the current row
+                        column.extend([None] * (row_index - len(column)))
+                    # add the value of this row to the column
+                    column.append(value)
+
+            # loop through every record of the query results only once
+            for row_index, record in enumerate(records):
+                # walk the record starting at the top layer with no prefix
+                walk("", record, row_index)
+            # total number of records walked
+            records_count = len(records)
+            # pad every column missing from the last rows
+            for column in columns.values():
+                # only pad when the column is short
+                if len(column) < records_count:
+                    # pad the column to the full length of the records
+                    column.extend([None] * (records_count - len(column)))
+            # lookups that are empty on some rows are stored as a field holding None,
+            # drop them when the same fieldname is expanded as a lookup on other rows
+            for path in lookup_paths:
+                # the lookup column was created from an empty lookup on some rows
+                if path in columns and all(value is None for value in columns[path]):
+                    # drop the empty lookup column, its fields are already expanded
+                    del columns[path]
+            # build every column of the dataframe at once
+            return pd.DataFrame(columns, index = pd.RangeIndex(records_count))
+        # exception block - error flattening salesforce records
+        except Exception as e:
+            # log error when flattening salesforce records
+            log.exception(f"[Error flattening salesforce records...{e}]")
+
+    def normalize_salesforce_subqueries(self, records, sf = None, parent_key = "Id", parent_key_column = "Parent_Id"):
+        """
+        Description: Split the parent-to-child subqueries of SOQL results, I.E. (SELECT Id FROM Contacts),
+                     into a separate child DataFrame per relationship in a single pass over the records.
+                     Each child row is keyed by the Id of its parent record, the parent records are
+                     flattened without the subquery columns. One query with subqueries replaces a query per parent batch.
+        Parameters:
+
+        records             - list of OrderedDict, the "records" list of a SOQL query result
+        sf                  - Salesforce instance used to query the remaining pages of subqueries with more
+                              than one page of child records, required for subqueries over 200 children per parent,
+                              a ValueError is raised when a subquery has more pages and no instance is passed
+        parent_key          - string, field of the parent records used as the key, default to Id, must be in the query
+        parent_key_column   - string, name of the column holding the parent key in the child DataFrames
+
+        Return:             - array of length 2, the flattened parent records as a pandas.DataFrame
+                              and a dict of relationship name -> pandas.DataFrame of the flattened child records
+        """
+        # try except block
+        try:
+            # parent records without the subqueries
+            parents = []
+            # relationship name -> child records, each with the key of its parent
+            children = {}
+            # loop through every record once
+            for record in records:
+                # fields of the parent record without the subqueries
+                parent = {}
+                # loop through each field of the record
+                for key, value in record.items():
+                    # a subquery result holds its own records list, lookups do not
+                    if isinstance(value, dict) and "records" in value and "totalSize" in value:
+                        # child records of this relationship, create the list for the first parent
+                        child_records = children.setdefault(key, [])
+                        # add every page of the subquery
+                        while True:
+                            # add the parent key to each child record
+                            child_records.extend({parent_key_column : record.get(parent_key), **child} for child in value["records"])
+                            # stop on the last page
+                            if value.get("done", True):
+                                break
+                            # the remaining pages can not be queried, never return a truncated set of children
+                            if sf == None:
+                                raise ValueError(f"subquery {key} of parent {record.get(parent_key)} has more than one page of records, pass sf to query the remaining pages")
+                            # query the next page of the subquery
+                            value = sf.query_more(value["nextRecordsUrl"], identifier_is_url = True)
+                        # skip adding the subquery to the parent
+                        continue
+                    # an empty subquery is returned as None, keep it off the parent when it is a known relationship
+                    if value is None and key in children:
+                        continue
+                    # keep the field on the parent
+                    parent[key] = value
+                # add the parent record
+                parents.append(parent)
+            # flatten the parent records
+            parent_df = self.flatten_salesforce_records(parents)
+            # parents read before a subquery was first found may hold it as None, drop those columns
+            parent_df = parent_df.drop(columns = [key for key in children if key in parent_df.columns])
+            # log to console status of the subqueries
+            log.info(f"[Normalized {str(len(parent_df))} parent records, child records: {', '.join(f'{key}: {len(child_records)}' for key, child_records in children.items())}]")
+            # flatten the child records of each relationship
+            return [parent_df, {key : self.flatten_salesforce_records(child_records) for key, child_records in children.items()}]
+        # exception block - error normalizing salesforce subqueries
+        except Exception as e:
+            # log error when normalizing salesforce subqueries
+            log.exception(f"[Error normalizing salesforce subqueries...{e}]")
+            # raise the error so a truncated set of children is never returned
+            raise
+
+    def load_query_with_lookups_into_dataframe(self, query_results, use_subset = True, subset_size = 1000, use_single_pass = True):
         """
         Description: Load SOQL query that has lookup fields, requires more processing time.
         Parameters:
 
         query_results   - OrderedDict, JSON formatted records
+        use_subset      - only used by flatten_lookup_fieldname_hierarchy, use batches
+        subset_size     - only used by flatten_lookup_fieldname_hierarchy, batch size default to 1000
+        use_single_pass - bool, flatten the records in one pass with flatten_salesforce_records,
+                          set to False to use the recursive flatten_lookup_fieldname_hierarchy
 
         Return:         - pandas.DataFrame - DataFrame of the Salesforce Records
         """
@@ -248,17 +989,25 @@ class Salesforce_Utilities:
         try:
             # log info to console
             log.info("[loading query results into DataFrames]")
-            # load query results json into a diction, then convert the dictionary
-            # to a pandas Dataframe
-            df = pd.DataFrame.from_dict(dict(query_results)["records"])
-            # check if there are nested object fields in the query results
-            if "attributes" in df.columns:
-                # drop this column to avoid issue with unnesting the lookup fields
-                 df.drop(["attributes"], axis = 1, inplace = True)
-            # log to console
-            log.info(f"[Unnesting columns for DF with: {str(len(df))} records]")
-            # unnest lookup fields from query onto a flat array and return as a dataframe
-            df = self.flatten_lookup_fieldname_hierarchy(df, use_subset = use_subset, subset_size = subset_size)
+            # flatten every lookup of every record in one pass
+            if use_single_pass:
+                # log to console
+                log.info(f"[Unnesting columns for DF with: {str(len(query_results['records']))} records]")
+                # walk the records once and build every column at once
+                df = self.flatten_salesforce_records(query_results["records"])
+            # use the recursive column by column unnesting
+            else:
+                # load query results json into a diction, then convert the dictionary
+                # to a pandas Dataframe
+                df = pd.DataFrame.from_dict(dict(query_results)["records"])
+                # check if there are nested object fields in the query results
+                if "attributes" in df.columns:
+                    # drop this column to avoid issue with unnesting the lookup fields
+                     df.drop(["attributes"], axis = 1, inplace = True)
+                # log to console
+                log.info(f"[Unnesting columns for DF with: {str(len(df))} records]")
+                # unnest lookup fields from query onto a flat array and return as a dataframe
+                df = self.flatten_lookup_fieldname_hierarchy(df, use_subset = use_subset, subset_size = subset_size)
             # where a notnull NaN value is found, replace with None
             df = df.where((pd.notnull(df)), None)
             # log status of unnesting lookups into a new dataframe
@@ -270,6 +1019,193 @@ class Salesforce_Utilities:
             # log error when loading query with lookups into dataframe
             log.exception(f"[Error loading query with lookups into dataframe...{e}]")
 
+    def describe_salesforce_object_field_types(self, sf, object_name, cache_dir = None, cache_expiry_hours = 24):
+        """
+        Description: describe a salesforce object once and cache the field types to disk,
+                     later calls read the cached file until it is older than the expiry.
+                     The cache file is keyed by the salesforce instance and the object name.
+        Parameters:
+
+        sf                  - Salesforce instance to describe the object with
+        object_name         - Salesforce object to describe, both standard and custom objects
+        cache_dir           - string, folder of the cached describe files, default to the Output/describe_cache folder
+        cache_expiry_hours  - float, hours before a cached describe is refreshed, default to 24
+
+        Return:             - dict - "fields": lowercase fieldname -> salesforce field type,
+                                     "relationships": lowercase relationship name -> referenced object name
+        """
+        # try except block
+        try:
+            # default the cache folder to the Output folder next to this file
+            if cache_dir is None:
+                # set up directory pathway of the cache folder
+                cache_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "Output", "describe_cache")
+            # name the cache file after the instance and the object, describes differ between orgs
+            cache_file = os.path.join(cache_dir, re.sub(r"[^\w.-]", "_", f"{sf.sf_instance}_{object_name}") + ".json")
+            # use the cached describe while it has not expired
+            if os.path.exists(cache_file) and time.time() - os.path.getmtime(cache_file) < cache_expiry_hours * 3600:
+                # open the cached describe
+                with open(cache_file, "r") as file:
+                    # return the cached field types
+                    return json.load(file)
+            # log to console, describing the object
+            log.info(f"[Describing Salesforce object: {object_name}]")
+            # describe the object once
+            describe = getattr(sf, object_name).describe()
+            # keep only the field types and lookup relationships
+            field_types = {
+                "fields" : {field["name"].lower() : field["type"] for field in describe["fields"]},
+                "relationships" : {field["relationshipName"].lower() : field["referenceTo"][0] for field in describe["fields"] if field.get("relationshipName") and field.get("referenceTo")},
+            }
+            # create the cache folder if missing
+            os.makedirs(cache_dir, exist_ok = True)
+            # write the field types to the cache file
+            with open(cache_file, "w") as file:
+                # save the field types
+                json.dump(field_types, file)
+            # return the field types
+            return field_types
+        # exception block - error describing salesforce object
+        except Exception as e:
+            # log error when describing salesforce object
+            log.exception(f"[Error describing salesforce object {object_name}...{e}]")
+
+    def get_salesforce_column_types(self, sf, object_name, columns, cache_dir = None, cache_expiry_hours = 24):
+        """
+        Description: find the salesforce field type of every column of a flattened query,
+                     dotted lookup columns, I.E. Owner.Manager.Name, are followed through
+                     the describe of each referenced object.
+        Parameters:
+
+        sf                  - Salesforce instance to describe the objects with
+        object_name         - Salesforce object queried
+        columns             - list of string, column names of the flattened query
+        cache_dir           - string, folder of the cached describe files
+        cache_expiry_hours  - float, hours before a cached describe is refreshed
+
+        Return:             - dict - column name -> salesforce field type, columns not found are left out
+        """
+        # try except block
+        try:
+            # types of every column found
+            column_types = {}
+            # loop through every column of the query
+            for column in columns:
+                # start at the object queried
+                current_object = object_name
+                # split the lookup path into relationships and the field name
+                *relationships, field = column.lower().split(".")
+                # follow each lookup to the object it references
+                for relationship in relationships:
+                    # get the describe of the current object
+                    describe = self.describe_salesforce_object_field_types(sf, current_object, cache_dir, cache_expiry_hours)
+                    # move to the referenced object, None when not a lookup
+                    current_object = describe["relationships"].get(relationship)
+                    # stop when the lookup is not found
+                    if current_object is None:
+                        break
+                # the lookup path could not be followed, leave the column untyped
+                if current_object is None:
+                    continue
+                # get the type of the field from the describe of the last object
+                field_type = self.describe_salesforce_object_field_types(sf, current_object, cache_dir, cache_expiry_hours)["fields"].get(field)
+                # only keep columns that are salesforce fields, skips aggregate aliases
+                if field_type is not None:
+                    # record the type of the column
+                    column_types[column] = field_type
+            # return the types of the columns
+            return column_types
+        # exception block - error getting salesforce column types
+        except Exception as e:
+            # log error when getting salesforce column types
+            log.exception(f"[Error getting salesforce column types...{e}]")
+
+    def convert_salesforce_column(self, values, field_type):
+        """
+        Description: convert a column of salesforce values into the pandas type of the field,
+                     nulls are kept as missing values of the typed column.
+                     int/long -> Int64, double/currency/percent -> float64, boolean -> boolean,
+                     date/datetime -> datetime64, picklist -> category, everything else is left as is
+        Parameters:
+
+        values      - pandas.Series, values of a single column
+        field_type  - string, salesforce field type from the describe
+
+        Return:     - pandas.Series - the typed column
+        """
+        # try except block
+        try:
+            # whole numbers, nullable integer type keeps the nulls
+            if field_type in ["int", "long"]:
+                # convert to nullable integers
+                return pd.to_numeric(values).astype("Int64")
+            # decimal numbers, nulls become NaN
+            if field_type in ["double", "currency", "percent"]:
+                # convert to floats
+                return pd.to_numeric(values).astype("float64")
+            # checkbox fields, nullable boolean type keeps the nulls
+            if field_type == "boolean":
+                # convert to nullable booleans
+                return values.astype("boolean")
+            # bulk queries return dates and datetimes as epoch milliseconds instead of strings
+            if field_type in ["date", "datetime"] and pd.api.types.is_numeric_dtype(values):
+                # convert milliseconds to datetimes, dates stay timezone naive
+                return pd.to_datetime(values, unit = "ms", utc = field_type == "datetime")
+            # date fields, I.E. 2025-08-10
+            if field_type == "date":
+                # parse the dates
+                return pd.to_datetime(values, format = "%Y-%m-%d")
+            # datetime fields, I.E. 2025-08-10T12:00:00.000+0000
+            if field_type == "datetime":
+                # parse iso 8601 strings in utc
+                return pd.to_datetime(values, format = "ISO8601", utc = True)
+            # picklists repeat a small set of values, store each value once
+            if field_type == "picklist":
+                # convert to categories
+                return values.astype("category")
+            # every other type is left as is
+            return values
+        # exception block - error converting salesforce column
+        except Exception as e:
+            # log error when converting salesforce column
+            log.exception(f"[Error converting salesforce column to {field_type}...{e}]")
+
+    def load_query_into_typed_dataframe(self, sf, object_name, query_results, cache_dir = None, cache_expiry_hours = 24):
+        """
+        Description: Load a SOQL query into a DataFrame with typed columns.
+                     The object is described once and the field types are cached to disk,
+                     numeric, boolean, datetime and category columns are built directly
+                     from the flattened records, no casting afterwards and no full DataFrame copy
+                     to replace NaN with None.
+        Parameters:
+
+        sf                  - Salesforce instance to describe the objects with
+        object_name         - Salesforce object queried
+        query_results       - OrderedDict, JSON formatted records
+        cache_dir           - string, folder of the cached describe files, default to the Output/describe_cache folder
+        cache_expiry_hours  - float, hours before a cached describe is refreshed, default to 24
+
+        Return:             - pandas.DataFrame - DataFrame of the Salesforce Records with typed columns
+        """
+        # try except block
+        try:
+            # log info to console
+            log.info(f"[loading query results into typed DataFrame with: {str(len(query_results['records']))} records]")
+            # walk the records once and build every column at once
+            df = self.flatten_salesforce_records(query_results["records"])
+            # find the salesforce field type of every column
+            column_types = self.get_salesforce_column_types(sf, object_name, df.columns, cache_dir, cache_expiry_hours)
+            # build every typed column at once
+            df = pd.DataFrame({column : self.convert_salesforce_column(df[column], column_types.get(column)) for column in df.columns}, index = df.index)
+            # log status of loading the typed dataframe
+            log.info(f"[loaded  {str(len(df))}  records into typed DataFrame]")
+            # return the query results as a typed pandas dataframe
+            return df
+        # exception block - error loading query into typed dataframe
+        except Exception as e:
+            # log error when loading query into typed dataframe
+            log.exception(f"[Error loading query into typed dataframe...{e}]")
+
     def reformat_dataframe_to_salesforce_records(self, df):
         """
         Description: Reformat df into list of dicts where each dict is a SF record
@@ -292,7 +1228,386 @@ class Salesforce_Utilities:
             # log error when reformatting dataframe to salesforce json records
             log.exception(f"[Error reformatting dataframe to salesforce json records...{e}]")
 
-    def upload_dataframe_to_salesforce(self, sf, df, object_name, dml_operation, success_file = None, fallout_file = None, batch_size = 1000, external_id_field=None, time_delay = None):
+    def normalize_salesforce_collection_results(self, dml_operation, results):
+        """
+        Description: give sObject Collections results the shape of the bulk results, so the passing and
+                     fallout DataFrames have the same columns whichever api uploaded the records.
+                     Collections results only hold created for upserts, inserts that pass are created,
+                     updates and deletes never are. Errors keep the statusCode, message and fields of each error
+                     like the bulk errors read by get_salesforce_error_code.
+        Parameters:
+
+        dml_operation       - insert/upsert/update/delete
+        results             - list of dicts, the results of a sObject Collections request
+
+        Return:             - list of dicts, each with the success, created, id and errors keys of the bulk results
+        """
+        # build the bulk result of every record, in the same order
+        return [{
+            "success" : result.get("success", False),
+            "created" : result.get("created", dml_operation == "insert" and result.get("success", False)),
+            "id" : result.get("id"),
+            "errors" : [{"statusCode" : error.get("statusCode"), "message" : error.get("message"), "fields" : error.get("fields", [])} for error in result.get("errors") or []],
+        } for result in results]
+
+    def submit_collection_batch_to_salesforce(self, sf, object_name, dml_operation, data, external_id_field = None):
+        """
+        Description: submit up to 200 records to salesforce in a single sObject Collections request.
+                     There is no bulk job to create, poll and close, so small uploads return in a single round trip.
+        Parameters:
+
+        sf                  - simple_salesforce instance used to log in and perform operations again Salesforce
+        object_name         - Salesforce object to perform operations against, both standard and custom objects
+        dml_operation       - insert/upsert/update/delete
+        data                - list of dicts, up to 200 salesforce records
+        external_id_field   - string, name of the external id field, required for upsert
+
+        Return:             - list of dicts, the results of the records in the same order as the records,
+                              normalized to the success, created, id and errors keys of the bulk results,
+                              see normalize_salesforce_collection_results
+        """
+        # delete only sends the ids of the records
+        if dml_operation == "delete":
+            # delete the records by id, allOrNone false to keep the records that pass when others fail
+            return self.normalize_salesforce_collection_results(dml_operation, sf.restful("composite/sobjects", params = {"ids" : ",".join(record["Id"] for record in data), "allOrNone" : "false"}, method = "DELETE"))
+        # add the object type to every record as required by the collections api
+        records = [dict(record, attributes = {"type" : object_name}) for record in data]
+        # request body, allOrNone false to keep the records that pass when others fail
+        payload = json.dumps({"allOrNone" : False, "records" : records}, allow_nan = False, default = str)
+        # insert creates new records
+        if dml_operation == "insert":
+            # create the records
+            return self.normalize_salesforce_collection_results(dml_operation, sf.restful("composite/sobjects", method = "POST", data = payload))
+        # update changes existing records by Id
+        if dml_operation == "update":
+            # update the records
+            return self.normalize_salesforce_collection_results(dml_operation, sf.restful("composite/sobjects", method = "PATCH", data = payload))
+        # upsert matches records on the external id field
+        if dml_operation == "upsert":
+            # upsert the records
+            return self.normalize_salesforce_collection_results(dml_operation, sf.restful(f"composite/sobjects/{object_name}/{external_id_field}", method = "PATCH", data = payload))
+        # any other operation is not supported by the collections api
+        raise ValueError(f"dml operation not supported by sObject Collections: {dml_operation}")
+
+    def submit_dml_batch_to_salesforce(self, sf, object_name, dml_operation, data, external_id_field = None, time_delay = None, api = "bulk"):
+        """
+        Description: submit a single batch of records to salesforce with a dml operation,
+                     used by upload_dataframe_to_salesforce for both serial and parallel uploads
+        Parameters:
+
+        sf                  - simple_salesforce instance used to log in and perform operations again Salesforce
+        object_name         - Salesforce object to perform operations against, both standard and custom objects
+        dml_operation       - insert/upsert/update/delete
+        data                - list of dicts, a single batch of salesforce records
+        external_id_field   - string, name of the external id field
+        time_delay          - add a time delay after the batch is uploaded in case custom code needs to process between batches,
+                              or a Salesforce_Rate_Limiter to wait for the api budget before the batch is uploaded
+        api                 - string, 'bulk' to submit the batch as a bulk job,
+                              'collections' to submit up to 200 records in a single sObject Collections request
+
+        Return:             - list of dicts, the results of the batch in the same order as the records
+        """
+        # pace the batch by the api budget left in the org
+        if isinstance(time_delay, Salesforce_Rate_Limiter):
+            # wait before the batch is uploaded
+            time_delay.wait()
+        # submit small batches without a bulk job
+        if api == "collections":
+            # perform insert/upsert/update/delete operations using the sObject Collections api
+            results = self.submit_collection_batch_to_salesforce(sf, object_name, dml_operation, data, external_id_field)
+        # submit the batch as a bulk job
+        else:
+            # perform insert/upsert/update/delete operations using the submit_dml function
+            results = sf.bulk.submit_dml(object_name, dml_operation, data, external_id_field)
+        # if using a time delay between uploads, extecute the delay here after the batch is uploaded
+        if time_delay != None and not isinstance(time_delay, Salesforce_Rate_Limiter):
+            # time delay
+            time.sleep(time_delay)
+        # return the results of the batch
+        return results
+
+    def partition_dataframe_by_parent_key(self, df, parent_key_column, batch_size = 1000):
+        """
+        Description: split a dataframe into batches where every row sharing the same parent key,
+                     I.E. the AccountId of Contacts or Opportunities, lands in the same batch.
+                     Parallel batches then never lock the same parent record at the same time.
+                     Groups are placed largest first into the batch with the fewest rows,
+                     opening a new batch only when no batch has room, to balance the batches by size.
+                     A group larger than batch_size is kept whole in its own batch.
+                     Rows with no parent key can not cause contention and fill the remaining room.
+        Parameters:
+
+        df                  - pandas.DataFrame of records to upload
+        parent_key_column   - string, column holding the id of the parent record
+        batch_size          - int, target number of rows in each batch
+
+        Return:             - list of pandas.DataFrame, one dataframe per batch
+        """
+        # try except block
+        try:
+            # log to console status of partitioning
+            log.info(f"[Partitioning {str(len(df))} records by parent key: {parent_key_column}]")
+            # check which rows have a parent key
+            has_parent = df[parent_key_column].notna().to_numpy()
+            # positions of the rows of each parent, grouped in a single pass
+            groups = list(df[has_parent].groupby(parent_key_column, sort = False).indices.values())
+            # positions of the keyed rows in the full dataframe
+            keyed_positions = np.flatnonzero(has_parent)
+            # positions of the rows with no parent key
+            unkeyed_positions = np.flatnonzero(~has_parent)
+            # positions of the rows of each batch
+            batches = []
+            # heap of (rows in batch, batch index) to find the batch with the fewest rows
+            heap = []
+            # place the largest groups first
+            for group in sorted(groups, key = len, reverse = True):
+                # the batch with the fewest rows has room for the group
+                if heap and heap[0][0] + len(group) <= batch_size:
+                    # pull the batch with the fewest rows
+                    size, index = heapq.heappop(heap)
+                    # add the group to the batch
+                    batches[index].append(keyed_positions[group])
+                # no batch has room, open a new batch
+                else:
+                    # new batch index
+                    index = len(batches)
+                    # create the batch with the group
+                    batches.append([keyed_positions[group]])
+                    # no rows in the batch yet
+                    size = 0
+                # push the batch back with its new size
+                heapq.heappush(heap, (size + len(group), index))
+            # loop through the batches in order to fill the remaining room with rows with no parent key
+            for index, size in sorted((index, size) for size, index in heap):
+                # no rows with no parent key left to place
+                if len(unkeyed_positions) == 0:
+                    break
+                # room left in the batch
+                room = max(0, batch_size - size)
+                # add rows with no parent key to the batch
+                batches[index].append(unkeyed_positions[:room])
+                # drop the placed rows
+                unkeyed_positions = unkeyed_positions[room:]
+            # place the remaining rows with no parent key into new full batches
+            for start in range(0, len(unkeyed_positions), batch_size):
+                # create the batch of rows with no parent key
+                batches.append([unkeyed_positions[start:start + batch_size]])
+            # log to console status of partitioning
+            log.info(f"[Partitioned {str(len(groups))} parent keys into {str(len(batches))} batches]")
+            # select the rows of each batch from the dataframe
+            return [df.iloc[np.concatenate(batch)] for batch in batches]
+        # exception block - error partitioning dataframe by parent key
+        except Exception as e:
+            # log error when partitioning dataframe by parent key
+            log.exception(f"[Error partitioning dataframe by parent key: {parent_key_column}...{e}]")
+
+    def submit_dml_batches_to_salesforce(self, sf, object_name, dml_operation, batches, external_id_field = None, time_delay = None, max_workers = 1, api = "bulk"):
+        """
+        Description: submit batches of records to salesforce with a dml operation and
+                     yield the results of each batch in the same order as the batches.
+                     With more than one worker, up to max_workers batches are kept in flight on a thread pool,
+                     a new batch is only converted and submitted once the oldest batch in flight is returned.
+        Parameters:
+
+        sf                  - simple_salesforce instance used to log in and perform operations again Salesforce
+        object_name         - Salesforce object to perform operations against, both standard and custom objects
+        dml_operation       - insert/upsert/update/delete
+        batches             - iterable of pandas.DataFrame, each dataframe is a single batch of records
+        external_id_field   - string, name of the external id field
+        time_delay          - add a time delay after each batch is uploaded in case custom code needs to process between batches,
+                              or a Salesforce_Rate_Limiter to pace the batches and lower the batches in flight by the api budget left
+        max_workers         - int, number of batches to keep in flight at once, default to 1 (serial)
+        api                 - string, 'bulk' or 'collections', see submit_dml_batch_to_salesforce
+
+        Return:             - generator of (pandas.DataFrame, list of dicts), each batch with its results
+        """
+        # upload the batches one at a time
+        if max_workers <= 1:
+            # loop through each batch
+            for batch_df in batches:
+                # convert the batch to salesforce records and upload it
+                yield batch_df, self.submit_dml_batch_to_salesforce(sf, object_name, dml_operation, self.reformat_dataframe_to_salesforce_records(batch_df), external_id_field, time_delay, api)
+        # keep several batches in flight at once on a thread pool
+        else:
+            # log to console status
+            log.info(f"[Uploading batches in parallel with {str(max_workers)} workers]")
+            # create the thread pool, shut down once all batches are processed
+            with concurrent.futures.ThreadPoolExecutor(max_workers = max_workers) as pool:
+                # batches in flight in the order they were submitted
+                in_flight = collections.deque()
+                # loop through each batch
+                for batch_df in batches:
+                    # convert the batch to salesforce records and submit it to the thread pool
+                    in_flight.append((batch_df, pool.submit(self.submit_dml_batch_to_salesforce, sf, object_name, dml_operation, self.reformat_dataframe_to_salesforce_records(batch_df), external_id_field, time_delay, api)))
+                    # batches allowed in flight, lowered by the rate limiter as the api budget runs low
+                    workers = time_delay.get_max_workers(max_workers) if isinstance(time_delay, Salesforce_Rate_Limiter) else max_workers
+                    # every allowed worker is busy, wait on the oldest batches before submitting another
+                    while len(in_flight) >= workers:
+                        # pull the oldest batch in flight
+                        batch_df, future = in_flight.popleft()
+                        # return the batch and its results in the order submitted
+                        yield batch_df, future.result()
+                # return the remaining batches in flight
+                while in_flight:
+                    # pull the oldest batch in flight
+                    batch_df, future = in_flight.popleft()
+                    # return the batch and its results in the order submitted
+                    yield batch_df, future.result()
+
+    def convert_dataframe_to_csv_chunks(self, df, max_bytes = 100000000, rows_per_slice = 50000):
+        """
+        Description: convert a dataframe into CSV files of up to max_bytes each, every file has its own header.
+                     The dataframe is written in slices of rows so only one CSV chunk is held in memory at a time.
+        Parameters:
+
+        df              - pandas.DataFrame to convert to CSV
+        max_bytes       - int, max size in bytes of each CSV chunk, default to the Bulk 2.0 limit of 100MB raw data
+        rows_per_slice  - int, number of rows converted to CSV at a time
+
+        Return:         - generator of bytes, utf-8 encoded CSV chunks
+        """
+        # try except block
+        try:
+            # CSV header line shared by every chunk
+            header = df.head(0).to_csv(index = False, lineterminator = "\n").encode("utf-8")
+            # rows of the chunk being built
+            chunk = [header]
+            # size of the chunk being built
+            chunk_size = len(header)
+            # ranges of rows left to convert, popped from the end so the rows stay in order
+            row_ranges = [(index, min(index + rows_per_slice, len(df))) for index in reversed(range(0, len(df), rows_per_slice))]
+            # loop through the dataframe a slice of rows at a time
+            while row_ranges:
+                # pull the next slice of rows to convert
+                start, stop = row_ranges.pop()
+                # convert the slice of rows to csv without the header
+                rows = df.iloc[start:stop].to_csv(index = False, header = False, lineterminator = "\n").encode("utf-8")
+                # adding the slice would go over the limit
+                if chunk_size + len(rows) > max_bytes:
+                    # split the slice in half by rows, values can hold line breaks so the csv text is never split
+                    if stop - start > 1:
+                        # middle row of the slice
+                        middle = (start + stop) // 2
+                        # convert the second half after the first half
+                        row_ranges.append((middle, stop))
+                        # convert the first half next
+                        row_ranges.append((start, middle))
+                        # move on to the first half
+                        continue
+                    # a single row does not fit, yield the chunk and start a new one
+                    if len(chunk) > 1:
+                        # return the full chunk
+                        yield b"".join(chunk)
+                        # start a new chunk with the header
+                        chunk = [header]
+                        # reset size of the chunk
+                        chunk_size = len(header)
+                # add the slice to the chunk
+                chunk.append(rows)
+                # update size of the chunk
+                chunk_size = chunk_size + len(rows)
+            # yield the last chunk if it has any rows
+            if len(chunk) > 1:
+                # return the last chunk
+                yield b"".join(chunk)
+        # exception block - error converting dataframe to csv chunks
+        except Exception as e:
+            # log error when converting dataframe to csv chunks
+            log.exception(f"[Error converting dataframe to csv chunks...{e}]")
+            # raise the error so a failed conversion never uploads a partial set of chunks
+            raise
+
+    def upload_dataframe_to_salesforce_bulk2(self, sf, df, object_name, dml_operation, success_file = None, fallout_file = None, external_id_field = None, wait = 5, return_results = True):
+        """
+        Description: upload dataframe of records to salesforce through a Bulk API 2.0 ingest job.
+                     The dataframe is uploaded as CSV, with a single job per operation for up to 100MB of data,
+                     and the successful, failed and unprocessed results of each job are streamed back as CSV,
+                     parsed and appended to the success and fallout files as soon as that job completes.
+                     The results have the same columns as the Bulk API v1 results of upload_dataframe_to_salesforce.
+        Parameters:
+
+        sf                  - simple_salesforce instance used to log in and perform operations again Salesforce
+        df                  - pandas data frame of the data to be uploaded
+        object_name         - Salesforce object to perform operations against, both standard and custom objects
+        dml_operation       - insert/upsert/update/delete/hard_delete
+        success_file        - string, path to store the success output file
+        fallout_file        - string, path to store the fallout output file
+        external_id_field   - string, name of the external id field
+        wait                - seconds to wait between checking the job status
+        return_results      - bool, keep every result to return the passing and fallout DataFrames,
+                              set to False to only write the results of each job to the success and fallout files
+
+        Return:             - array of length 2, the fallout and success results separated in two DataFrames,
+                              or the number of passing and fallout records when return_results = False
+        """
+        # try except block
+        try:
+            # log to console status
+            log.info(f"[Starting Bulk 2.0 DML.. records to {dml_operation} : {str(len(df))} ]")
+            # columns of the results, the upload columns then the results like the Bulk API v1 results
+            results_columns = list(df.columns) + ["RESULTS_success", "RESULTS_created", "RESULTS_id", "RESULTS_errors"]
+            # rename the Bulk 2.0 result columns to match the Bulk v1 result columns
+            rename_columns = {"sf__Id" : "RESULTS_id", "sf__Created" : "RESULTS_created", "sf__Error" : "RESULTS_errors"}
+            # keep  track of how many records successfully loaded
+            passing = 0
+            # keep track of how many records unsuccessfully loaded
+            fallout = 0
+            # array of the passing results to return at end of function
+            passing_list = []
+            # array of the fallout results to return at end of function
+            fallout_list = []
+            # upload the dataframe as csv chunks, loop through the results of each job as soon as it completes
+            for job_number, job_results in enumerate(sf.bulk.submit_dml_bulk2(object_name, dml_operation, self.convert_dataframe_to_csv_chunks(df), external_id_field, wait, lazy_operation = True)):
+                # dataframes of each results type of the job
+                results_dfs = {}
+                # loop through each type of results
+                for results_type in ["successfulResults", "failedResults", "unprocessedrecords"]:
+                    # buffer holding the csv results of this job only
+                    buffer = io.BytesIO(b"".join(job_results[results_type]))
+                    # no results of this type, keep the columns of the results
+                    if buffer.getbuffer().nbytes == 0:
+                        # create an empty dataframe with the results columns
+                        results_dfs[results_type] = pd.DataFrame(columns = results_columns)
+                    # load the csv results, keep every value as a string as uploaded
+                    else:
+                        # read the csv results into a dataframe
+                        results_dfs[results_type] = pd.read_csv(buffer, dtype = str).rename(columns = rename_columns)
+                # successful records of the job, marked as a success
+                job_passing_df = results_dfs["successfulResults"].assign(RESULTS_success = True).reindex(columns = results_columns)
+                # failed records and records salesforce did not process are both fallout, marked as a failure
+                job_fallout_df = pd.concat([results_dfs["failedResults"], results_dfs["unprocessedrecords"]], ignore_index = True).assign(RESULTS_success = False).reindex(columns = results_columns)
+                # update count of passing records
+                passing = passing + len(job_passing_df)
+                # update count of fallout records
+                fallout = fallout + len(job_fallout_df)
+                # if a success file pathway is added, append the passing records as soon as the job completes
+                if success_file != None:
+                    # create the file and write the header with the first job only
+                    self.append_dataframe_to_csv(job_passing_df, success_file, write_header = job_number == 0)
+                # if a fallout file pathway is added, append the fallout records as soon as the job completes
+                if fallout_file != None:
+                    # create the file and write the header with the first job only
+                    self.append_dataframe_to_csv(job_fallout_df, fallout_file, write_header = job_number == 0)
+                # keep the results of the job to return at the end of the function
+                if return_results:
+                    # upload the passing dataframe into an array
+                    passing_list.append(job_passing_df)
+                    # upload the fallout dataframe into an array
+                    fallout_list.append(job_fallout_df)
+                # log the status of how many records passed vs failed
+                log.info(f"[{str(passing)}/{str(len(df))} rows of data - {dml_operation} rows of data loaded, failed rows: {str(fallout)}...]")
+            # results are only written to the output files, return the counts
+            if not return_results:
+                # return the number of passing and fallout records
+                return [passing, fallout]
+            # return both the passing and fallout dataframes
+            return [pd.concat(passing_list, ignore_index = True) if passing_list else pd.DataFrame(columns = results_columns), pd.concat(fallout_list, ignore_index = True) if fallout_list else pd.DataFrame(columns = results_columns)]
+        # exception block - error uploading dataframe of records to salesforce bulk 2.0
+        except Exception as e:
+            # log error when uploading dataframe of records to salesforce bulk 2.0
+            log.exception(f"[Error uploading dataframe of records to salesforce through Bulk API 2.0...{e}]")
+
+    def upload_dataframe_to_salesforce(self, sf, df, object_name, dml_operation, success_file = None, fallout_file = None, batch_size = 1000, external_id_field=None, time_delay = None, max_workers = None, bulk_api_version = 1, return_results = True, retry_attempts = 0, partition_key = None, collections_threshold = 2000, collections_max_workers = 4):
         """
         Description: upload dataframe of records to salesforce with dml operation.
                      This function includes pre processing of dataframe to json for
@@ -308,9 +1623,35 @@ class Salesforce_Utilities:
         fallout_file        - string, path to store the fallout output file
         batch_size          - set batch size of records to upload in a single attempt
         external_id_field   - string, name of the external id field
-        time_delay          - add a time delay between batch record uploads in case custom code needs to process between batches.
-
-        Return:             - array of length 2, the fallout and success results separated in two DataFrames
+        time_delay          - add a time delay between batch record uploads in case custom code needs to process between batches,
+                              or "auto" to pace the batches and the batches in flight by the api budget left in the org,
+                              see Salesforce_Rate_Limiter, a Salesforce_Rate_Limiter instance can also be passed
+        max_workers         - int, number of batches to keep in flight at once on a thread pool, default to 1 (serial),
+                              or collections_max_workers for uploads sent through the sObject Collections api.
+                              a max_workers passed in is always kept, results are put back in input order
+                              so the output files still match the source rows
+        bulk_api_version    - int, 1 to upload batches of JSON records through Bulk API v1,
+                              2 to upload the dataframe as CSV through a single Bulk API 2.0 job,
+                              batch_size, time_delay and max_workers are only used with Bulk API v1
+        return_results      - bool, keep every result to return the passing and fallout DataFrames,
+                              set to False to only write each batch to the success and fallout files as it returns
+                              so memory use does not grow with the number of records
+        retry_attempts      - int, number of times to resubmit fallout with transient errors such as UNABLE_TO_LOCK_ROW,
+                              see retry_salesforce_fallout, default to 0 (no retry), only used with Bulk API v1
+        partition_key       - string, parent key column, I.E. AccountId, to keep every child of a parent in the same batch,
+                              see partition_dataframe_by_parent_key, makes max_workers > 1 safe from parent row lock contention.
+                              the results are returned in batch order instead of the order of the dataframe,
+                              uploads with a partition_key always use the bulk api so a parent is never split across requests
+        collections_threshold   - int, dataframes with up to this many rows skip the bulk api and are sent through the
+                                  sObject Collections api in batches of 200 records, set to 0 to always use the bulk api.
+                                  insert/update/upsert/delete only, the passing and fallout dataframes are returned the same way
+        collections_max_workers - int, number of sObject Collections requests to keep in flight at once when max_workers is not passed
+
+        Return:             - array of length 2, the fallout and success results separated in two DataFrames,
+                              or the number of passing and fallout records when return_results = False
+
+        The success and fallout files are appended to as each batch returns,
+        they can be read while the upload runs and keep every batch already loaded if the upload stops part way.
         """
         # try except block
         try:
@@ -320,68 +1661,118 @@ class Salesforce_Utilities:
             passing = 0
             # keep track of how many records unsuccessfully loaded
             fallout = 0
-            # array of the results to return at end of function
-            results_list = []
+            # array of the passing results to return at end of function
+            passing_list = []
+            # array of the fallout results to return or retry at end of function
+            fallout_list = []
+            # upload through Bulk API 2.0 instead of batching records through Bulk API v1
+            if bulk_api_version == 2 and len(df) != 0:
+                # upload the dataframe as csv and return the passing and fallout dataframes
+                return self.upload_dataframe_to_salesforce_bulk2(sf, df, object_name, dml_operation, success_file, fallout_file, external_id_field, return_results = return_results)
             # quick check that we're not attempting to load 0 records, quit out immediately if so
             if len(df) != 0:
-                # reformat the records from a pandas dataframe to JSON in salesforce compatibale format
-                records_to_commit = self.reformat_dataframe_to_salesforce_records(df)
                 # record how many records are going to be attempted
-                records_count = len(records_to_commit)
+                records_count = len(df)
+                # small uploads skip the bulk job and use the sObject Collections api,
+                # partitioned batches can hold more than the 200 records a collections request accepts so they stay on the bulk api
+                if records_count <= collections_threshold and partition_key == None and dml_operation in ["insert", "update", "upsert", "delete"]:
+                    # log to console status
+                    log.info(f"[{str(records_count)} records, using sObject Collections instead of a bulk job]")
+                    # submit through the collections api
+                    api = "collections"
+                    # the collections api accepts up to 200 records per request
+                    batch_size = min(batch_size, 200)
+                    # keep several requests in flight at once unless the caller picked the number of workers
+                    if max_workers == None:
+                        # use the collections default
+                        max_workers = collections_max_workers
+                # submit through the bulk api
+                else:
+                    # submit each batch as a bulk job
+                    api = "bulk"
+                # submit the batches one at a time unless the caller picked the number of workers
+                if max_workers == None:
+                    # serial by default
+                    max_workers = 1
+                # replace the fixed time delay with pacing by the api budget left
+                if time_delay == "auto":
+                    # read the limits of the api used for the batches
+                    time_delay = Salesforce_Rate_Limiter(sf, api)
                 # log to console status
                 log.info(f"[Starting DML.. records to {dml_operation} : {str(records_count)} ]")
-                # perform as many loops as necessary to upload the records on the selected batch size.
-                for index in range(0, records_count, batch_size):
-                    # if there are more records to upload after the current batch upload a full batch,
-                    if index+batch_size <= records_count:
-                        # select a full batch of data
-                        data = records_to_commit[index:index+batch_size]
-                    # the number of records remaining to upload is less than the selected batch size
-                    else:
-                        # adjust how many records to select in the last batch to upload
-                        data = records_to_commit[index:records_count]
-                    # perform insert/upsert/update/delete operations using the submit_dml function
-                    results = sf.bulk.submit_dml(object_name, dml_operation, data, external_id_field)
-                    # convert the list of json records that was attempted into a pandas dataframe
-                    data_df = pd.DataFrame(data)
+                # keep every child of a parent record in the same batch
+                if partition_key != None:
+                    # split the dataframe into balanced batches grouped by the parent key
+                    batches = (batch_df.reset_index(drop = True) for batch_df in self.partition_dataframe_by_parent_key(df, partition_key, batch_size))
+                # split the dataframe in order
+                else:
+                    # split the dataframe into batches of the selected batch size, the last batch holds the remaining records
+                    # each batch is only converted to salesforce records when it is submitted
+                    batches = (df.iloc[index:index+batch_size].reset_index(drop = True) for index in range(0, records_count, batch_size))
+                # loop through the results of each batch in the order the batches were created
+                for batch_number, (data_df, results) in enumerate(self.submit_dml_batches_to_salesforce(sf, object_name, dml_operation, batches, external_id_field, time_delay, max_workers, api)):
                     # convert the results from the upload into a pandas dataframe
                     # add a suffix to all new columns created from the upload
                     results_df = pd.DataFrame(results).add_prefix("RESULTS_")
-                    # split the results into two group, passing and fallout
-                    # passing is success = true
-                    passing = passing + len(results_df[results_df["RESULTS_success"] == True])
-                    # fallout is success = false
-                    fallout = fallout + len(results_df[results_df["RESULTS_success"] == False])
-                    # concat the results of this batch to the dataframe the holds the results of the entire df being batch
+                    # concat the results of this batch to the records attempted in the batch
                     results_df = pd.concat([data_df, results_df.reindex(data_df.index)], axis = 1)
-                    # upload the resulting dataframe into an array
-                    results_list.append(results_df)
+                    # split the results into two group, passing and fallout
+                    # passing : "RESULTS_success" == True
+                    batch_passing_df = results_df[results_df["RESULTS_success"] == True]
+                    # fallout : "RESULTS_success" == False
+                    batch_fallout_df = results_df[results_df["RESULTS_success"] == False]
+                    # update count of passing records
+                    passing = passing + len(batch_passing_df)
+                    # update count of fallout records
+                    fallout = fallout + len(batch_fallout_df)
+                    # if a success file pathway is added, append the passing records as soon as the batch returns
+                    if success_file != None:
+                        # create the file and write the header with the first batch only
+                        self.append_dataframe_to_csv(batch_passing_df, success_file, write_header = batch_number == 0)
+                    # if a fallout file pathway is added, append the fallout records as soon as the batch returns
+                    if fallout_file != None:
+                        # create the file and write the header with the first batch only
+                        self.append_dataframe_to_csv(batch_fallout_df, fallout_file, write_header = batch_number == 0)
+                    # keep the passing results of the batch to return at the end of the function
+                    if return_results:
+                        # upload the passing dataframe into an array
+                        passing_list.append(batch_passing_df)
+                    # keep the fallout results of the batch to return or retry at the end of the function
+                    if return_results or retry_attempts > 0:
+                        # upload the fallout dataframe into an array
+                        fallout_list.append(batch_fallout_df)
                     # log the status of how many records passed vs failed
                     log.info(f"[{str(passing)}/{str(records_count)} rows of data - {dml_operation} rows of data loaded, failed rows: {str(fallout)}...]")
-                    # if using a time delay between uploads, extecute the delay here at the end of the loop
-                    if time_delay != None:
-                        # time delay
-                        time.sleep(time_delay)
-                # full list of every record attempted
-                results_df = pd.concat(results_list)
-                # split the results int passing and fallout again
-                # passing : "RESULTS_success" == True
-                passing_df = results_df[results_df["RESULTS_success"] == True]
                 # fallout : "RESULTS_success" == False
-                fallout_df = results_df[results_df["RESULTS_success"] == False]
-
-                # if a success file pathway is added, write the success datafame to the csv
-                if success_file != None:
-                    # open the file location in write mode
-                    with open(success_file, mode = "w", newline = "\n") as file:
-                        # write the dataframe to the file using a commma as the delimeter
-                        passing_df.to_csv(file, sep = ",", index = False)
-                # if a fallout file pathway is added, write the fallout datafame to the csv
-                if fallout_file != None:
-                    # open the file location in write mode
-                    with open(fallout_file, mode = "w", newline = "\n") as file:
-                        # write the dataframe to the file using a commma as the delimeter
-                        fallout_df.to_csv(file, sep = ",", index = False)
+                fallout_df = pd.concat(fallout_list) if fallout_list else None
+                # resubmit fallout with transient errors
+                if retry_attempts > 0 and fallout > 0:
+                    # retry the fallout and split it into records that passed on retry and the final fallout
+                    retried_passing_df, fallout_df = self.retry_salesforce_fallout(sf, fallout_df, object_name, dml_operation, external_id_field = external_id_field, batch_size = batch_size, max_attempts = retry_attempts, time_delay = time_delay, max_workers = max_workers, api = api)
+                    # update count of passing records
+                    passing = passing + len(retried_passing_df)
+                    # update count of fallout records
+                    fallout = len(fallout_df)
+                    # if a success file pathway is added, append the records that passed on retry
+                    if success_file != None:
+                        # the header was already written with the first batch
+                        self.append_dataframe_to_csv(retried_passing_df, success_file, write_header = False)
+                    # if a fallout file pathway is added, replace the fallout with the final fallout after retry
+                    if fallout_file != None:
+                        # rewrite the file with the header
+                        self.append_dataframe_to_csv(fallout_df, fallout_file, write_header = True)
+                    # keep the records that passed on retry to return
+                    if return_results:
+                        # upload the passing dataframe into an array
+                        passing_list.append(retried_passing_df)
+                    # log the status of how many records passed vs failed after retry
+                    log.info(f"[{str(passing)}/{str(records_count)} rows of data - {dml_operation} rows of data loaded after retry, failed rows: {str(fallout)}...]")
+                # results are only written to the output files, return the counts
+                if not return_results:
+                    # return the number of passing and fallout records
+                    return [passing, fallout]
+                # passing : "RESULTS_success" == True
+                passing_df = pd.concat(passing_list)
                 # return both the passing and fallout dataframes
                 return [passing_df, fallout_df]
             # no records are in the dataframe, nothing to process
@@ -393,6 +1784,363 @@ class Salesforce_Utilities:
             # log error when uploading dataframe of records to salesforce
             log.exception(f"[Error uploading dataframe of records to salesforce...{e}]")
 
+    def compute_salesforce_update_delta(self, current_df, target_df, key_field = "Id", fields = None):
+        """
+        Description: compare the target values of records with the current salesforce snapshot and keep
+                     only the fields that changed, rows without any change are dropped.
+                     Every field is compared as a whole column, the rows are then grouped by the set of
+                     fields that changed so each group can be sent as an update with the same fields.
+                     Values are compared as is, load the snapshot with matching types,
+                     I.E. with load_query_into_typed_dataframe, to avoid false changes such as 5 != "5".
+                     Rows of the target not found in the snapshot send every field.
+        Parameters:
+
+        current_df  - pandas.DataFrame, the current salesforce records, I.E. queried before the update
+        target_df   - pandas.DataFrame, the records with the values to update to
+        key_field   - string, column matching the rows of both dataframes, default to Id
+        fields      - list of string, fields to compare, default to every column of the target in the snapshot
+
+        Return:     - list of pandas.DataFrame, one per set of changed fields, largest first,
+                      each with the key column and only the fields that changed
+        """
+        # try except block
+        try:
+            # default to every column of the target found in the snapshot
+            if fields == None:
+                # every column except the key
+                fields = [column for column in target_df.columns if column != key_field and column in current_df.columns]
+            # line up the current values next to the target values by key
+            merged_df = target_df[[key_field] + fields].merge(current_df[[key_field] + fields], on = key_field, how = "left", suffixes = ("", "__current"), indicator = True)
+            # rows missing from the snapshot send every field
+            missing = (merged_df["_merge"] == "left_only").to_numpy()
+            # whole column comparison of every field, nulls on both sides are not a change
+            changes_df = pd.DataFrame({field : ~((merged_df[field] == merged_df[field + "__current"]).fillna(False).astype(bool) | (merged_df[field].isna() & merged_df[field + "__current"].isna())) | missing for field in fields}, index = merged_df.index)
+            # keep only the rows with at least one change
+            changes_df = changes_df[changes_df.any(axis = 1)]
+            # log to console status of the delta
+            log.info(f"[{str(len(changes_df))}/{str(len(target_df))} records changed]")
+            # nothing changed, nothing to update
+            if len(changes_df) == 0:
+                return []
+            # group the rows by the set of fields that changed and build the update
+            # of each group with the key and the changed fields only
+            deltas = [merged_df.loc[group_df.index, [key_field] + [field for field, changed in zip(fields, signature) if changed]].reset_index(drop = True) for signature, group_df in changes_df.groupby(fields, sort = False)]
+            # largest groups first
+            return sorted(deltas, key = len, reverse = True)
+        # exception block - error computing salesforce update delta
+        except Exception as e:
+            # log error when computing salesforce update delta
+            log.exception(f"[Error computing salesforce update delta...{e}]")
+
+    def upload_dataframe_delta_to_salesforce(self, sf, current_df, target_df, object_name, success_file = None, fallout_file = None, key_field = "Id", fields = None, batch_size = 1000, time_delay = None, max_workers = None, retry_attempts = 0, return_results = True):
+        """
+        Description: update salesforce records sending only the fields that changed,
+                     see compute_salesforce_update_delta. Rows without changes are skipped and
+                     each set of changed fields is uploaded as its own update with upload_dataframe_to_salesforce,
+                     so the batches carry fewer fields, fewer records and fire fewer triggers in the org.
+        Parameters:
+
+        sf                  - simple_salesforce instance used to log in and perform operations again Salesforce
+        current_df          - pandas.DataFrame, the current salesforce records, I.E. queried before the update
+        target_df           - pandas.DataFrame, the records with the values to update to
+        object_name         - Salesforce object to perform operations against, both standard and custom objects
+        success_file        - string, path to store the success output file
+        fallout_file        - string, path to store the fallout output file
+        key_field           - string, the salesforce Id column matching the rows of both dataframes, default to Id
+        fields              - list of string, fields to compare, default to every column of the target in the snapshot
+        batch_size          - set batch size of records to upload in a single attempt
+        time_delay          - add a time delay between batch record uploads
+        max_workers         - int, number of batches to keep in flight at once, default to the upload_dataframe_to_salesforce default
+        retry_attempts      - int, number of times to resubmit fallout with transient errors
+        return_results      - bool, keep every result to return the passing and fallout DataFrames,
+                              set to False to only write the results of each set of changed fields to the files
+                              so memory use does not grow with the number of sets
+
+        Return:             - array of length 2, the success and fallout results separated in two DataFrames,
+                              unchanged fields are empty in the output,
+                              or the number of passing and fallout records when return_results = False
+
+        The success and fallout files are created with every compared field and appended to as each set
+        of changed fields returns, they keep every set already updated if the update stops part way.
+        """
+        # try except block
+        try:
+            # default to every column of the target found in the snapshot, the same fields compared by the delta
+            if fields == None:
+                # every column except the key
+                fields = [column for column in target_df.columns if column != key_field and column in current_df.columns]
+            # columns of the success file, every compared field so each set of changed fields lines up
+            passing_columns = [key_field] + list(fields) + ["RESULTS_success", "RESULTS_created", "RESULTS_id", "RESULTS_errors"]
+            # columns of the fallout file, the retry adds the error code and the reason a retry failed
+            fallout_columns = passing_columns + (["RESULTS_error_code", "RESULTS_retry_error"] if retry_attempts > 0 else [])
+            # if a success file pathway is added, create the file with the header
+            if success_file != None:
+                # write the header only
+                self.append_dataframe_to_csv(pd.DataFrame(columns = passing_columns), success_file, write_header = True)
+            # if a fallout file pathway is added, create the file with the header
+            if fallout_file != None:
+                # write the header only
+                self.append_dataframe_to_csv(pd.DataFrame(columns = fallout_columns), fallout_file, write_header = True)
+            # keep  track of how many records successfully updated
+            passing = 0
+            # keep track of how many records unsuccessfully updated
+            fallout = 0
+            # passing results of every group
+            passing_list = []
+            # fallout results of every group
+            fallout_list = []
+            # loop through each set of changed fields
+            for delta_df in self.compute_salesforce_update_delta(current_df, target_df, key_field, fields):
+                # log to console status of the group
+                log.info(f"[Updating {str(len(delta_df))} records with fields: {', '.join(delta_df.columns[1:])}]")
+                # update the group, its results are written to the output files as soon as it returns
+                results = self.upload_dataframe_to_salesforce(sf, delta_df, object_name, "update", batch_size = batch_size, time_delay = time_delay, max_workers = max_workers, retry_attempts = retry_attempts)
+                # the upload itself failed, nothing to keep
+                if results == None:
+                    continue
+                # passing results of the group with every compared field
+                group_passing_df = results[0].reindex(columns = passing_columns)
+                # fallout results of the group with every compared field
+                group_fallout_df = results[1].reindex(columns = fallout_columns) if results[1] is not None else pd.DataFrame(columns = fallout_columns)
+                # update count of passing records
+                passing = passing + len(group_passing_df)
+                # update count of fallout records
+                fallout = fallout + len(group_fallout_df)
+                # if a success file pathway is added, append the passing records of the group
+                if success_file != None:
+                    # the header was written before the first group
+                    self.append_dataframe_to_csv(group_passing_df, success_file, write_header = False)
+                # if a fallout file pathway is added, append the fallout records of the group
+                if fallout_file != None:
+                    # the header was written before the first group
+                    self.append_dataframe_to_csv(group_fallout_df, fallout_file, write_header = False)
+                # keep the results of the group to return at the end of the function
+                if return_results:
+                    # keep the passing results of the group
+                    passing_list.append(group_passing_df)
+                    # keep the fallout results of the group
+                    fallout_list.append(group_fallout_df)
+            # log the status of how many records passed vs failed
+            log.info(f"[{str(passing)} records updated, failed records: {str(fallout)}]")
+            # results are only written to the output files, return the counts
+            if not return_results:
+                # return the number of passing and fallout records
+                return [passing, fallout]
+            # every passing record of every group
+            passing_df = pd.concat(passing_list, ignore_index = True) if passing_list else pd.DataFrame(columns = passing_columns)
+            # every fallout record of every group
+            fallout_df = pd.concat(fallout_list, ignore_index = True) if fallout_list else None
+            # return both the passing and fallout dataframes
+            return [passing_df, fallout_df]
+        # exception block - error uploading dataframe delta to salesforce
+        except Exception as e:
+            # log error when uploading dataframe delta to salesforce
+            log.exception(f"[Error uploading dataframe delta to salesforce...{e}]")
+
+    def get_salesforce_error_code(self, errors):
+        """
+        Description: get the status code of the first error of a salesforce result,
+                     I.E. UNABLE_TO_LOCK_ROW, FIELD_CUSTOM_VALIDATION_EXCEPTION
+        Parameters:
+
+        errors      - list of error dicts from a bulk result, or the same errors read back as a string from a csv file
+
+        Return:     - string, error status code, None when there is no error
+        """
+        # errors as returned by the bulk api, a list of dicts with a statusCode
+        if isinstance(errors, list):
+            # return the status code of the first error
+            return errors[0].get("statusCode") if len(errors) > 0 and isinstance(errors[0], dict) else None
+        # errors read back from a csv file or a Bulk 2.0 error message, find the first upper case code
+        if isinstance(errors, str):
+            # search for a status code in the string
+            match = re.search(r"\b[A-Z][A-Z0-9]*(?:_[A-Z0-9]+)+\b", errors)
+            # return the status code found
+            return match.group(0) if match else None
+        # no errors
+        return None
+
+    def retry_salesforce_fallout(self, sf, fallout_df, object_name, dml_operation, external_id_field = None, batch_size = 1000, max_attempts = 3, retryable_error_codes = None, time_delay = None, max_workers = 1, api = "bulk", bulk_api_version = 1):
+        """
+        Description: resubmit fallout records that failed with transient errors.
+                     The fallout is classified by error code, only records with retryable errors are resubmitted,
+                     permanent errors such as validation failures are never retried.
+                     The batch size is halved on every attempt, and batches are sent one at a time
+                     when lock contention (UNABLE_TO_LOCK_ROW) is detected.
+        Parameters:
+
+        sf                      - simple_salesforce instance used to log in and perform operations again Salesforce
+        fallout_df              - pandas.DataFrame, fallout returned by upload_dataframe_to_salesforce
+        object_name             - Salesforce object to perform operations against, both standard and custom objects
+        dml_operation           - insert/upsert/update/delete
+        external_id_field       - string, name of the external id field
+        batch_size              - batch size of the original upload, halved before every attempt
+        max_attempts            - int, max number of times to resubmit the retryable records
+        retryable_error_codes   - list of strings, error codes to retry, default to RETRYABLE_ERROR_CODES
+        time_delay              - add a time delay between batch record uploads
+        max_workers             - int, number of batches to keep in flight when there is no lock contention
+        api                     - string, "bulk" or "collections", the api of the original upload, every retry uses the same api
+                                  whatever the number of records left to retry
+        bulk_api_version        - int, 1 or 2, the Bulk API version of the original upload, every retry uses the same version
+
+        Return:                 - array of length 2, the records that passed on retry and the final fallout
+                                  with a RESULTS_error_code column, records whose resubmission failed
+                                  also hold the reason in a RESULTS_retry_error column
+        """
+        # try except block
+        try:
+            # use the default retryable error codes if none are given
+            if retryable_error_codes == None:
+                # transient errors that can pass when resubmitted
+                retryable_error_codes = self.RETRYABLE_ERROR_CODES
+            # records that passed on retry
+            passing_list = []
+            # records with permanent errors, never retried
+            fallout_list = []
+            # classify each fallout record by its error code
+            classified_df = fallout_df.assign(RESULTS_error_code = fallout_df["RESULTS_errors"].map(self.get_salesforce_error_code))
+            # check which records have a transient error
+            is_retryable = classified_df["RESULTS_error_code"].isin(retryable_error_codes)
+            # records with a transient error to retry
+            retry_df = classified_df[is_retryable]
+            # keep the records with permanent errors as fallout
+            fallout_list.append(classified_df[~is_retryable])
+            # log to console status of classifying the fallout
+            log.info(f"[Fallout records to retry: {str(len(retry_df))}, permanent errors: {str(len(fallout_list[0]))}]")
+            # loop through each attempt
+            for attempt in range(1, max_attempts + 1):
+                # nothing left to retry
+                if len(retry_df) == 0:
+                    break
+                # halve the batch size on every attempt
+                batch_size = max(1, batch_size // 2)
+                # lock contention, send the batches one at a time so they do not lock the same parent records
+                lock_contention = (retry_df["RESULTS_error_code"] == "UNABLE_TO_LOCK_ROW").any()
+                # log to console status of the retry
+                log.info(f"[Retry attempt {str(attempt)}/{str(max_attempts)}: {str(len(retry_df))} records, batch size: {str(batch_size)}, serial: {str(lock_contention)}]")
+                # drop the results of the previous attempt before resubmitting the records
+                records_df = retry_df.drop(columns = [column for column in retry_df.columns if column.startswith("RESULTS_")]).reset_index(drop = True)
+                # resubmit the records, the collections threshold keeps the api of the original upload
+                results = self.upload_dataframe_to_salesforce(sf, records_df, object_name, dml_operation, batch_size = batch_size, external_id_field = external_id_field, time_delay = time_delay, max_workers = 1 if lock_contention else max_workers, collections_threshold = len(records_df) if api == "collections" else 0, bulk_api_version = bulk_api_version)
+                # the upload itself failed, keep the records as fallout with the reason they were not retried
+                if results == None:
+                    # log to console status of the retry
+                    log.error(f"[Retry attempt {str(attempt)}/{str(max_attempts)} failed to upload, {str(len(retry_df))} records kept as fallout]")
+                    # record the failed attempt on each record
+                    retry_df = retry_df.assign(RESULTS_retry_error = f"retry attempt {str(attempt)} failed to upload, see log")
+                    break
+                # split the results of the attempt
+                attempt_passing_df, attempt_fallout_df = results
+                # keep the records that passed
+                passing_list.append(attempt_passing_df)
+                # classify the records that failed again
+                classified_df = attempt_fallout_df.assign(RESULTS_error_code = attempt_fallout_df["RESULTS_errors"].map(self.get_salesforce_error_code))
+                # check which records have a transient error
+                is_retryable = classified_df["RESULTS_error_code"].isin(retryable_error_codes)
+                # records with a transient error to retry on the next attempt
+                retry_df = classified_df[is_retryable]
+                # keep the records with permanent errors as fallout
+                fallout_list.append(classified_df[~is_retryable])
+            # records still failing after every attempt are fallout
+            fallout_list.append(retry_df)
+            # return the records that passed on retry and the final fallout
+            return [pd.concat(passing_list) if passing_list else fallout_df.iloc[0:0], pd.concat(fallout_list)]
+        # exception block - error retrying salesforce fallout
+        except Exception as e:
+            # log error when retrying salesforce fallout
+            log.exception(f"[Error retrying salesforce fallout...{e}]")
+
+    def append_dataframe_to_csv(self, df, file_path, write_header = False):
+        """
+        Description: append the rows of a dataframe to a csv file,
+                     used to write results to the success and fallout files a batch at a time
+        Parameters:
+
+        df              - pandas.DataFrame, rows to append
+        file_path       - string, path of the csv file
+        write_header    - bool, create the file and write the header before the rows,
+                          set to True for the first batch written to the file
+
+        Return:         - None, rows appended to the file
+        """
+        # try except block
+        try:
+            # open the file in write mode for the first batch, append mode for the rest
+            with open(file_path, mode = "w" if write_header else "a", newline = "\n") as file:
+                # write the dataframe to the file using a commma as the delimeter
+                df.to_csv(file, sep = ",", index = False, header = write_header)
+        # exception block - error appending dataframe to csv file
+        except Exception as e:
+            # log error when appending dataframe to csv file
+            log.exception(f"[Error appending dataframe to csv file: {file_path}...{e}]")
+
+    def stream_dml_results_to_csv(self, sf, df, object_name, dml_operation, success_file = None, fallout_file = None, batch_size = 10000, external_id_field = None):
+        """
+        Description: upload a dataframe of records to salesforce in a single bulk job and stream the results.
+                     The results of each bulk batch are written straight to the success and fallout files
+                     as soon as the batch finishes, so the results of the whole job are never held in memory at once.
+        Parameters:
+
+        sf                  - simple_salesforce instance used to log in and perform operations again Salesforce
+        df                  - pandas data frame of the data to be uploaded
+        object_name         - Salesforce object to perform operations against, both standard and custom objects
+        dml_operation       - insert/upsert/update/delete
+        success_file        - string, path to store the success output file
+        fallout_file        - string, path to store the fallout output file
+        batch_size          - number of records in each bulk batch, default to 10,000, or 'auto'
+        external_id_field   - string, name of the external id field
+
+        Return:             - array of length 2, the number of passing and fallout records
+        """
+        # try except block
+        try:
+            # keep  track of how many records successfully loaded
+            passing = 0
+            # keep track of how many records unsuccessfully loaded
+            fallout = 0
+            # position in the dataframe of the first record of the next batch
+            offset = 0
+            # reformat the records from a pandas dataframe to JSON in salesforce compatibale format
+            records_to_commit = self.reformat_dataframe_to_salesforce_records(df)
+            # log to console status
+            log.info(f"[Starting DML.. records to {dml_operation} : {str(len(records_to_commit))} ]")
+            # submit every record in a single job and get a generator of the results of each batch
+            batch_results = sf.bulk.submit_dml(object_name, dml_operation, records_to_commit, external_id_field, batch_size, lazy_operation = True)
+            # loop through the results of each batch in batch order as soon as it finishes
+            for batch_number, results in enumerate(batch_results):
+                # convert the results of the batch into a dataframe with a prefix on each column
+                results_df = pd.DataFrame(results).add_prefix("RESULTS_")
+                # rows of the dataframe uploaded in this batch, aligned with the results
+                data_df = df.iloc[offset:offset + len(results_df)].reset_index(drop = True)
+                # move the offset to the first record of the next batch
+                offset = offset + len(results_df)
+                # concat the records of the batch with their results
+                results_df = pd.concat([data_df, results_df], axis = 1)
+                # passing is success = true
+                passing_df = results_df[results_df["RESULTS_success"] == True]
+                # fallout is success = false
+                fallout_df = results_df[results_df["RESULTS_success"] == False]
+                # update count of passing records
+                passing = passing + len(passing_df)
+                # update count of fallout records
+                fallout = fallout + len(fallout_df)
+                # if a success file pathway is added, append the passing records of the batch
+                if success_file != None:
+                    # write the header with the first batch only
+                    self.append_dataframe_to_csv(passing_df, success_file, write_header = batch_number == 0)
+                # if a fallout file pathway is added, append the fallout records of the batch
+                if fallout_file != None:
+                    # write the header with the first batch only
+                    self.append_dataframe_to_csv(fallout_df, fallout_file, write_header = batch_number == 0)
+                # log the status of how many records passed vs failed
+                log.info(f"[{str(passing)}/{str(len(records_to_commit))} rows of data - {dml_operation} rows of data loaded, failed rows: {str(fallout)}...]")
+            # return the number of passing and fallout records
+            return [passing, fallout]
+        # exception block - error streaming dml results to csv
+        except Exception as e:
+            # log error when streaming dml results to csv
+            log.exception(f"[Error streaming dml results of records uploaded to salesforce to csv...{e}]")
+
 class MSSQL_Utilities:
     def __init__(self):
         """Constructor Parameters:
@@ -445,7 +2193,7 @@ class MSSQL_Utilities:
             # log error when
             log.exception(f"[Error Logging into MSSQL DB...{e}]")
 
-    def query_mssql_return_dataframe(self, query, cursor):
+    def query_mssql_return_dataframe(self, query, cursor, chunk_size = None):
         """
         Description: query a MSSQL server with a logged in cursor and
         process results into a pandas dataframe the return the dataframe.
@@ -453,11 +2201,23 @@ class MSSQL_Utilities:
 
         query           - query string
         cursor          - cursor creating upon login to execute the query
+        chunk_size      - int, read the rows in chunks with query_mssql_in_chunks and concatenate
+                          the chunks once at the end instead of building a dict per row, default to None (fetchall)
 
-        Return:         - pandas.DataFrame
+        Return:         - pandas.DataFrame, None when the query fails, a partly read query is never returned
         """
         # try except block
         try:
+            # read the rows in chunks without per row dicts
+            if chunk_size != None:
+                # read every chunk of the query
+                chunks = list(self.query_mssql_in_chunks(query, cursor, chunk_size))
+                # concatenate the chunks once, keep the columns when the query returned no rows
+                results_df = pd.concat(chunks, ignore_index = True) if chunks else pd.DataFrame(columns = [column[0] for column in cursor.description])
+                # log to console status of querying records
+                log.info(f"[loaded {str(len(results_df))} records into DataFrame]")
+                # return the results of the query as a pandas data frame
+                return results_df
             # log to console beginning query against mssql database
             log.info("[Querying MS SQL DB...]")
             # execute query with cursor
@@ -481,7 +2241,160 @@ class MSSQL_Utilities:
             # log error when querying mssql table
             log.exception(f"[Error querying mssql table...{e}]")
 
-    def insert_dataframe_into_mssql_table(self, connection, cursor, df, table_name, column_types = [], cols = "", use_all_columns_in_df = True):
+    def query_mssql_in_chunks(self, query, cursor, chunk_size = 100000):
+        """
+        Description: stream a query from a MSSQL server, reading the rows with fetchmany
+                     and yielding a DataFrame per chunk. Each chunk's columns are built
+                     directly from the rows, no dict is built per row, and only a single
+                     chunk of rows is held in memory at a time.
+        Parameters:
+
+        query           - query string
+        cursor          - cursor creating upon login to execute the query
+        chunk_size      - int, number of rows read and yielded in each DataFrame chunk, default to 100,000
+
+        Return:         - generator of pandas.DataFrame - DataFrame chunks of the query results
+        """
+        # try except block
+        try:
+            # log to console beginning query against mssql database
+            log.info(f"[Querying MS SQL DB in chunks of {str(chunk_size)}...]")
+            # execute query with cursor
+            cursor = cursor.execute(query)
+            # convert the results into a list of columns
+            columns = [column[0] for column in cursor.description]
+            # keep track of rows read
+            records_loaded = 0
+            # loop through each chunk of rows
+            while True:
+                # read the next chunk of rows
+                rows = cursor.fetchmany(chunk_size)
+                # no rows left to read
+                if not rows:
+                    break
+                # transpose the rows into columns and build the chunk from the columns
+                chunk_df = pd.DataFrame(dict(zip(columns, zip(*rows))))
+                # update count of rows read
+                records_loaded = records_loaded + len(chunk_df)
+                # log to console status of querying records
+                log.info(f"[loaded {str(records_loaded)} records into DataFrame chunks]")
+                # return the chunk to the caller
+                yield chunk_df
+        # exception block - error querying mssql table in chunks
+        except Exception as e:
+            # log error when querying mssql table in chunks
+            log.exception(f"[Error querying mssql table in chunks...{e}]")
+            # raise the error so a failed stream is never mistaken for a complete one
+            raise
+
+    def query_mssql_return_columnar_dataframe(self, query, cursor, chunk_size = 100000, decimal_as_float = False):
+        """
+        Description: query a MSSQL server and build the dataframe column by column into typed numpy arrays.
+                     The type code of each column in cursor.description picks the array type, every chunk read
+                     with fetchmany is filled into preallocated arrays with a mask for the NULLs,
+                     and the chunks are joined once at the end. Integer, bit, float and datetime columns
+                     are never stored as python objects in the dataframe and skip the type inference of pandas.
+                     int -> Int64, bit -> boolean, float -> float64, datetime/date -> datetime64, everything else is left as is
+        Parameters:
+
+        query               - query string
+        cursor              - cursor creating upon login to execute the query
+        chunk_size          - int, number of rows read with each fetchmany, default to 100,000
+        decimal_as_float    - bool, store decimal and money columns as float64 instead of Decimal objects,
+                              faster and smaller but loses precision past 15 digits, default to False
+
+        Return:             - pandas.DataFrame
+        """
+        # try except block
+        try:
+            # log to console beginning query against mssql database
+            log.info(f"[Querying MS SQL DB into columnar arrays in chunks of {str(chunk_size)}...]")
+            # execute query with cursor
+            cursor = cursor.execute(query)
+            # numpy type of each python type code returned by pyodbc, the fill value stands in for NULLs
+            array_types = {int : (np.int64, 0), bool : (np.bool_, False), float : (np.float64, np.nan), datetime : ("datetime64[us]", np.datetime64("NaT")), date : ("datetime64[us]", np.datetime64("NaT"))}
+            # store decimals as floats when selected
+            if decimal_as_float:
+                # decimal and money columns
+                array_types[Decimal] = (np.float64, np.nan)
+            # name and numpy type of each column, None for columns kept as objects
+            columns = [(column[0], array_types.get(column[1])) for column in cursor.description]
+            # arrays of each chunk per column
+            chunks = [[] for column in columns]
+            # null masks of each chunk per column
+            masks = [[] for column in columns]
+            # keep track of rows read
+            records_loaded = 0
+            # loop through each chunk of rows
+            while True:
+                # read the next chunk of rows
+                rows = cursor.fetchmany(chunk_size)
+                # no rows left to read
+                if not rows:
+                    break
+                # number of rows in the chunk
+                row_count = len(rows)
+                # loop through the values of each column of the chunk
+                for index, values in enumerate(zip(*rows)):
+                    # numpy type of the column
+                    array_type = columns[index][1]
+                    # column kept as python objects
+                    if array_type == None:
+                        # preallocate the object array and fill it with the values
+                        array = np.empty(row_count, dtype = object)
+                        # copy the values into the array
+                        array[:] = values
+                        # keep the chunk, no mask needed
+                        chunks[index].append(array)
+                        continue
+                    # quick check if the chunk of the column has any NULLs
+                    has_nulls = None in values
+                    # mask of the NULL values of the column, only built value by value when there are NULLs
+                    mask = np.fromiter((value is None for value in values), dtype = np.bool_, count = row_count) if has_nulls else np.zeros(row_count, dtype = np.bool_)
+                    # fill value standing in for NULLs
+                    fill_value = array_type[1]
+                    # fill the preallocated typed array, replace NULLs only when the column has any
+                    array = np.fromiter((fill_value if value is None else value for value in values) if has_nulls else values, dtype = array_type[0], count = row_count)
+                    # keep the chunk
+                    chunks[index].append(array)
+                    # keep the mask of the chunk
+                    masks[index].append(mask)
+                # update count of rows read
+                records_loaded = records_loaded + row_count
+                # log to console status of querying records
+                log.info(f"[loaded {str(records_loaded)} records into columnar arrays]")
+            # build each column from its chunks
+            data = {}
+            # loop through each column
+            for index, (name, array_type) in enumerate(columns):
+                # join the chunks once, empty when the query returned no rows
+                array = np.concatenate(chunks[index]) if chunks[index] else np.empty(0, dtype = object if array_type == None else array_type[0])
+                # join the masks of the chunks
+                mask = np.concatenate(masks[index]) if masks[index] else np.zeros(len(array), dtype = np.bool_)
+                # integers keep the NULLs with a nullable integer array
+                if array_type != None and array_type[0] == np.int64:
+                    # integer array with the NULL mask
+                    data[name] = pd.arrays.IntegerArray(array, mask)
+                # bits keep the NULLs with a nullable boolean array
+                elif array_type != None and array_type[0] == np.bool_:
+                    # boolean array with the NULL mask
+                    data[name] = pd.arrays.BooleanArray(array, mask)
+                # floats and datetimes hold the NULLs as NaN and NaT, objects hold them as None
+                else:
+                    # use the array as is
+                    data[name] = array
+            # build the dataframe from the typed columns
+            results_df = pd.DataFrame(data)
+            # log to console status of querying records
+            log.info(f"[loaded {str(len(results_df))} records into DataFrame]")
+            # return the results of the query as a pandas data frame
+            return results_df
+        # exception block - error querying mssql table into columnar arrays
+        except Exception as e:
+            # log error when querying mssql table into columnar arrays
+            log.exception(f"[Error querying mssql table into columnar arrays...{e}]")
+
+    def insert_dataframe_into_mssql_table(self, connection, cursor, df, table_name, column_types = [], cols = "", use_all_columns_in_df = True, chunk_size = None):
         """Description: insert a dataframe into a mssql table, the whole dataframe will be inserted
         Parameters:
 
@@ -492,6 +2405,8 @@ class MSSQL_Utilities:
         column_types            - set column datatypes before insert, auto datatype setting can sometimes be inaccurate
         cols                    - list of columns, currently experimental
         use_all_columns_in_df   - boolean to use all columns or not, currently experimental
+        chunk_size              - int, insert with typed parameters and a commit every chunk_size rows,
+                                  see insert_dataframe_into_mssql_table_in_chunks, default to None (a single executemany and commit)
 
         return:                 - none - insert records into mssql # DEBUG:
         Current issue 8/11/25:
@@ -502,6 +2417,16 @@ class MSSQL_Utilities:
         """
         # try except block
         try:
+            # insert in chunks with typed parameters
+            if chunk_size != None:
+                # convert the column types, then insert the chunks
+                for index, col in enumerate(df.columns[:len(column_types)]):
+                    # convert the column to the selected type
+                    df[col] = df[col].astype({"int" : int, "str" : str, "float" : float, "bool" : bool}.get(column_types[index], df[col].dtype))
+                # insert every chunk and commit each one, into the selected table columns when not using the dataframe columns
+                self.insert_dataframe_into_mssql_table_in_chunks(connection, cursor, df, table_name, chunk_size, cols = None if use_all_columns_in_df else cols)
+                # nothing left to insert
+                return
             # if the df column list matches the table, use all columns
             if use_all_columns_in_df:
                 # generate a list of all columns
@@ -543,7 +2468,232 @@ class MSSQL_Utilities:
             # log error when inserting dataframe into mssql table
             log.exception(f"[Error inserting dataframe into mssql table: {table_name}...{e}]")
 
-    def update_rows_in_mssql_table(self, connection, cursor, df, table_name, columns_to_update, where_column_name):
+    def bulk_insert_dataframe_into_mssql_table(self, connection, cursor, df, table_name, staging_dir, server_staging_dir = None, batch_size = 100000, max_errors = 10, keep_files = False):
+        """
+        Description: bulk load a dataframe into a mssql table with BULK INSERT, like MSSQL_SQL_Scripts/bulk_insert_csv_into_table.sql.
+                     The dataframe is written to a csv file in a staging folder shared with the server, then loaded
+                     with TABLOCK in batches of batch_size rows, minimally logged under the simple or bulk-logged recovery model.
+                     Rows the server rejects are written to an error file in the staging folder and returned.
+                     The columns of the dataframe must be in the same order as the columns of the table,
+                     blank values are loaded as NULLs. Requires SQL Server 2017 or later for FORMAT = 'CSV'.
+
+        sql_bulk_insert = example:
+        BULK INSERT <table_name>
+        FROM '<server_staging_dir>\\<table_name>_<id>.csv'
+        WITH (FORMAT = 'CSV', FIRSTROW = 2, FIELDQUOTE = '"', FIELDTERMINATOR = ',', ROWTERMINATOR = '0x0a',
+              CODEPAGE = '65001', KEEPNULLS, BATCHSIZE = 100000, MAXERRORS = 10, ERRORFILE = '<error file>', TABLOCK)
+
+        Parameters:
+
+        connection          - MSSQL database connection
+        cursor              - MSSQL connection cursor
+        df                  - dataframe to insert
+        table_name          - table name of database to insert records into
+        staging_dir         - string, folder the csv file is written to, must be readable by the sql server service
+        server_staging_dir  - string, the same folder as seen by the sql server, I.E. a UNC path, default to staging_dir
+        batch_size          - int, number of rows committed in each batch of the bulk insert, default to 100,000
+        max_errors          - int, number of rejected rows allowed before the bulk insert is cancelled, default to 10
+        keep_files          - bool, keep the csv file after the load, the error files are always kept when rows are rejected
+
+        Return:             - array of length 3, the number of rows inserted, the number of rows rejected
+                              and a list of the error messages of the server. The number of rows inserted is None
+                              when the load is cancelled, the batches committed before the error stay in the table
+                              and their count is not returned by the server, check the table before loading again
+        """
+        # try except block
+        try:
+            # default the server path to the local path of the staging folder
+            if server_staging_dir == None:
+                # same folder for both
+                server_staging_dir = staging_dir
+            # table name safe to use in a file name
+            safe_table_name = re.sub(r"[^\w]", "_", table_name)
+            # unique name of the files of this load, the server will not overwrite an existing error file
+            file_name = f"{safe_table_name}_{datetime.now().strftime('%Y%m%d%H%M%S')}_{os.getpid()}_{threading.get_ident()}"
+            # local path of the csv file
+            data_file = os.path.join(staging_dir, file_name + ".csv")
+            # local path of the rejected rows
+            error_file = os.path.join(staging_dir, file_name + "_errors.csv")
+            # path separator of the server, windows unless the server path only uses forward slashes
+            separator = "/" if "/" in server_staging_dir and "\\" not in server_staging_dir else "\\"
+            # server path of the files of this load without the extension
+            server_file = server_staging_dir.rstrip("\\/") + separator + file_name
+            # server path of the csv file, quotes escaped for the sql string
+            server_data_file = (server_file + ".csv").replace("'", "''")
+            # server path of the rejected rows, quotes escaped for the sql string
+            server_error_file = (server_file + "_errors.csv").replace("'", "''")
+            # log to console, writing the staging file
+            log.info(f"[Writing {str(len(df))} rows to staging file {data_file}...]")
+            # format datetimes with milliseconds, accepted by both datetime and datetime2 columns
+            df = df.assign(**{col : df[col].dt.strftime("%Y-%m-%d %H:%M:%S.%f").str[:-3] for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col].dtype)})
+            # write the dataframe as utf-8 csv, missing values as blanks
+            df.to_csv(data_file, sep = ",", index = False, header = True, na_rep = "", lineterminator = "\n", encoding = "utf-8")
+            # build the bulk insert statement
+            sql_bulk_insert = f"""BULK INSERT {table_name} FROM '{server_data_file}' WITH (FORMAT = 'CSV', FIRSTROW = 2, FIELDQUOTE = '"', FIELDTERMINATOR = ',', ROWTERMINATOR = '0x0a', CODEPAGE = '65001', KEEPNULLS, BATCHSIZE = {int(batch_size)}, MAXERRORS = {int(max_errors)}, ERRORFILE = '{server_error_file}', TABLOCK)"""
+            # error messages of the server
+            errors = []
+            # log to console, loading the staging file
+            log.info(f"[Bulk inserting staging file into {table_name}...]")
+            # try except block - the load is cancelled when more rows than max_errors are rejected
+            try:
+                # execute the bulk insert
+                cursor.execute(sql_bulk_insert)
+                # number of rows inserted
+                rows_inserted = cursor.rowcount
+                # commit the bulk insert
+                connection.commit()
+            # exception block - bulk insert cancelled
+            except Exception as e:
+                # batches committed before the error stay in the table, the count is unknown
+                rows_inserted = None
+                # keep the error of the server
+                errors.append(str(e))
+                # roll back the batch that failed
+                connection.rollback()
+            # rows rejected by the server, one row per line of the error file
+            rows_rejected = 0
+            # read the rejected rows
+            if os.path.exists(error_file):
+                # open the error file
+                with open(error_file, "r", encoding = "utf-8", errors = "replace") as file:
+                    # count the rejected rows
+                    rows_rejected = sum(1 for line in file)
+            # the server writes the reason of each rejected row next to the error file
+            if os.path.exists(error_file + ".Error.Txt"):
+                # open the error reasons
+                with open(error_file + ".Error.Txt", "r", encoding = "utf-8", errors = "replace") as file:
+                    # keep every error message
+                    errors.extend(line.strip() for line in file if line.strip())
+            # remove the staging file once loaded
+            if not keep_files:
+                # delete the csv file
+                os.remove(data_file)
+            # the load was cancelled part way
+            if rows_inserted == None:
+                # log to console, the batches committed before the error are not counted
+                log.warning(f"[Bulk insert into {table_name} cancelled, an unknown number of the {str(len(df))} rows were committed, rejected rows: {str(rows_rejected)}]")
+            # the load finished
+            else:
+                # log to console, rows inserted and rejected
+                log.info(f"[Bulk inserted {str(rows_inserted)}/{str(len(df))} rows into {table_name}, rejected rows: {str(rows_rejected)}]")
+            # return the counts and the errors
+            return [rows_inserted, rows_rejected, errors]
+        # exception block - error bulk inserting dataframe into mssql table
+        except Exception as e:
+            # log error when bulk inserting dataframe into mssql table
+            log.exception(f"[Error bulk inserting dataframe into mssql table: {table_name}...{e}]")
+
+    def get_mssql_input_sizes(self, df):
+        """
+        Description: derive the pyodbc parameter type and size of each column of a dataframe for cursor.setinputsizes,
+                     so fast_executemany allocates buffers sized to the data instead of nvarchar(max) sized buffers.
+                     int -> bigint, float -> float, bool -> bit, datetime -> datetime2,
+                     everything else -> nvarchar sized to the longest value, nvarchar(max) past 4,000 characters
+        Parameters:
+
+        df          - pandas.DataFrame, the rows to insert
+
+        Return:     - list of tuples - (sql type, column size, decimal digits) of each column
+        """
+        # try except block
+        try:
+            # parameter sizes of every column
+            input_sizes = []
+            # loop through each column
+            for col in df.columns:
+                # dtype of the column
+                dtype = df[col].dtype
+                # boolean columns, checked before integers since booleans are also integers
+                if pd.api.types.is_bool_dtype(dtype):
+                    # bit
+                    input_sizes.append((pyodbc.SQL_BIT, 0, 0))
+                # integer columns
+                elif pd.api.types.is_integer_dtype(dtype):
+                    # bigint
+                    input_sizes.append((pyodbc.SQL_BIGINT, 0, 0))
+                # float columns
+                elif pd.api.types.is_float_dtype(dtype):
+                    # float
+                    input_sizes.append((pyodbc.SQL_DOUBLE, 0, 0))
+                # datetime columns
+                elif pd.api.types.is_datetime64_any_dtype(dtype):
+                    # datetime2 with 7 digits of fractional seconds
+                    input_sizes.append((pyodbc.SQL_TYPE_TIMESTAMP, 27, 7))
+                # string and object columns
+                else:
+                    # longest value of the column, at least 1 character
+                    max_length = max(1, int(df[col].dropna().astype(str).str.len().max() if df[col].notna().any() else 1))
+                    # nvarchar sized to the longest value, 0 sends nvarchar(max) past the 4,000 character limit
+                    input_sizes.append((pyodbc.SQL_WVARCHAR, max_length if max_length <= 4000 else 0, 0))
+            # return the parameter sizes
+            return input_sizes
+        # exception block - error getting mssql input sizes
+        except Exception as e:
+            # log error when getting mssql input sizes
+            log.exception(f"[Error getting mssql input sizes...{e}]")
+
+    def insert_dataframe_into_mssql_table_in_chunks(self, connection, cursor, df, table_name, chunk_size = 10000, cols = None):
+        """
+        Description: insert a dataframe into a mssql table with fast_executemany in chunks of rows,
+                     committing after each chunk. The parameter types and sizes are set once from the dtypes
+                     and string lengths of the dataframe with get_mssql_input_sizes, so only one chunk of rows
+                     is converted and buffered at a time and the transaction log is freed after every commit.
+                     Chunks already committed stay in the table if a later chunk fails.
+        Parameters:
+
+        connection              - MSSQL database connection
+        cursor                  - MSSQL connection cursor
+        df                      - dataframe to insert, every column is inserted
+        table_name              - table name of database to insert records into
+        chunk_size              - int, number of rows inserted and committed at a time, default to 10,000
+        cols                    - string of comma separated or list of table columns the dataframe columns are inserted into,
+                                  in the order of the dataframe columns, default to the dataframe column names
+
+        Return:                 - int - number of rows inserted
+        """
+        # try except block
+        try:
+            # default to the dataframe columns, join a list of table columns
+            cols = ",".join(df.columns if cols == None else [cols] if isinstance(cols, str) else cols)
+            # every dataframe column needs a table column to be inserted into
+            if len(cols.split(",")) != len(df.columns):
+                raise ValueError(f"cols has {str(len(cols.split(',')))} columns but the dataframe has {str(len(df.columns))}")
+            # generate a list of "?" to be replaced by the actual values of the dataframe
+            params = ",".join("?" * len(df.columns))
+            # generate the sql commit with the dataframe
+            sql = f"INSERT INTO {table_name} ({cols}) VALUES ({params})"
+            # set the bulk insert for pyodbc cursor.fast_executemany = True
+            cursor.fast_executemany = True
+            # parameter types and sizes of every column, set once for every chunk
+            input_sizes = self.get_mssql_input_sizes(df)
+            # keep track of rows inserted
+            records_loaded = 0
+            # loop through each chunk of rows
+            for index in range(0, len(df), chunk_size):
+                # rows of the chunk as objects, NaN to None to insert NULLs
+                chunk_df = df.iloc[index:index + chunk_size].astype(object)
+                # replace the missing values with None
+                chunk_df = chunk_df.where(chunk_df.notna(), None)
+                # convert the rows in the chunk into tuples
+                data = [tuple(x) for x in chunk_df.values]
+                # size the parameter buffers to the data
+                cursor.setinputsizes(input_sizes)
+                # execute insert of the chunk
+                cursor.executemany(sql, data)
+                # commit the chunk
+                connection.commit()
+                # update count of rows inserted
+                records_loaded = records_loaded + len(data)
+                # log to console status of inserting records
+                log.info(f"[inserted {str(records_loaded)}/{str(len(df))} rows into {table_name}]")
+            # return the number of rows inserted
+            return records_loaded
+        # exception block - error inserting dataframe into mssql table in chunks
+        except Exception as e:
+            # log error when inserting dataframe into mssql table in chunks
+            log.exception(f"[Error inserting dataframe into mssql table in chunks: {table_name}...{e}]")
+
+    def update_rows_in_mssql_table(self, connection, cursor, df, table_name, columns_to_update, where_column_name, set_based = False):
         """
         Description: update multiples columns in MSSQL table from a dataframe on a where in list condition
 
@@ -565,11 +2715,18 @@ class MSSQL_Utilities:
         df                       - dataframe
         columns_to_update        - column names in MSSQL table to update
         where_column_name        - single field, condition for update
+        set_based                - bool, load the rows into a temp table and update the table with a single statement,
+                                   see update_rows_in_mssql_table_from_staging_table, default to False (one UPDATE per row)
 
-        Return:                  - None - update records
+        Return:                  - None - update records, int - number of rows updated when set_based,
+                                   None when the set based update fails
         """
         # try except block
         try:
+            # update every row with a single statement from a staging table
+            if set_based:
+                # load the rows into a temp table and update the table from it, return the number of rows updated
+                return self.update_rows_in_mssql_table_from_staging_table(connection, cursor, df, table_name, columns_to_update, where_column_name)
             # log to console, creating update statement to upload
             log.info("[Creating Update SQL statement...]")
             # create beginning of update, add table name
@@ -608,6 +2765,112 @@ class MSSQL_Utilities:
             # log error when attempting to update rows in mssql table
             log.exception(f"[Error updating rows in mssql table...{e}]")
 
+    def update_rows_in_mssql_table_from_staging_table(self, connection, cursor, df, table_name, columns_to_update, where_column_name, staging_table_name = "#update_staging", use_merge = False):
+        """
+        Description: set based update of a MSSQL table from a dataframe. The rows are bulk loaded with fast_executemany
+                     into a session temp table created with the same column types as the table, then the whole table
+                     is updated with a single UPDATE ... FROM join, or MERGE, on the where column instead of one UPDATE per row.
+                     The values of where_column_name must be unique in the dataframe.
+                     On failure the transaction is rolled back, the staging table is dropped so the update can be
+                     retried on the same connection, and the error is raised to the caller.
+
+        sql_update =  example:
+        UPDATE target
+        SET target.email = staging.email, target.status = staging.status
+        FROM users AS target
+        INNER JOIN #update_staging AS staging ON target.user_id = staging.user_id
+
+        Parameters:
+
+        connection               - MSSQL login connection
+        cursor                   - MSSQL connection cursor
+        df                       - dataframe
+        table_name               - table in MSSQL to update
+        columns_to_update        - column names in MSSQL table to update
+        where_column_name        - single field, condition for update
+        staging_table_name       - string, name of the session temp table, default to #update_staging
+        use_merge                - bool, update with a MERGE statement instead of UPDATE ... FROM
+
+        Return:                  - int - number of rows updated in the table, raises the error when the update fails
+        """
+        # try except block
+        try:
+            # columns loaded into the staging table, the where column first
+            df_col_list = [where_column_name] + list(columns_to_update)
+            # comma delimited columns of the staging table
+            col_list = ", ".join(df_col_list)
+            # log to console, creating the staging table
+            log.info(f"[Creating staging table {staging_table_name}...]")
+            # drop the staging table left from an earlier update in this session
+            cursor.execute(f"IF OBJECT_ID('tempdb..{staging_table_name}') IS NOT NULL DROP TABLE {staging_table_name}")
+            # create the empty staging table with the same column types as the table,
+            # the union stops an identity where column from carrying its identity property to the staging table
+            cursor.execute(f"SELECT TOP 0 {col_list} INTO {staging_table_name} FROM {table_name} UNION ALL SELECT TOP 0 {col_list} FROM {table_name}")
+            # parameter types and sizes of every staging column, taken before the rows are converted to objects
+            input_sizes = self.get_mssql_input_sizes(df[df_col_list])
+            # trim dataframe based on columns to include in update, NaN to None to load NULLs
+            df_to_update = df[df_col_list].astype(object)
+            # replace the missing values with None
+            df_to_update = df_to_update.where(df_to_update.notna(), None)
+            # convert the rows in the dataframe into a list of tuples
+            data = [tuple(x) for x in df_to_update.values]
+            # log to console, loading the staging table
+            log.info(f"[Loading {str(len(data))} rows into staging table...]")
+            # set the bulk insert for pyodbc cursor.fast_executemany = True
+            cursor.fast_executemany = True
+            # size the parameter buffers to the data
+            cursor.setinputsizes(input_sizes)
+            # bulk load the rows into the staging table
+            cursor.executemany(f"INSERT INTO {staging_table_name} ({col_list}) VALUES ({', '.join('?' * len(df_col_list))})", data)
+            # index the where column for the join
+            cursor.execute(f"CREATE CLUSTERED INDEX IX_staging_key ON {staging_table_name} ({where_column_name})")
+            # assignment of every column to update from the staging table
+            set_list = ", ".join(f"target.{col} = staging.{col}" for col in columns_to_update)
+            # update the table with a single merge statement
+            if use_merge:
+                # merge the staging rows into the matching rows of the table
+                sql_update = f"MERGE {table_name} AS target USING {staging_table_name} AS staging ON target.{where_column_name} = staging.{where_column_name} WHEN MATCHED THEN UPDATE SET {set_list};"
+            # update the table with a single join
+            else:
+                # update the rows of the table joined to the staging rows
+                sql_update = f"UPDATE target SET {set_list} FROM {table_name} AS target INNER JOIN {staging_table_name} AS staging ON target.{where_column_name} = staging.{where_column_name}"
+            # log to console, updating the table
+            log.info(f"[Updating {table_name} from staging table...]")
+            # execute the update of every row
+            cursor.execute(sql_update)
+            # number of rows updated
+            rows_updated = cursor.rowcount
+            # commit the sql statement
+            connection.commit()
+            # log to console, rows updated
+            log.info(f"[Updated {str(rows_updated)}/{str(len(data))} rows in {table_name}]")
+            # return the number of rows updated
+            return rows_updated
+        # exception block - error updating rows in mssql table from staging table
+        except Exception as e:
+            # log error when attempting to update rows in mssql table from staging table
+            log.exception(f"[Error updating rows in mssql table from staging table...{e}]")
+            # try except block
+            try:
+                # undo the partial load and update
+                connection.rollback()
+            # exception block - error rolling back
+            except Exception as rollback_error:
+                # log error when rolling back, the original error is still raised
+                log.exception(f"[Error rolling back update from staging table...{rollback_error}]")
+            # raise the error so a failed update is not mistaken for an update of 0 rows
+            raise
+        # always drop the staging table, a staging table left in the session fails the next SELECT TOP 0 ... INTO
+        finally:
+            # try except block
+            try:
+                # drop the staging table when it exists
+                cursor.execute(f"IF OBJECT_ID('tempdb..{staging_table_name}') IS NOT NULL DROP TABLE {staging_table_name}")
+            # exception block - error dropping staging table
+            except Exception as drop_error:
+                # log error when dropping the staging table
+                log.exception(f"[Error dropping staging table {staging_table_name}...{drop_error}]")
+
     def delete_rows_in_mssql_table(self, connection, cursor, table_name, column_name, record_list):
         """Description: generate a query string to delete records from a MSSQL table
            Parameters:
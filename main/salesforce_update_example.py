@@ -71,7 +71,7 @@ sf = SF_Utils.login_to_salesForce(username, password, token)
 # match queried accounts with CSV accounts based on join of accountNumber field
 # query string to select records from salesforce
 # before uploading with a delete  DML operation
-account_query = "SELECT Id, Account_Number_External_ID__c FROM Account WHERE Unit_test_migrated_record__c = true"
+account_query = "SELECT Id, Account_Number_External_ID__c, Type, Industry FROM Account WHERE Unit_test_migrated_record__c = true"
 
 # query salesforce and return the accounts to be deleted
 account_query_results = SF_Utils.query_salesforce(sf, account_query)
@@ -95,5 +95,5 @@ accounts_to_update_df.loc[:,"Industry"] = "Government"
 # only updating the two fields Type and Industry
 accounts_to_update_df = accounts_to_update_df[["Id", "Type", "Industry", ]]
 
-# upload the records to salesforce
-SF_Utils.upload_dataframe_to_salesforce(sf, accounts_to_update_df, 'Account', 'update', success_file, fallout_file)
+# upload only the fields that changed, accounts already set to Prospect and Government are skipped
+SF_Utils.upload_dataframe_delta_to_salesforce(sf, accounts_df, accounts_to_update_df, 'Account', success_file, fallout_file)
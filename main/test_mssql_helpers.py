@@ -0,0 +1,155 @@
+"""
+Author: Timothy Kornish
+CreatedDate: October - 18 - 2026
+Description: offline test class for the chunked query, insert and staging table update helpers of MSSQL_Utilities in custom_db_utilities.py
+
+ - The connection and cursor are replaced by local stand-ins that record
+   the statements executed, no credentials or server are needed.
+"""
+
+import unittest
+import pandas as pd
+from custom_db_utilities import MSSQL_Utilities
+
+class CursorStandIn:
+    """ Minimal stand-in for a pyodbc cursor returning fixed rows with fetchmany
+
+    fail_on_fetch - number of the fetchmany call that raises, None to never raise
+    """
+
+    def __init__(self, rows, columns, fail_on_fetch = None):
+        self.rows = list(rows)
+        self.description = [(column,) for column in columns]
+        self.fail_on_fetch = fail_on_fetch
+        self.fetches = 0
+        self.statements = []
+
+    def execute(self, sql, *params):
+        self.statements.append(sql)
+        return self
+
+    def fetchmany(self, size):
+        self.fetches += 1
+        if self.fetches == self.fail_on_fetch:
+            raise RuntimeError("connection lost")
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+class TestQueryMSSQLInChunks(unittest.TestCase):
+    """ Tests for MSSQL_Utilities.query_mssql_in_chunks and query_mssql_return_dataframe"""
+
+    def setUp(self):
+        # create instance of mssql utility class
+        self.mssql_utils = MSSQL_Utilities()
+        # three rows read two at a time
+        self.rows = [(1, "a"), (2, "b"), (3, "c")]
+
+    def test_chunks_yielded_with_columns(self):
+        chunks = list(self.mssql_utils.query_mssql_in_chunks("SELECT", CursorStandIn(self.rows, ["Id", "Name"]), chunk_size = 2))
+        self.assertEqual([len(chunk_df) for chunk_df in chunks], [2, 1])
+        self.assertEqual(list(chunks[0].columns), ["Id", "Name"])
+
+    def test_failure_mid_stream_raises(self):
+        chunks = self.mssql_utils.query_mssql_in_chunks("SELECT", CursorStandIn(self.rows, ["Id", "Name"], fail_on_fetch = 2), chunk_size = 2)
+        # the first chunk is read before the failure
+        self.assertEqual(len(next(chunks)), 2)
+        with self.assertRaises(RuntimeError):
+            next(chunks)
+
+    def test_failure_mid_stream_never_returns_partial_dataframe(self):
+        df = self.mssql_utils.query_mssql_return_dataframe("SELECT", CursorStandIn(self.rows, ["Id", "Name"], fail_on_fetch = 2), chunk_size = 2)
+        self.assertIsNone(df)
+
+    def test_chunked_dataframe_matches_fetchall(self):
+        df = self.mssql_utils.query_mssql_return_dataframe("SELECT", CursorStandIn(self.rows, ["Id", "Name"]), chunk_size = 2)
+        self.assertEqual(df.to_dict("list"), {"Id" : [1, 2, 3], "Name" : ["a", "b", "c"]})
+
+class UpdateCursorStandIn:
+    """ Minimal stand-in for a pyodbc cursor recording the statements of a staging table update
+
+    fail_on - text of the statement that raises, None to never raise
+    """
+
+    def __init__(self, rowcount = 0, fail_on = None):
+        self.rowcount = rowcount
+        self.fail_on = fail_on
+        self.statements = []
+        self.input_sizes = None
+        self.data = None
+
+    def execute(self, sql, *params):
+        self.statements.append(sql)
+        if self.fail_on != None and self.fail_on in sql:
+            raise RuntimeError("update failed")
+        return self
+
+    def setinputsizes(self, input_sizes):
+        self.input_sizes = input_sizes
+
+    def executemany(self, sql, data):
+        self.statements.append(sql)
+        self.data = data
+        if self.fail_on != None and self.fail_on in sql:
+            raise RuntimeError("load failed")
+
+class ConnectionStandIn:
+    """ Minimal stand-in for a pyodbc connection counting commits and rollbacks"""
+
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+class TestUpdateRowsFromStagingTable(unittest.TestCase):
+    """ Tests for MSSQL_Utilities.update_rows_in_mssql_table_from_staging_table"""
+
+    def setUp(self):
+        # create instance of mssql utility class
+        self.mssql_utils = MSSQL_Utilities()
+        # two rows to update, one with a missing value
+        self.df = pd.DataFrame({"Id" : [1, 2], "Email" : ["a@x.com", None]})
+        # connection stand-in
+        self.connection = ConnectionStandIn()
+
+    def update(self, cursor):
+        return self.mssql_utils.update_rows_in_mssql_table_from_staging_table(self.connection, cursor, self.df, "users", ["Email"], "Id")
+
+    def test_update_returns_rows_updated_and_drops_staging_table(self):
+        cursor = UpdateCursorStandIn(rowcount = 2)
+        self.assertEqual(self.update(cursor), 2)
+        self.assertEqual(self.connection.commits, 1)
+        self.assertEqual(self.connection.rollbacks, 0)
+        self.assertIn("DROP TABLE #update_staging", cursor.statements[-1])
+        self.assertEqual(cursor.data, [(1, "a@x.com"), (2, None)])
+
+    def test_load_uses_typed_input_sizes(self):
+        cursor = UpdateCursorStandIn(rowcount = 2)
+        self.update(cursor)
+        self.assertEqual(cursor.input_sizes, self.mssql_utils.get_mssql_input_sizes(self.df[["Id", "Email"]]))
+
+    def test_update_of_zero_rows_returns_zero(self):
+        self.assertEqual(self.update(UpdateCursorStandIn(rowcount = 0)), 0)
+
+    def test_failed_update_rolls_back_drops_staging_table_and_raises(self):
+        for fail_on in ["INSERT INTO", "UPDATE target"]:
+            with self.subTest(fail_on = fail_on):
+                self.connection = ConnectionStandIn()
+                cursor = UpdateCursorStandIn(fail_on = fail_on)
+                with self.assertRaises(RuntimeError):
+                    self.update(cursor)
+                self.assertEqual(self.connection.rollbacks, 1)
+                self.assertEqual(self.connection.commits, 0)
+                self.assertIn("DROP TABLE #update_staging", cursor.statements[-1])
+
+    def test_failed_set_based_update_returns_none(self):
+        cursor = UpdateCursorStandIn(fail_on = "UPDATE target")
+        self.assertIsNone(self.mssql_utils.update_rows_in_mssql_table(self.connection, cursor, self.df, "users", ["Email"], "Id", set_based = True))
+        self.assertEqual(self.mssql_utils.update_rows_in_mssql_table(self.connection, UpdateCursorStandIn(rowcount = 0), self.df, "users", ["Email"], "Id", set_based = True), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,436 @@
+"""
+Author: Timothy Kornish
+CreatedDate: October - 18 - 2026
+Description: offline test class for the record helpers of Salesforce_Utilities in custom_db_utilities.py
+
+ - The helpers under test only transform query results and dataframes,
+   no credentials or org are needed, unlike test_custom_db_utilities.py.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+import urllib.parse
+from pandas.testing import assert_frame_equal
+import pandas as pd
+import numpy as np
+from custom_db_utilities import Salesforce_Utilities
+
+class TestFlattenSalesforceRecords(unittest.TestCase):
+    """ Tests for Salesforce_Utilities.flatten_salesforce_records"""
+
+    def setUp(self):
+        # create instance of salesforce utility class
+        self.sf_utils = Salesforce_Utilities()
+
+    def record(self, **fields):
+        # build a query record with the attributes salesforce adds to every record and lookup
+        return {"attributes" : {"type" : "Contact", "url" : "/services/data/v59.0/sobjects/Contact/x"}, **fields}
+
+    def test_nested_lookups_are_dotted_columns(self):
+        records = [self.record(Id = "1", Owner = self.record(Name = "Ann", Manager = self.record(Name = "Bob")))]
+        df = self.sf_utils.flatten_salesforce_records(records)
+        assert_frame_equal(df, pd.DataFrame({"Id" : ["1"], "Owner.Name" : ["Ann"], "Owner.Manager.Name" : ["Bob"]}))
+
+    def test_lookup_null_on_some_rows(self):
+        records = [self.record(Id = "1", Owner = None), self.record(Id = "2", Owner = self.record(Name = "Ann"))]
+        df = self.sf_utils.flatten_salesforce_records(records)
+        # the empty lookup does not leave an Owner column next to Owner.Name
+        assert_frame_equal(df, pd.DataFrame({"Id" : ["1", "2"], "Owner.Name" : [None, "Ann"]}))
+
+    def test_lookup_null_on_all_rows(self):
+        records = [self.record(Id = "1", Owner = None), self.record(Id = "2", Owner = None)]
+        df = self.sf_utils.flatten_salesforce_records(records)
+        # without a single populated row the fields of the lookup are unknown, the lookup is kept as one column
+        self.assertEqual(list(df.columns), ["Id", "Owner"])
+        self.assertTrue(df["Owner"].isna().all())
+
+    def test_lookup_null_on_all_rows_of_a_chunk_is_aligned(self):
+        df = self.sf_utils.flatten_salesforce_records([self.record(Id = "1", Owner = None)])
+        df = self.sf_utils.align_salesforce_chunk_columns(df, ["Id", "Owner.Name"])
+        assert_frame_equal(df, pd.DataFrame({"Id" : ["1"], "Owner.Name" : [np.nan]}), check_dtype = False)
+
+    def test_attributes_are_removed(self):
+        df = self.sf_utils.flatten_salesforce_records([self.record(Id = "1", Account = self.record(Name = "Acme"))])
+        self.assertFalse([column for column in df.columns if "attributes" in column])
+
+    def test_fields_missing_from_some_rows_are_none(self):
+        df = self.sf_utils.flatten_salesforce_records([self.record(Id = "1"), self.record(Id = "2", Name = "Ann")])
+        assert_frame_equal(df, pd.DataFrame({"Id" : ["1", "2"], "Name" : [None, "Ann"]}))
+
+    def test_empty_records(self):
+        df = self.sf_utils.flatten_salesforce_records([])
+        self.assertEqual(len(df), 0)
+        self.assertEqual(len(df.columns), 0)
+
+class TestSOQLHelpers(unittest.TestCase):
+    """ Tests for the SOQL helpers of Salesforce_Utilities"""
+
+    def setUp(self):
+        # create instance of salesforce utility class
+        self.sf_utils = Salesforce_Utilities()
+
+    def test_select_columns_read_from_query(self):
+        columns = self.sf_utils.get_soql_select_columns("SELECT Id, Owner.Name FROM Account WHERE (Type = 'A' OR Type = 'B')")
+        self.assertEqual(columns, ["Id", "Owner.Name"])
+
+    def test_select_columns_not_read_for_subqueries_and_functions(self):
+        self.assertIsNone(self.sf_utils.get_soql_select_columns("SELECT Id, (SELECT Id FROM Contacts) FROM Account"))
+        self.assertIsNone(self.sf_utils.get_soql_select_columns("SELECT COUNT(Id) FROM Account"))
+
+    def test_in_clause_queries_bracket_where_condition(self):
+        queries = self.sf_utils.build_salesforce_in_clause_queries("SELECT Id FROM Account WHERE Type = 'A' OR Type = 'B'", "Ext__c", ["a", "b", "a", None])
+        self.assertEqual(queries, ["SELECT Id FROM Account WHERE (Type = 'A' OR Type = 'B') AND Ext__c IN ('a','b')"])
+
+    def test_in_clause_queries_split_by_encoded_length(self):
+        queries = self.sf_utils.build_salesforce_in_clause_queries("SELECT Id FROM Account", "Ext__c", [f"key {index}" for index in range(2000)], max_query_length = 2000)
+        self.assertGreater(len(queries), 1)
+        self.assertTrue(all(len(urllib.parse.quote_plus(query)) <= 2000 for query in queries))
+
+    def test_subquery_with_more_pages_and_no_instance_raises(self):
+        records = [{"attributes" : {}, "Id" : "1", "Contacts" : {"totalSize" : 300, "done" : False, "nextRecordsUrl" : "/next", "records" : []}}]
+        with self.assertRaises(ValueError):
+            self.sf_utils.normalize_salesforce_subqueries(records)
+
+class TestPartitionDataframeByParentKey(unittest.TestCase):
+    """ Tests for Salesforce_Utilities.partition_dataframe_by_parent_key"""
+
+    def setUp(self):
+        # create instance of salesforce utility class
+        self.sf_utils = Salesforce_Utilities()
+        # contacts of parents with 6, 4, 3, 2 and 1 rows, plus 5 rows with no parent
+        parents = ["A"] * 6 + ["B"] * 4 + ["C"] * 3 + ["D"] * 2 + ["E"] + [None] * 5
+        self.df = pd.DataFrame({"Name" : [f"contact {index}" for index in range(len(parents))], "AccountId" : parents})
+
+    def test_parent_never_spans_two_batches(self):
+        batches = self.sf_utils.partition_dataframe_by_parent_key(self.df, "AccountId", batch_size = 8)
+        # batch of each parent key
+        parent_batches = {}
+        for index, batch_df in enumerate(batches):
+            for parent in batch_df["AccountId"].dropna().unique():
+                self.assertNotIn(parent, parent_batches)
+                parent_batches[parent] = index
+        self.assertEqual(set(parent_batches), {"A", "B", "C", "D", "E"})
+
+    def test_every_row_placed_once(self):
+        batches = self.sf_utils.partition_dataframe_by_parent_key(self.df, "AccountId", batch_size = 8)
+        self.assertEqual(sorted(pd.concat(batches)["Name"]), sorted(self.df["Name"]))
+
+    def test_oversized_group_gets_its_own_batch(self):
+        batches = self.sf_utils.partition_dataframe_by_parent_key(self.df, "AccountId", batch_size = 4)
+        # the 6 rows of A stay whole in a batch without any other parent
+        batch_df = next(batch_df for batch_df in batches if "A" in set(batch_df["AccountId"]))
+        self.assertEqual(list(batch_df["AccountId"]), ["A"] * 6)
+        # every other batch respects the batch size
+        self.assertTrue(all(len(batch_df) <= 4 for batch_df in batches if "A" not in set(batch_df["AccountId"])))
+
+    def test_unkeyed_rows_fill_remaining_room(self):
+        batches = self.sf_utils.partition_dataframe_by_parent_key(self.df, "AccountId", batch_size = 7)
+        # the 16 keyed rows leave room in three batches of 7, the 5 unkeyed rows fill it without opening a new batch
+        self.assertEqual([len(batch_df) for batch_df in batches], [7, 7, 7])
+        # every batch still holds keyed rows
+        self.assertTrue(all(batch_df["AccountId"].notna().any() for batch_df in batches))
+
+    def test_unkeyed_rows_open_new_batches_when_no_room_left(self):
+        batches = self.sf_utils.partition_dataframe_by_parent_key(self.df, "AccountId", batch_size = 8)
+        # 16 keyed rows fill two batches of 8, the 5 unkeyed rows go into a new batch
+        self.assertEqual([len(batch_df) for batch_df in batches], [8, 8, 5])
+        self.assertTrue(batches[-1]["AccountId"].isna().all())
+
+class TestFormatDateToSalesforceDate(unittest.TestCase):
+    """ Tests for Salesforce_Utilities.format_date_to_salesforce_date"""
+
+    def setUp(self):
+        # create instance of salesforce utility class
+        self.sf_utils = Salesforce_Utilities()
+        # repeated dates, blanks and missing values
+        self.df = pd.DataFrame({
+            "Birthdate" : ["01/31/2024", "", None, "01/31/2024", np.nan, "12/01/2023"],
+            "Start_Date__c" : ["2024-02-01", "2024-02-01", "2024-03-15", None, "2024-02-01", "2024-03-15"],
+        })
+
+    def test_single_column_formatted(self):
+        df = self.sf_utils.format_date_to_salesforce_date(self.df, "Birthdate")
+        self.assertEqual(df["Birthdate"].tolist(), ["2024-01-31", None, None, "2024-01-31", None, "2023-12-01"])
+
+    def test_list_of_columns_with_format(self):
+        df = self.sf_utils.format_date_to_salesforce_date(self.df, ["Start_Date__c"], format = "%Y-%m-%d")
+        self.assertEqual(df["Start_Date__c"].tolist(), ["2024-02-01", "2024-02-01", "2024-03-15", None, "2024-02-01", "2024-03-15"])
+
+    def test_other_columns_unchanged(self):
+        start_dates = self.df["Start_Date__c"].copy()
+        df = self.sf_utils.format_date_to_salesforce_date(self.df, "Birthdate")
+        pd.testing.assert_series_equal(df["Start_Date__c"], start_dates)
+
+    def test_matches_row_by_row_formatting(self):
+        df = self.sf_utils.format_date_to_salesforce_date(self.df.copy(), "Birthdate")
+        # the original row by row conversion, blanks and missing values become None
+        expected = [None if pd.isna(value) or value == "" else pd.to_datetime(value, format = "%m/%d/%Y").strftime("%Y-%m-%d") for value in self.df["Birthdate"]]
+        self.assertEqual(df["Birthdate"].tolist(), expected)
+
+class TestComputeSalesforceUpdateDelta(unittest.TestCase):
+    """ Tests for Salesforce_Utilities.compute_salesforce_update_delta"""
+
+    def setUp(self):
+        # create instance of salesforce utility class
+        self.sf_utils = Salesforce_Utilities()
+        # current salesforce snapshot
+        self.current_df = pd.DataFrame({"Id" : ["1", "2", "3", "4"], "Name" : ["a", "b", "c", None], "Phone" : ["1", "2", "3", "4"]})
+
+    def test_no_changes_returns_empty_list(self):
+        self.assertEqual(self.sf_utils.compute_salesforce_update_delta(self.current_df, self.current_df.copy()), [])
+
+    def test_nulls_on_both_sides_are_not_a_change(self):
+        target_df = self.current_df.copy()
+        target_df.loc[target_df["Id"] == "1", "Phone"] = "9"
+        deltas = self.sf_utils.compute_salesforce_update_delta(self.current_df, target_df)
+        # only the row with a new phone is sent, Id 4 has a null Name on both sides
+        self.assertEqual(len(deltas), 1)
+        assert_frame_equal(deltas[0], pd.DataFrame({"Id" : ["1"], "Phone" : ["9"]}))
+
+    def test_rows_grouped_by_changed_fields_largest_first(self):
+        target_df = pd.DataFrame({"Id" : ["1", "2", "3", "4"], "Name" : ["A", "B", "C", None], "Phone" : ["1", "2", "X", "4"]})
+        deltas = self.sf_utils.compute_salesforce_update_delta(self.current_df, target_df)
+        # Id 1 and 2 only changed Name, Id 3 changed Name and Phone, Id 4 did not change
+        self.assertEqual([list(delta_df.columns) for delta_df in deltas], [["Id", "Name"], ["Id", "Name", "Phone"]])
+        assert_frame_equal(deltas[0], pd.DataFrame({"Id" : ["1", "2"], "Name" : ["A", "B"]}))
+        assert_frame_equal(deltas[1], pd.DataFrame({"Id" : ["3"], "Name" : ["C"], "Phone" : ["X"]}))
+
+    def test_rows_missing_from_snapshot_send_every_field(self):
+        target_df = pd.concat([self.current_df, pd.DataFrame({"Id" : ["5"], "Name" : ["e"], "Phone" : ["5"]})], ignore_index = True)
+        deltas = self.sf_utils.compute_salesforce_update_delta(self.current_df, target_df)
+        assert_frame_equal(deltas[0], pd.DataFrame({"Id" : ["5"], "Name" : ["e"], "Phone" : ["5"]}))
+
+    def test_fields_limit_the_comparison(self):
+        target_df = pd.DataFrame({"Id" : ["1", "2", "3", "4"], "Name" : ["A", "b", "c", None], "Phone" : ["9", "2", "3", "4"]})
+        deltas = self.sf_utils.compute_salesforce_update_delta(self.current_df, target_df, fields = ["Phone"])
+        assert_frame_equal(deltas[0], pd.DataFrame({"Id" : ["1"], "Phone" : ["9"]}))
+
+class TestRetrySalesforceFallout(unittest.TestCase):
+    """ Tests for Salesforce_Utilities.retry_salesforce_fallout and get_salesforce_error_code"""
+
+    def setUp(self):
+        # create instance of salesforce utility class
+        self.sf_utils = Salesforce_Utilities()
+        # keyword arguments and records of every resubmission
+        self.uploads = []
+        # error code returned for each name on each resubmission, names missing from the list pass
+        self.upload_errors = []
+        # replace the upload with a stand-in returning the passing and fallout dataframes
+        self.sf_utils.upload_dataframe_to_salesforce = self.upload
+
+    def upload(self, sf, df, object_name, dml_operation, **kwargs):
+        self.uploads.append(dict(kwargs, names = list(df["Name"])))
+        errors = self.upload_errors[len(self.uploads) - 1] if len(self.uploads) <= len(self.upload_errors) else {}
+        if errors is None:
+            return None
+        results_df = df.assign(RESULTS_success = [name not in errors for name in df["Name"]], RESULTS_errors = [[{"statusCode" : errors[name], "message" : "", "fields" : []}] if name in errors else [] for name in df["Name"]])
+        return [results_df[results_df["RESULTS_success"]], results_df[~results_df["RESULTS_success"]]]
+
+    def fallout(self, codes):
+        # fallout dataframe of an upload, one record per name and error code
+        return pd.DataFrame({"Name" : list(codes), "RESULTS_success" : False, "RESULTS_errors" : [[{"statusCode" : code, "message" : "", "fields" : []}] for code in codes.values()]})
+
+    def test_error_code_from_list_string_and_empty(self):
+        self.assertEqual(self.sf_utils.get_salesforce_error_code([{"statusCode" : "UNABLE_TO_LOCK_ROW", "message" : "x"}]), "UNABLE_TO_LOCK_ROW")
+        self.assertEqual(self.sf_utils.get_salesforce_error_code("[{'statusCode': 'FIELD_CUSTOM_VALIDATION_EXCEPTION'}]"), "FIELD_CUSTOM_VALIDATION_EXCEPTION")
+        self.assertIsNone(self.sf_utils.get_salesforce_error_code([]))
+        self.assertIsNone(self.sf_utils.get_salesforce_error_code(None))
+
+    def test_permanent_errors_never_retried(self):
+        fallout_df = self.fallout({"a" : "UNABLE_TO_LOCK_ROW", "b" : "FIELD_CUSTOM_VALIDATION_EXCEPTION"})
+        passing_df, final_fallout_df = self.sf_utils.retry_salesforce_fallout(None, fallout_df, "Contact", "update")
+        self.assertEqual([upload["names"] for upload in self.uploads], [["a"]])
+        self.assertEqual(list(passing_df["Name"]), ["a"])
+        self.assertEqual(list(final_fallout_df["RESULTS_error_code"]), ["FIELD_CUSTOM_VALIDATION_EXCEPTION"])
+
+    def test_batch_size_halved_on_every_attempt(self):
+        self.upload_errors = [{"a" : "SERVER_UNAVAILABLE"}] * 3
+        passing_df, final_fallout_df = self.sf_utils.retry_salesforce_fallout(None, self.fallout({"a" : "SERVER_UNAVAILABLE"}), "Contact", "update", batch_size = 1000, max_attempts = 3)
+        self.assertEqual([upload["batch_size"] for upload in self.uploads], [500, 250, 125])
+        self.assertEqual(len(passing_df), 0)
+        self.assertEqual(list(final_fallout_df["RESULTS_error_code"]), ["SERVER_UNAVAILABLE"])
+
+    def test_lock_contention_retried_serially(self):
+        self.upload_errors = [{"a" : "UNABLE_TO_LOCK_ROW"}]
+        self.sf_utils.retry_salesforce_fallout(None, self.fallout({"a" : "UNABLE_TO_LOCK_ROW", "b" : "SERVER_UNAVAILABLE"}), "Contact", "update", max_workers = 4)
+        self.sf_utils.retry_salesforce_fallout(None, self.fallout({"c" : "SERVER_UNAVAILABLE"}), "Contact", "update", max_workers = 4)
+        # both attempts with a locked row run serially, without lock contention the workers are kept
+        self.assertEqual([upload["max_workers"] for upload in self.uploads], [1, 1, 4])
+
+    def test_api_and_bulk_api_version_kept(self):
+        self.sf_utils.retry_salesforce_fallout(None, self.fallout({"a" : "UNABLE_TO_LOCK_ROW"}), "Contact", "update", bulk_api_version = 2)
+        self.sf_utils.retry_salesforce_fallout(None, self.fallout({"b" : "UNABLE_TO_LOCK_ROW"}), "Contact", "update", api = "collections")
+        self.assertEqual([(upload["collections_threshold"], upload["bulk_api_version"]) for upload in self.uploads], [(0, 2), (1, 1)])
+
+    def test_failed_resubmission_recorded_on_fallout(self):
+        self.upload_errors = [None]
+        passing_df, final_fallout_df = self.sf_utils.retry_salesforce_fallout(None, self.fallout({"a" : "UNABLE_TO_LOCK_ROW"}), "Contact", "update")
+        self.assertEqual(len(passing_df), 0)
+        self.assertEqual(list(final_fallout_df["RESULTS_error_code"]), ["UNABLE_TO_LOCK_ROW"])
+        self.assertEqual(list(final_fallout_df["RESULTS_retry_error"]), ["retry attempt 1 failed to upload, see log"])
+
+class SalesforceStandIn:
+    """ Minimal stand-in for a simple_salesforce instance answering bulk and sObject Collections uploads
+
+    Every record passes unless its Name starts with `bad`, results are shaped like each api returns them.
+    """
+
+    def __init__(self):
+        self.bulk = self
+        self.requests = []
+
+    def submit_dml(self, object_name, dml_operation, data, external_id_field = None):
+        self.requests.append("bulk")
+        return [{"success" : True, "created" : True, "id" : f"003{index}", "errors" : []} if not record.get("Name", "").startswith("bad")
+                else {"success" : False, "created" : False, "id" : None, "errors" : [{"statusCode" : "REQUIRED_FIELD_MISSING", "message" : "Required fields are missing", "fields" : ["LastName"]}]}
+                for index, record in enumerate(data)]
+
+    def restful(self, path, params = None, method = "GET", data = None):
+        self.requests.append("collections")
+        return [{"id" : f"003{index}", "success" : True, "errors" : []} if not record.get("Name", "").startswith("bad")
+                else {"success" : False, "errors" : [{"statusCode" : "REQUIRED_FIELD_MISSING", "message" : "Required fields are missing", "fields" : ["LastName"], "extendedErrorDetails" : None}]}
+                for index, record in enumerate(json.loads(data)["records"])]
+
+class TestCollectionsResults(unittest.TestCase):
+    """ Tests that sObject Collections uploads return the same results as bulk uploads"""
+
+    def setUp(self):
+        # create instance of salesforce utility class
+        self.sf_utils = Salesforce_Utilities()
+        # contacts to insert, one fails
+        self.df = pd.DataFrame({"Name" : ["Ann", "badBob", "Cid"]})
+
+    def upload(self, collections_threshold):
+        sf = SalesforceStandIn()
+        results = self.sf_utils.upload_dataframe_to_salesforce(sf, self.df.copy(), "Contact", "insert", collections_threshold = collections_threshold)
+        return sf.requests, results
+
+    def test_same_columns_as_bulk(self):
+        collections_requests, (collections_passing_df, collections_fallout_df) = self.upload(collections_threshold = 2000)
+        bulk_requests, (bulk_passing_df, bulk_fallout_df) = self.upload(collections_threshold = 0)
+        self.assertEqual((set(collections_requests), set(bulk_requests)), ({"collections"}, {"bulk"}))
+        self.assertEqual(list(collections_passing_df.columns), list(bulk_passing_df.columns))
+        self.assertEqual(list(collections_fallout_df.columns), list(bulk_fallout_df.columns))
+        assert_frame_equal(collections_passing_df, bulk_passing_df)
+        assert_frame_equal(collections_fallout_df, bulk_fallout_df)
+
+    def test_error_code_read_from_collections_errors(self):
+        requests, (passing_df, fallout_df) = self.upload(collections_threshold = 2000)
+        self.assertEqual(list(fallout_df["RESULTS_errors"].map(self.sf_utils.get_salesforce_error_code)), ["REQUIRED_FIELD_MISSING"])
+
+    def test_created_only_for_inserts_and_upserts(self):
+        results = [{"id" : "003", "success" : True, "errors" : []}]
+        self.assertTrue(self.sf_utils.normalize_salesforce_collection_results("insert", results)[0]["created"])
+        self.assertFalse(self.sf_utils.normalize_salesforce_collection_results("update", results)[0]["created"])
+        self.assertFalse(self.sf_utils.normalize_salesforce_collection_results("upsert", [dict(results[0], created = False)])[0]["created"])
+
+class Bulk2StandIn:
+    """ Minimal stand-in for sf.bulk answering submit_dml_bulk2 with lazy_operation
+
+    Every row passes unless its Name starts with `bad`, the results of each job
+    are yielded as CSV with their own header, like the Bulk 2.0 ingest api.
+    """
+
+    def __init__(self, on_job = None):
+        self.bulk = self
+        # called with the job number before each job is yielded
+        self.on_job = on_job
+
+    def submit_dml_bulk2(self, object_name, dml_operation, csv_data, external_id_field = None, wait = 5, lazy_operation = False):
+        for job_number, data in enumerate(csv_data):
+            header, *rows = data.decode().splitlines()
+            if self.on_job:
+                self.on_job(job_number)
+            yield {
+                "job" : {"id" : f"750{job_number}", "state" : "JobComplete"},
+                "successfulResults" : iter([("\n".join(['"sf__Id","sf__Created",' + header] + [f'"003{job_number}","true",{row}' for row in rows if not row.startswith("bad")]) + "\n").encode()]),
+                "failedResults" : iter([("\n".join(['"sf__Id","sf__Error",' + header] + [f'"","REQUIRED_FIELD_MISSING:Required fields are missing",{row}' for row in rows if row.startswith("bad")]) + "\n").encode()]),
+                "unprocessedrecords" : iter([]),
+            }
+
+class TestUploadDataframeToSalesforceBulk2(unittest.TestCase):
+    """ Tests for streaming the results of Salesforce_Utilities.upload_dataframe_to_salesforce_bulk2"""
+
+    def setUp(self):
+        # create instance of salesforce utility class
+        self.sf_utils = Salesforce_Utilities()
+        # output files in a temporary folder
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.success_file = os.path.join(self.output_dir.name, "success.csv")
+        self.fallout_file = os.path.join(self.output_dir.name, "fallout.csv")
+        # accounts to insert, one fails, split into two jobs of two rows
+        self.df = pd.DataFrame({"Name" : ["Ann", "badBob", "Cid", "Dee"]})
+        upload = self.sf_utils.convert_dataframe_to_csv_chunks
+        self.sf_utils.convert_dataframe_to_csv_chunks = lambda df : upload(df, max_bytes = 16, rows_per_slice = 2)
+
+    def tearDown(self):
+        self.output_dir.cleanup()
+
+    def test_results_appended_as_each_job_completes(self):
+        # rows in the success file when each job completes
+        rows_written = []
+        sf = Bulk2StandIn(on_job = lambda job_number : rows_written.append(len(pd.read_csv(self.success_file)) if job_number > 0 else 0))
+        passing_df, fallout_df = self.sf_utils.upload_dataframe_to_salesforce_bulk2(sf, self.df, "Account", "insert", self.success_file, self.fallout_file)
+        self.assertEqual(rows_written, [0, 1])
+        self.assertEqual(list(pd.read_csv(self.success_file)["Name"]), ["Ann", "Cid", "Dee"])
+        self.assertEqual(list(pd.read_csv(self.fallout_file)["Name"]), ["badBob"])
+        self.assertEqual(list(passing_df["Name"]), ["Ann", "Cid", "Dee"])
+
+    def test_same_columns_as_bulk_v1(self):
+        passing_df, fallout_df = self.sf_utils.upload_dataframe_to_salesforce_bulk2(Bulk2StandIn(), self.df, "Account", "insert")
+        columns = ["Name", "RESULTS_success", "RESULTS_created", "RESULTS_id", "RESULTS_errors"]
+        self.assertEqual((list(passing_df.columns), list(fallout_df.columns)), (columns, columns))
+        self.assertEqual(list(fallout_df["RESULTS_errors"].map(self.sf_utils.get_salesforce_error_code)), ["REQUIRED_FIELD_MISSING"])
+
+    def test_return_results_false_returns_counts(self):
+        self.assertEqual(self.sf_utils.upload_dataframe_to_salesforce_bulk2(Bulk2StandIn(), self.df, "Account", "insert", self.success_file, self.fallout_file, return_results = False), [3, 1])
+
+class TestUploadDataframeDeltaToSalesforce(unittest.TestCase):
+    """ Tests for writing the results of Salesforce_Utilities.upload_dataframe_delta_to_salesforce"""
+
+    def setUp(self):
+        # create instance of salesforce utility class
+        self.sf_utils = Salesforce_Utilities()
+        # output files in a temporary folder
+        self.output_dir = tempfile.TemporaryDirectory()
+        self.success_file = os.path.join(self.output_dir.name, "success.csv")
+        self.fallout_file = os.path.join(self.output_dir.name, "fallout.csv")
+        # current salesforce snapshot and the values to update to, two sets of changed fields
+        self.current_df = pd.DataFrame({"Id" : ["1", "2", "3"], "Name" : ["a", "b", "c"], "Phone" : ["1", "2", "3"]})
+        self.target_df = pd.DataFrame({"Id" : ["1", "2", "3"], "Name" : ["A", "badB", "c"], "Phone" : ["1", "2", "9"]})
+
+    def tearDown(self):
+        self.output_dir.cleanup()
+
+    def upload(self, **kwargs):
+        return self.sf_utils.upload_dataframe_delta_to_salesforce(SalesforceStandIn(), self.current_df, self.target_df, "Contact", self.success_file, self.fallout_file, **kwargs)
+
+    def test_files_hold_every_group_with_every_field(self):
+        passing_df, fallout_df = self.upload()
+        success_df = pd.read_csv(self.success_file, dtype = str)
+        self.assertEqual(list(success_df.columns), ["Id", "Name", "Phone", "RESULTS_success", "RESULTS_created", "RESULTS_id", "RESULTS_errors"])
+        self.assertEqual(sorted(success_df["Id"]), ["1", "3"])
+        self.assertEqual(list(pd.read_csv(self.fallout_file, dtype = str)["Id"]), ["2"])
+        self.assertEqual(sorted(passing_df["Id"]), ["1", "3"])
+
+    def test_results_written_as_each_group_returns(self):
+        upload = self.sf_utils.upload_dataframe_to_salesforce
+        # rows in the success file when each group starts uploading
+        rows_written = []
+
+        def upload_after_reading_file(*args, **kwargs):
+            rows_written.append(len(pd.read_csv(self.success_file)))
+            return upload(*args, **kwargs)
+
+        self.sf_utils.upload_dataframe_to_salesforce = upload_after_reading_file
+        self.upload()
+        self.assertEqual(rows_written, [0, 1])
+
+    def test_return_results_false_returns_counts(self):
+        self.assertEqual(self.upload(return_results = False), [2, 1])
+        self.assertEqual(len(pd.read_csv(self.success_file)), 2)
+
+if __name__ == '__main__':
+    unittest.main()